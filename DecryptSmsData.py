@@ -1,11 +1,8 @@
 import base58
-import base64
 import json
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
+from smsEnvelope import decrypt_bytes
 import os
 import mimetypes
 
@@ -24,37 +21,6 @@ def privkey_to_ec_privkey(wif_key):
     privkey_bytes = bytes.fromhex(privkey_hex)
     return ec.derive_private_key(int.from_bytes(privkey_bytes, "big"), ec.SECP256K1(), default_backend())
 
-def decrypt_aes_key_with_privkey(privkey, encrypted_aes_key):
-    temp_pubkey_bytes = encrypted_aes_key[:33]
-    iv = encrypted_aes_key[33:45]
-    ciphertext = encrypted_aes_key[45:-16]
-    tag = encrypted_aes_key[-16:]
-
-    temp_pubkey = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), temp_pubkey_bytes)
-    shared_secret = privkey.exchange(ec.ECDH(), temp_pubkey)
-    derived_key = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=b"ecdh derived key",
-        backend=default_backend()
-    ).derive(shared_secret)
-
-    cipher = Cipher(algorithms.AES(derived_key), modes.GCM(iv, tag), backend=default_backend())
-    decryptor = cipher.decryptor()
-    aes_key = decryptor.update(ciphertext) + decryptor.finalize()
-
-    return aes_key
-
-def decrypt_data_with_aes(aes_key, encrypted_data):
-    iv = encrypted_data[:12]
-    tag = encrypted_data[-16:]
-    ciphertext = encrypted_data[12:-16]
-    
-    cipher = Cipher(algorithms.AES(aes_key), modes.GCM(iv, tag), backend=default_backend())
-    decryptor = cipher.decryptor()
-    return decryptor.update(ciphertext) + decryptor.finalize()
-
 def decrypt_file(txid, wallet_path="./.smswallet.json"):
     # Load private key from wallet
     wif_key = load_private_key_from_wallet(wallet_path)
@@ -74,18 +40,8 @@ def decrypt_file(txid, wallet_path="./.smswallet.json"):
     encrypted_data_base64 = sms_data['encrypted_data']
     mimetype = sms_data['mimetype']
 
-    # Decode the encrypted data
-    encrypted_data = base64.b64decode(encrypted_data_base64)
-    encrypted_aes_key = encrypted_data[:33+12+32+16]
-    encrypted_message = encrypted_data[33+12+32+16:]
-
-    # Decrypt the AES key and the data
-    aes_key = decrypt_aes_key_with_privkey(privkey, encrypted_aes_key)
-    decrypted_data = decrypt_data_with_aes(aes_key, encrypted_message)
-
-    # For non-text files, the decrypted data is still base64-encoded, so decode it
-    if mimetype != "text/plain":
-        decrypted_data = base64.b64decode(decrypted_data)
+    # Decrypt the envelope (older messages' base64-encoded attachments are decoded too)
+    decrypted_data = decrypt_bytes(privkey, encrypted_data_base64, mimetype)
 
     # Determine the output file path based on the MIME type, all in one output directory
     output_dir = "./decryptedsmscontent"
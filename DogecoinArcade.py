@@ -1,25 +1,16 @@
-from flask import Flask, abort, render_template, render_template_string, send_file, request, jsonify
-import os
-from threading import Lock, local
-from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, abort, render_template, render_template_string, send_file, request
+from threading import local
 import re
-import queue
-from getOrdContent import process_tx
-from bitcoinrpc.authproxy import JSONRPCException
+from contentStore import get_content_store
+from inscriptionJobs import get_fetch_jobs
 
 app = Flask(__name__)
 
-# Queue to manage tasks
-task_queue = queue.Queue()
-# Thread pool to handle concurrent processing
-thread_pool = ThreadPoolExecutor(max_workers=4)
+FETCH_WAIT = 30  # Seconds a content request waits for its inscription to be assembled
+
 # Thread-local storage for RPC connections
 thread_local = local()
 
-# Shared flag and lock to indicate processing state
-processing_flag = False
-processing_lock = Lock()
-
 def get_rpc_connection():
     if not hasattr(thread_local, "rpc_connection"):
         from getOrdContent import rpc_connection
@@ -30,39 +21,18 @@ def is_hexadecimal(s):
     """Check if the string s is a valid hexadecimal string."""
     return re.fullmatch(r'^[0-9a-fA-F]+$', s) is not None
 
-def process_task(genesis_txid, depth=1000):
-    global processing_flag
-    with processing_lock:
-        processing_flag = True
-    try:
-        print(f"Starting processing for {genesis_txid}")
-        process_tx(genesis_txid, depth)
-    except JSONRPCException as e:
-        print(f"JSONRPCException: {e}")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-    finally:
-        with processing_lock:
-            processing_flag = False
-        print(f"Finished processing for {genesis_txid}")
-        task_queue.task_done()
-
 @app.route('/')
 def landing_page():
     return render_template('landing_page.html')
 
 @app.route('/content/<file_id>i0')
 def serve_content(file_id):
-    global processing_flag
-    with processing_lock:
-        if processing_flag:
-            return jsonify({"message": "Server is busy processing ordinal. Please try again later."}), 503
-
     filename = f"{file_id}"
     content_dir = './content'
-    file_path = next((os.path.join(content_dir, file) for file in os.listdir(content_dir) if file.startswith(filename)), None)
+    entry = get_content_store().lookup(filename)
+    file_path = entry['path'] if entry else None
     
-    if file_path and os.path.isfile(file_path):
+    if file_path:
         print(f"File found: {file_path}")
 
         if file_path.endswith('.html'):
@@ -83,7 +53,6 @@ def serve_content(file_id):
 
 @app.errorhandler(404)
 def not_found_error(error):
-    global processing_flag
     request_path = request.path.split('/')[-1]
     genesis_txid = request_path[:-2] if request_path.endswith('i0') else None
 
@@ -91,9 +60,12 @@ def not_found_error(error):
         print(f"Invalid genesis_txid: {request_path}")
         return "Invalid transaction ID", 400
 
-    with processing_lock:
-        if not processing_flag:
-            thread_pool.submit(process_task, genesis_txid, 1000)
+    # Requests for the same inscription share one job; wait a while for it before giving up
+    job = get_fetch_jobs().submit(genesis_txid, 1000)
+    if job.wait(FETCH_WAIT) and job.status == 'done':
+        return serve_content(genesis_txid)
+    if job.status == 'failed':
+        return "Inscription not found", 404
 
     return "Processing ordinal, click refresh when complete", 404
 
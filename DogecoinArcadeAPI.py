@@ -1,39 +1,37 @@
-from flask import Flask, abort, render_template, render_template_string, send_file, request, jsonify, make_response
+from flask import Flask, abort, render_template, render_template_string, send_file, request, jsonify
 from werkzeug.utils import safe_join
 import os
-from threading import Lock, local
-from concurrent.futures import ThreadPoolExecutor
+from threading import local
 import re
-import queue
-from getOrdContent import process_tx
-from bitcoinrpc.authproxy import JSONRPCException
+from getOrdContent import is_complete
 from getWalletOrdContent import process_wallet_files
 from getCollection import process_inscription_id as process_collection
 from getSmsContent import process_tx as process_sms
 from decryptWalletSmsContent import main as decrypt_sms
 from sendOrd import send_ord
+from walletSync import load_sync_state, sync_all_coins
+from getWalletSmsContent import process_wallet_files as process_wallet_sms_files
+from jobRunner import get_job_runner
+from walletStore import get_wallet_store
+from smsLog import get_sms_log
+from contentStore import get_content_store
+from inscriptionJobs import get_fetch_jobs
 import logging
 import json
 from flask import url_for
-import subprocess  # Add this line
 import mimetypes
-from datetime import datetime
 
 mimetypes.add_type('image/webp', '.webp')
 
 app = Flask(__name__)
 
-# Queue to manage tasks
-task_queue = queue.Queue()
-# Thread pool to handle concurrent processing
-thread_pool = ThreadPoolExecutor(max_workers=4)
+CONTENT_MAX_AGE = 31536000  # One year; inscription content is immutable
+FETCH_WAIT = 30  # Seconds a content request waits for its inscription to be assembled
+FETCH_RETRY_AFTER = 5  # Seconds clients are told to wait before polling again
+
 # Thread-local storage for RPC connections
 thread_local = local()
 
-# Shared flag and lock to indicate processing state
-processing_flag = False
-processing_lock = Lock()
-
 def get_rpc_connection():
     if not hasattr(thread_local, "rpc_connection"):
         from getOrdContent import rpc_connection
@@ -44,22 +42,14 @@ def is_hexadecimal(s):
     """Check if the string s is a valid hexadecimal string."""
     return re.fullmatch(r'^[0-9a-fA-F]+$', s) is not None
 
-def process_task(genesis_txid, depth=1000):
-    global processing_flag
-    with processing_lock:
-        processing_flag = True
-    try:
-        print(f"Starting processing for {genesis_txid}")
-        process_tx(genesis_txid, depth)
-    except JSONRPCException as e:
-        print(f"JSONRPCException: {e}")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-    finally:
-        with processing_lock:
-            processing_flag = False
-        print(f"Finished processing for {genesis_txid}")
-        task_queue.task_done()
+def is_txid(s):
+    """Check if the string s is a 64-character hexadecimal transaction id."""
+    return len(s) == 64 and is_hexadecimal(s)
+
+def get_wait_seconds(default=FETCH_WAIT):
+    """ Read ?wait=<seconds> from the request, capped at FETCH_WAIT """
+    wait = request.args.get('wait', default, type=float)
+    return max(0, min(wait, FETCH_WAIT))
 
 @app.route('/')
 def landing_page():
@@ -68,31 +58,40 @@ def landing_page():
 @app.route('/content/<file_id>i0')
 def serve_content(file_id):
     content_dir = './content'
-    file_path = next((os.path.join(content_dir, file) for file in os.listdir(content_dir) if file.startswith(file_id)), None)
+    if not is_txid(file_id):
+        # Answered here rather than through abort(), whose handler would try to fetch it
+        return "Inscription not found", 404
+    entry = get_content_store().lookup(file_id)
     
-    if file_path and os.path.isfile(file_path):
+    if entry:
+        file_path = entry['path']
         print(f"File found: {file_path}")
 
-        mime_type, _ = mimetypes.guess_type(file_path)
-
-        # Handle WebP files
-        if file_path.lower().endswith('.webp'):
-            mime_type = 'image/webp'
+        mime_type = entry['mime_type'] or mimetypes.guess_type(file_path)[0]
 
+        # Content assembled from its whole chunk chain never changes, so it is cached forever
+        # under a strong ETag (its sha256). Anything not recorded as complete in the chain
+        # index is revalidated on every use. conditional=True answers If-None-Match with 304
+        # and Range with 206, and the file is streamed through the server's file wrapper.
+        complete = is_complete(file_id)
         try:
-            with open(file_path, 'rb') as f:
-                content = f.read()
+            response = send_file(
+                os.path.abspath(file_path),
+                mimetype=mime_type,
+                conditional=True,
+                etag=entry['sha256'],
+                last_modified=os.path.getmtime(file_path),
+                max_age=CONTENT_MAX_AGE if complete else 0
+            )
         except Exception as e:
             print(f"Error reading file: {e}")
             abort(500)
 
-        response = make_response(content)
-        response.headers['Content-Type'] = mime_type
         response.headers['Content-Disposition'] = 'inline'
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        response.headers['Last-Modified'] = datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')
+        if complete:
+            response.headers['Cache-Control'] = f'public, max-age={CONTENT_MAX_AGE}, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
 
         return response
     else:
@@ -102,12 +101,13 @@ def serve_content(file_id):
 @app.route('/api/process_wallet', methods=['POST'])
 def process_wallet_api():
     try:
-        process_wallet_files()
-        return jsonify({"message": "Wallet processing completed"}), 200
+        # Same pipeline as /api/getWalletOrdContent, so concurrent calls share one job
+        job = get_job_runner().submit('getWalletOrdContent', process_wallet_files)
+        return job_started_response(job, "Wallet processing started")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-from getCollection import get_collection  # Update this import
+from getCollection import start_collection_import, get_collection_import
 
 @app.route('/api/getCollection', methods=['POST'])
 def get_collection_api():
@@ -117,14 +117,29 @@ def get_collection_api():
     if not collection_slug:
         return jsonify({"error": "Invalid collection_slug"}), 400
 
+    # Append .json to the collection slug
+    full_json_file_name = f"{collection_slug}.json"
+    if not os.path.exists(os.path.join('./collections', full_json_file_name)):
+        return jsonify({"error": "Collection file not found"}), 404
+
     try:
-        # Append .json to the collection slug
-        full_json_file_name = f"{collection_slug}.json"
-        result = get_collection(full_json_file_name)
-        return jsonify({"message": "Collection processing completed", "result": result}), 200
+        # Items are assembled in the background; poll the status URL for per-item progress
+        collection_import = start_collection_import(full_json_file_name)
+        return jsonify({
+            "message": "Collection import started",
+            "status_url": url_for('get_collection_status', collection_slug=collection_slug),
+            "result": collection_import.progress()
+        }), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/getCollection/<collection_slug>/status', methods=['GET'])
+def get_collection_status(collection_slug):
+    collection_import = get_collection_import(f"{collection_slug}.json")
+    if collection_import is None:
+        return jsonify({"error": "No import started for this collection"}), 404
+    return jsonify(collection_import.progress()), 200
+
 @app.route('/api/process_sms', methods=['POST'])
 def process_sms_api():
     data = request.json
@@ -135,16 +150,25 @@ def process_sms_api():
         return jsonify({"error": "Invalid genesis_txid"}), 400
 
     try:
-        process_sms(genesis_txid, depth)
-        return jsonify({"message": "SMS processing completed"}), 200
+        job = get_job_runner().submit(f'process_sms:{genesis_txid.lower()}', process_sms_job, genesis_txid, depth)
+        return job_started_response(job, "SMS processing started")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def process_sms_job(genesis_txid, depth, job=None):
+    """ Job pipeline for /api/process_sms """
+    if process_sms(genesis_txid, depth) is None:
+        raise RuntimeError(f"SMS {genesis_txid} could not be assembled from its whole chunk chain")
+
+def decrypt_sms_job(job=None):
+    """ Job pipeline for /api/decrypt_sms """
+    decrypt_sms()
+
 @app.route('/api/decrypt_sms', methods=['POST'])
 def decrypt_sms_api():
     try:
-        decrypt_sms()
-        return jsonify({"message": "SMS decryption completed"}), 200
+        job = get_job_runner().submit('decrypt_sms', decrypt_sms_job)
+        return job_started_response(job, "SMS decryption started")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -166,65 +190,54 @@ def decrypt_sms_api():
 
 @app.route('/api/wallet/<address>', methods=['GET'])
 def get_wallet_utxos(address):
-    wallet_dir = './wallets'
-    wallet_file = f"{address}.json"
-    wallet_path = os.path.join(wallet_dir, wallet_file)
+    """ List a wallet's UTXOs.
 
-    logging.info(f"Attempting to access wallet file: {wallet_path}")
+    Query parameters: offset, limit, mime (comma-separated mime types to include,
+    'image/*' style wildcards allowed), exclude_mime, sort (position, timestamp,
+    amount, mime_type, genesis_txid) and order (asc or desc).
+    """
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    include_mime = [m for m in request.args.get('mime', '').split(',') if m]
+    exclude_mime = [m for m in request.args.get('exclude_mime', '').split(',') if m]
+    sort = request.args.get('sort', 'position')
+    order = request.args.get('order', 'asc')
 
-    if not os.path.exists(wallet_path):
-        logging.error(f"Wallet file not found: {wallet_path}")
-        return jsonify({"error": "Wallet file not found"}), 404
+    if offset < 0 or (limit is not None and limit < 0) or order not in ('asc', 'desc'):
+        return jsonify({"error": "Invalid offset, limit or order"}), 400
+
+    logging.info(f"Attempting to access wallet: {address}")
 
     try:
-        with open(wallet_path, 'r') as file:
-            utxos = json.load(file)
-        
-        # The entire file content is the list of UTXOs
+        store = get_wallet_store()
+        if not store.has_wallet(address):
+            logging.error(f"Wallet not found: {address}")
+            return jsonify({"error": "Wallet not found"}), 404
+
+        page = store.utxo_page(address, offset, limit, include_mime, exclude_mime, sort, order == 'desc')
         logging.info(f"Successfully retrieved UTXOs for address: {address}")
-        return jsonify({"address": address, "utxos": utxos}), 200
-    except json.JSONDecodeError as e:
-        logging.error(f"Invalid JSON in wallet file: {wallet_path}. Error: {str(e)}")
-        return jsonify({"error": "Invalid JSON in wallet file"}), 500
+        return jsonify({"address": address, "offset": offset, "limit": limit, **page}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logging.error(f"Error reading wallet file: {wallet_path}. Error: {str(e)}")
-        return jsonify({"error": f"Error reading wallet file: {str(e)}"}), 500
+        logging.error(f"Error reading wallet: {address}. Error: {str(e)}")
+        return jsonify({"error": f"Error reading wallet: {str(e)}"}), 500
 
 @app.route('/api/wallets', methods=['GET'])
 def get_wallet_files():
-    wallet_dir = './wallets'
     try:
-        files = os.listdir(wallet_dir)
-        wallet_data = []
-        for file in files:
-            wallet_address = os.path.splitext(file)[0]
-            wallet_path = os.path.join(wallet_dir, file)
-            
-            with open(wallet_path, 'r') as f:
-                utxos = json.load(f)
-            
-            ord_count = sum(1 for utxo in utxos if utxo['genesis_txid'] not in ["not an ord", "encrypted message"])
-            non_ord_balance = sum(utxo['amount'] for utxo in utxos if utxo['genesis_txid'] == "not an ord")
-            
-            # Determine if it's a Bell or Doge address
-            coin_type = "Bell" if wallet_address.startswith('B') else "Doge" if wallet_address.startswith('D') else "Unknown"
-            
-            wallet_data.append({
-                "address": wallet_address,
-                "link": f"/api/wallet/{wallet_address}",
-                "ord_count": ord_count,
-                "non_ord_balance": non_ord_balance,
-                "coin_type": coin_type
-            })
-        
+        # Served from the summaries walletSync maintains in the wallet store
+        wallet_data = [
+            {**summary, "link": f"/api/wallet/{summary['address']}"}
+            for summary in get_wallet_store().wallets()
+        ]
         return jsonify({"wallets": wallet_data}), 200
     except Exception as e:
-        return jsonify({"error": f"Error reading wallet directory: {str(e)}"}), 500
+        return jsonify({"error": f"Error reading wallet summary: {str(e)}"}), 500
 
 
 @app.errorhandler(404)
 def not_found_error(error):
-    global processing_flag
     request_path = request.path
 
     # Ignore API routes and favicon.ico requests
@@ -233,15 +246,42 @@ def not_found_error(error):
 
     genesis_txid = request_path.split('/')[-1][:-2] if request_path.endswith('i0') else None
 
-    if not genesis_txid or not is_hexadecimal(genesis_txid):
+    if not genesis_txid or not is_txid(genesis_txid):
         print(f"Invalid genesis_txid: {request_path}")
         return "Invalid transaction ID", 400
 
-    with processing_lock:
-        if not processing_flag:
-            thread_pool.submit(process_task, genesis_txid, 1000)
+    # Requests for the same inscription share one job; the request waits a while for it
+    # so pages referencing many inscriptions load in one pass instead of after refreshes
+    job = get_fetch_jobs().submit(genesis_txid, 1000)
+    job.wait(get_wait_seconds())
+
+    if job.status == 'done':
+        return serve_content(genesis_txid)
+    if job.status == 'failed':
+        return "Inscription not found", 404
+
+    response = jsonify({
+        "message": "Processing ordinal",
+        "status_url": url_for('content_status', genesis_txid=genesis_txid),
+        **job.to_dict()
+    })
+    response.status_code = 202
+    response.headers['Retry-After'] = str(FETCH_RETRY_AFTER)
+    return response
+
+@app.route('/api/content/<genesis_txid>/status', methods=['GET'])
+def content_status(genesis_txid):
+    if not is_hexadecimal(genesis_txid):
+        return jsonify({"error": "Invalid genesis_txid"}), 400
 
-    return "Processing ordinal, click refresh when complete", 404
+    job = get_fetch_jobs().get(genesis_txid)
+    if job is not None:
+        # ?wait=<seconds> long-polls until the job finishes
+        job.wait(get_wait_seconds(0))
+        return jsonify(job.to_dict()), 200
+    if get_content_store().exists(genesis_txid):
+        return jsonify({"genesis_txid": genesis_txid, "status": "done"}), 200
+    return jsonify({"genesis_txid": genesis_txid, "status": "unknown"}), 404
 
 @app.route('/api/address_book', methods=['GET'])
 def get_address_book():
@@ -269,140 +309,113 @@ def get_address_book():
 @app.route('/api/getOrdContent', methods=['POST'])
 def get_ord_content_api():
     try:
-        process_wallet_files()
-        return jsonify({"message": "Wallet processing completed"}), 200
+        job = get_job_runner().submit('getWalletOrdContent', process_wallet_files)
+        return job_started_response(job, "Wallet processing started")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def job_started_response(job, message):
+    """ 202 response pointing the caller at the job's status endpoint """
+    return jsonify({
+        "message": message,
+        "job": job.to_dict(),
+        "status_url": url_for('get_job_status', job_id=job.id)
+    }), 202
+
 @app.route('/api/walletSync', methods=['POST'])
 def wallet_sync_api():
     try:
-        # Get the directory of the current script
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Construct the path to walletSync.py
-        wallet_sync_path = os.path.join(current_dir, 'walletSync.py')
-        
-        # Run walletSync.py as a subprocess
-        result = subprocess.run(['python', wallet_sync_path], capture_output=True, text=True, check=True)
-        
-        # Check if the script ran successfully
-        if result.returncode == 0:
-            return jsonify({"message": "Wallet synchronization completed successfully"}), 200
-        else:
-            return jsonify({"error": f"Wallet synchronization failed: {result.stderr}"}), 500
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Error during wallet synchronization: {e.stderr}")
-        return jsonify({"error": f"Wallet synchronization failed: {e.stderr}"}), 500
+        job = get_job_runner().submit('walletSync', sync_all_coins)
+        return job_started_response(job, "Wallet synchronization started")
     except Exception as e:
         logging.error(f"Unexpected error during wallet synchronization: {str(e)}")
         return jsonify({"error": f"Unexpected error during wallet synchronization: {str(e)}"}), 500
 
+@app.route('/api/walletSync/status', methods=['GET'])
+def wallet_sync_status_api():
+    try:
+        return jsonify({"sync_state": load_sync_state()}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error reading wallet sync state: {str(e)}"}), 500
+
 @app.route('/api/getWalletOrdContent', methods=['POST'])
 def get_wallet_ord_content_api():
     try:
-        # Get the directory of the current script
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Construct the path to getWalletOrdContent.py
-        wallet_ord_content_path = os.path.join(current_dir, 'getWalletOrdContent.py')
-        
-        # Run getWalletOrdContent.py as a subprocess
-        result = subprocess.run(['python', wallet_ord_content_path], capture_output=True, text=True, check=True)
-        
-        # Check if the script ran successfully
-        if result.returncode == 0:
-            return jsonify({"message": "Wallet ordinal content processing completed successfully", "output": result.stdout}), 200
-        else:
-            return jsonify({"error": f"Wallet ordinal content processing failed: {result.stderr}"}), 500
-    except subprocess.CalledProcessError as e:
-        return jsonify({"error": f"Error during wallet ordinal content processing: {e.stderr}"}), 500
+        job = get_job_runner().submit('getWalletOrdContent', process_wallet_files)
+        return job_started_response(job, "Wallet ordinal content processing started")
     except Exception as e:
         return jsonify({"error": f"Unexpected error during wallet ordinal content processing: {str(e)}"}), 500
 
 @app.route('/api/getWalletSmsContent', methods=['POST'])
 def get_wallet_sms_content_api():
     try:
-        # Get the directory of the current script
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Construct the path to getWalletSmsContent.py
-        wallet_sms_content_path = os.path.join(current_dir, 'getWalletSmsContent.py')
-        
-        # Run getWalletSmsContent.py as a subprocess
-        result = subprocess.run(['python', wallet_sms_content_path], capture_output=True, text=True, check=True)
-        
-        # Check if the script ran successfully
-        if result.returncode == 0:
-            return jsonify({"message": "Wallet SMS content processing completed successfully", "output": result.stdout}), 200
-        else:
-            return jsonify({"error": f"Wallet SMS content processing failed: {result.stderr}"}), 500
-    except subprocess.CalledProcessError as e:
-        return jsonify({"error": f"Error during wallet SMS content processing: {e.stderr}"}), 500
+        job = get_job_runner().submit('getWalletSmsContent', process_wallet_sms_files)
+        return job_started_response(job, "Wallet SMS content processing started")
     except Exception as e:
         return jsonify({"error": f"Unexpected error during wallet SMS content processing: {str(e)}"}), 500
 
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({"jobs": [job.to_dict() for job in get_job_runner().list_jobs()]}), 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    job = get_job_runner().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = get_job_runner().cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
 @app.route('/api/smswallets', methods=['GET'])
 def get_sms_wallet_files():
-    smslogs_dir = './smslogs'
     try:
-        files = os.listdir(smslogs_dir)
-        # Create relative links for each SMS wallet file
-        sms_wallet_links = [
-            f"/api/smswallet/{os.path.splitext(file)[0]}"
-            for file in files if file.endswith('.json')
-        ]
+        # Create relative links for each conversation log
+        sms_wallet_links = [f"/api/smswallet/{address}" for address in get_sms_log().addresses()]
         return jsonify({"smsWallets": sms_wallet_links}), 200
     except Exception as e:
         return jsonify({"error": f"Error reading SMS logs directory: {str(e)}"}), 500
 
-@app.route('/api/smswallet/<address>', methods=['GET'])
-def get_sms_wallet(address):
-    sms_dir = './smslogs'
-    sms_file = f"{address}.json"
-    sms_path = os.path.join(sms_dir, sms_file)
-
-    logging.info(f"Attempting to access SMS wallet file: {sms_path}")
+def sms_page_response(address):
+    """ Return one newest-first page of a conversation, selected by the offset and limit query parameters """
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({"error": "Invalid offset or limit"}), 400
 
-    if not os.path.exists(sms_path):
-        logging.error(f"SMS wallet file not found: {sms_path}")
-        return jsonify({"error": "SMS wallet file not found"}), 404
+    logging.info(f"Attempting to access SMS log: {address}")
 
     try:
-        with open(sms_path, 'r') as file:
-            sms_data = json.load(file)
-        
-        logging.info(f"Successfully retrieved SMS wallet data for address: {address}")
-        return jsonify({"address": address, "sms_data": sms_data}), 200
-    except json.JSONDecodeError as e:
-        logging.error(f"Invalid JSON in SMS wallet file: {sms_path}. Error: {str(e)}")
-        return jsonify({"error": "Invalid JSON in SMS wallet file"}), 500
-    except Exception as e:
-        logging.error(f"Error reading SMS wallet file: {sms_path}. Error: {str(e)}")
-        return jsonify({"error": f"Error reading SMS wallet file: {str(e)}"}), 500
+        sms_log = get_sms_log()
+        if not sms_log.has_log(address):
+            logging.error(f"SMS log not found: {address}")
+            return jsonify({"error": "SMS file not found"}), 404
 
-@app.route('/api/sms/<address>', methods=['GET'])
-def get_sms_data(address):
-    sms_dir = './smslogs'
-    sms_file = f"{address}.json"
-    sms_path = os.path.join(sms_dir, sms_file)
-
-    logging.info(f"Attempting to access SMS file: {sms_path}")
-
-    if not os.path.exists(sms_path):
-        logging.error(f"SMS file not found: {sms_path}")
-        return jsonify({"error": "SMS file not found"}), 404
-
-    try:
-        with open(sms_path, 'r') as file:
-            sms_data = json.load(file)
-        
+        total, sms_data = sms_log.page(address, offset, limit)
         logging.info(f"Successfully retrieved SMS data for address: {address}")
-        return jsonify({"address": address, "sms_data": sms_data}), 200
+        return jsonify({"address": address, "offset": offset, "limit": limit, "total": total, "sms_data": sms_data}), 200
     except json.JSONDecodeError as e:
-        logging.error(f"Invalid JSON in SMS file: {sms_path}. Error: {str(e)}")
+        logging.error(f"Invalid JSON in SMS log: {address}. Error: {str(e)}")
         return jsonify({"error": "Invalid JSON in SMS file"}), 500
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logging.error(f"Error reading SMS file: {sms_path}. Error: {str(e)}")
+        logging.error(f"Error reading SMS log: {address}. Error: {str(e)}")
         return jsonify({"error": f"Error reading SMS file: {str(e)}"}), 500
 
+@app.route('/api/smswallet/<address>', methods=['GET'])
+def get_sms_wallet(address):
+    return sms_page_response(address)
+
+@app.route('/api/sms/<address>', methods=['GET'])
+def get_sms_data(address):
+    return sms_page_response(address)
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,17 @@
+import sys
+import uvicorn
+from a2wsgi import WSGIMiddleware
+from DogecoinArcadeAPI import app
+
+REQUEST_WORKERS = 32  # Threads running Flask views
+
+# ASGI front for the Flask API. Each request runs its Flask view through a2wsgi on a
+# thread pool and is streamed back in chunks. Long operations (syncs, SMS and wallet
+# processing) are started as jobRunner jobs and answer 202 at once, so no view holds
+# a worker until they finish.
+asgi_app = WSGIMiddleware(app, workers=REQUEST_WORKERS)
+
+if __name__ == '__main__':
+    # Usage: python DogecoinArcadeASGI.py [port]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    uvicorn.run(asgi_app, host='0.0.0.0', port=port)
@@ -3,12 +3,14 @@ from flask import Flask, render_template, jsonify, abort, request, redirect, url
 import requests
 from jinja2.exceptions import TemplateNotFound
 import math
+from contentStore import get_content_store
 
 app = Flask(__name__)
 
 API_BASE_URL = os.environ.get('API_BASE_URL', 'http://192.168.68.73:5000')
 WEBSITE_PORT = int(os.environ.get('WEBSITE_PORT', 5001))
 UTXOS_PER_PAGE = 10
+HIDDEN_MIME_TYPES = 'application/json,application/javascript,text/javascript'
 
 print(f"API_BASE_URL is set to: {API_BASE_URL}")
 
@@ -36,26 +38,23 @@ def wallets():
 @app.route('/wallet/<address>')
 def wallet_details(address):
     try:
-        page = request.args.get('page', 1, type=int)
-        response = requests.get(f"{API_BASE_URL}/api/wallet/{address}")
+        page = max(request.args.get('page', 1, type=int), 1)
+        # Filter out JSON and JS files and fetch only this page
+        response = requests.get(f"{API_BASE_URL}/api/wallet/{address}", params={
+            'offset': (page - 1) * UTXOS_PER_PAGE,
+            'limit': UTXOS_PER_PAGE,
+            'exclude_mime': HIDDEN_MIME_TYPES,
+        })
         if response.status_code == 200:
             wallet_data = response.json()
-            utxos = wallet_data['utxos']
             
-            # Filter out JSON and JS files
-            filtered_utxos = [utxo for utxo in utxos if utxo.get('mime_type') not in ['application/json', 'application/javascript', 'text/javascript']]
-            
-            total_utxos = len(filtered_utxos)
-            total_pages = math.ceil(total_utxos / UTXOS_PER_PAGE)
-            start_index = (page - 1) * UTXOS_PER_PAGE
-            end_index = start_index + UTXOS_PER_PAGE
-            paginated_utxos = filtered_utxos[start_index:end_index]
-            ord_count = sum(1 for utxo in filtered_utxos if utxo['genesis_txid'] != "not an ord")
-            non_ord_amount = sum(utxo['amount'] for utxo in filtered_utxos if utxo['genesis_txid'] == "not an ord")
+            total_pages = math.ceil(wallet_data['total'] / UTXOS_PER_PAGE)
+            ord_count = wallet_data['ord_count']
+            non_ord_amount = wallet_data['non_ord_amount']
             
             return render_template('wallet_details.html', 
                                    address=address, 
-                                   utxos=paginated_utxos, 
+                                   utxos=wallet_data['utxos'], 
                                    page=page, 
                                    total_pages=total_pages,
                                    ord_count=ord_count,
@@ -69,18 +68,18 @@ def wallet_details(address):
         abort(500, description=f"Unexpected error: {str(e)}")
 
 def get_file_extension(genesis_txid):
-    content_dir = './content'
-    for file in os.listdir(content_dir):
-        if file.startswith(genesis_txid):
-            _, ext = os.path.splitext(file)
-            return ext
+    entry = get_content_store().lookup(genesis_txid)
+    if entry:
+        _, ext = os.path.splitext(entry['path'])
+        return ext
     return ''
 
 @app.route('/wallet_sync', methods=['POST'])
 def wallet_sync():
     try:
         response = requests.post(f"{API_BASE_URL}/api/walletSync")
-        if response.status_code == 200:
+        # The API answers 202 once the sync job is running in the background
+        if response.status_code in (200, 202):
             return redirect(url_for('wallets'))
         else:
             abort(500, description="Failed to sync wallets")
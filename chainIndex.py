@@ -0,0 +1,247 @@
+import mmap
+import os
+import struct
+import threading
+
+CHAIN_INDEX_PATH = './data/chain_index.bin'
+LEGACY_INDEX_DIRS = ('./indexes', './smsindexes')
+
+# Fixed-size record: kind, vout, txid, record number of the chain it belongs to, byte length
+RECORD = struct.Struct('<B3xI32sQQ')
+CHAIN = 1  # txid = genesis txid; starts a chain
+HOP = 2  # txid:vout = next transaction in the chain
+COMPLETE = 3  # vout = number of hops, length = final content size in bytes
+
+class ChainEntry:
+    __slots__ = ('record', 'hops', 'hop_txids', 'complete', 'hop_count', 'length')
+
+    def __init__(self, record):
+        self.record = record
+        self.hops = []  # Record numbers of the HOP records, in chain order
+        self.hop_txids = set()
+        self.complete = False
+        self.hop_count = None
+        self.length = None
+
+class ChainIndex:
+    """ Packed chunk-chain index for every inscription, ordinal and SMS, in one file.
+
+    The file is a sequence of RECORD.size-byte records that is only ever appended
+    to (one write per record, so several processes can share it). It is
+    memory-mapped and scanned once; after that, a genesis txid maps to its record
+    numbers, and any hop is read straight from the map. Records other processes
+    appended are picked up on the next call.
+    """
+
+    def __init__(self, path=CHAIN_INDEX_PATH, legacy_dirs=LEGACY_INDEX_DIRS):
+        self.path = path
+        self.lock = threading.Lock()
+        self.map = None
+        self.inode = None
+        self.scanned = 0  # Records applied so far
+        self.chains = {}  # genesis txid bytes -> ChainEntry
+        self.records = {}  # CHAIN record number -> ChainEntry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            self.refresh()
+        self.import_text_indexes(legacy_dirs)
+
+    def reset(self):
+        if self.map is not None:
+            self.map.close()
+        self.map = None
+        self.scanned = 0
+        self.chains = {}
+        self.records = {}
+
+    def refresh(self):
+        """ Map and apply records appended since the last call; caller holds the lock """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.reset()
+            return
+        count = stat.st_size // RECORD.size  # A record still being written is picked up next time
+        if stat.st_ino != self.inode or count < self.scanned:
+            # Replaced by compact() or deleted; start over
+            self.reset()
+            self.inode = stat.st_ino
+        if count == self.scanned:
+            return
+        if self.map is not None:
+            self.map.close()
+        with open(self.path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), count * RECORD.size, access=mmap.ACCESS_READ)
+        for number in range(self.scanned, count):
+            self.apply(number, *RECORD.unpack_from(self.map, number * RECORD.size))
+        self.scanned = count
+
+    def apply(self, number, kind, vout, txid, chain, length):
+        if kind == CHAIN:
+            entry = self.chains.get(txid)
+            if entry is None:
+                entry = self.chains[txid] = ChainEntry(number)
+            # A second CHAIN record for the same genesis (two writers at once) is an alias
+            self.records[number] = entry
+        elif kind == HOP:
+            entry = self.records.get(chain)
+            if entry is not None and txid not in entry.hop_txids:
+                entry.hops.append(number)
+                entry.hop_txids.add(txid)
+        elif kind == COMPLETE:
+            entry = self.records.get(chain)
+            if entry is not None:
+                entry.complete = True
+                entry.hop_count = vout
+                entry.length = length
+
+    def append(self, *records):
+        """ Append packed records in one write; returns the record number of the first """
+        data = b''.join(records)
+        with open(self.path, 'ab', buffering=0) as f:
+            f.write(data)
+            end = f.tell()
+        return (end - len(data)) // RECORD.size
+
+    def ensure_chain(self, genesis):
+        """ Return the ChainEntry for genesis bytes, appending its CHAIN record if needed; caller holds the lock """
+        entry = self.chains.get(genesis)
+        if entry is None:
+            self.append(RECORD.pack(CHAIN, 0, genesis, 0, 0))
+            self.refresh()
+            entry = self.chains[genesis]
+        return entry
+
+    def hops(self, genesis_txid):
+        """ Return [(txid, vout), ...] recorded after the genesis transaction """
+        with self.lock:
+            self.refresh()
+            entry = self.chains.get(bytes.fromhex(genesis_txid))
+            if entry is None:
+                return []
+            return [self.read_hop(number) for number in entry.hops]
+
+    def read_hop(self, number):
+        _, vout, txid, _, _ = RECORD.unpack_from(self.map, number * RECORD.size)
+        return txid.hex(), vout
+
+    def info(self, genesis_txid):
+        """ Return {'hops', 'complete', 'length'} for a chain, or None if it is not indexed """
+        with self.lock:
+            self.refresh()
+            entry = self.chains.get(bytes.fromhex(genesis_txid))
+            if entry is None:
+                return None
+            return {'hops': len(entry.hops), 'complete': entry.complete, 'length': entry.length}
+
+    def add_hops(self, genesis_txid, hops):
+        """ Append [(txid, vout), ...] to a chain, skipping hops it already has """
+        genesis = bytes.fromhex(genesis_txid)
+        with self.lock:
+            self.refresh()
+            entry = self.ensure_chain(genesis)
+            records = []
+            for txid, vout in hops:
+                txid = bytes.fromhex(txid)
+                if txid not in entry.hop_txids:
+                    records.append(RECORD.pack(HOP, vout, txid, entry.record, 0))
+            if records:
+                self.append(*records)
+                self.refresh()
+
+    def add_hop(self, genesis_txid, txid, vout):
+        self.add_hops(genesis_txid, [(txid, vout)])
+
+    def mark_complete(self, genesis_txid, hop_count, length):
+        """ Record that the chain was walked to its last chunk and the content is length bytes """
+        genesis = bytes.fromhex(genesis_txid)
+        with self.lock:
+            self.refresh()
+            entry = self.ensure_chain(genesis)
+            if entry.complete and entry.hop_count == hop_count and entry.length == length:
+                return
+            self.append(RECORD.pack(COMPLETE, hop_count, genesis, entry.record, length))
+            self.refresh()
+
+    def mark_complete_many(self, chains):
+        """ Mark [(genesis_txid, length), ...] complete in two writes, keeping each chain's recorded hops """
+        with self.lock:
+            self.refresh()
+            missing = dict.fromkeys(
+                genesis for genesis in (bytes.fromhex(genesis_txid) for genesis_txid, _ in chains)
+                if genesis not in self.chains
+            )
+            if missing:
+                self.append(*(RECORD.pack(CHAIN, 0, genesis, 0, 0) for genesis in missing))
+                self.refresh()
+            records = []
+            for genesis_txid, length in chains:
+                genesis = bytes.fromhex(genesis_txid)
+                entry = self.chains[genesis]
+                if not entry.complete:
+                    records.append(RECORD.pack(COMPLETE, len(entry.hops), genesis, entry.record, length))
+            if records:
+                self.append(*records)
+                self.refresh()
+
+    def import_text_indexes(self, legacy_dirs):
+        """ Import ./indexes/<genesis>.txt style hop lists and rename them to .txt.imported """
+        for directory in legacy_dirs:
+            if not os.path.isdir(directory):
+                continue
+            imported = 0
+            for file_name in sorted(os.listdir(directory)):
+                genesis_txid, extension = os.path.splitext(file_name)
+                if extension != '.txt':
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    with open(path, 'r') as f:
+                        txids = [line.strip() for line in f if line.strip()]
+                    if txids:
+                        # Chains were always followed through output 0
+                        self.add_hops(genesis_txid, [(txid, 0) for txid in txids])
+                except (OSError, ValueError) as e:
+                    print(f"Error importing chain index {path}: {e}")
+                    continue
+                os.replace(path, f"{path}.imported")
+                imported += 1
+            if imported:
+                print(f"Imported {imported} chain indexes from {directory}")
+
+    def compact(self):
+        """ Rewrite the file without duplicate chain and hop records.
+
+        Run it while nothing else is writing the index; appends made during the
+        rewrite are lost.
+        """
+        with self.lock:
+            self.refresh()
+            records = []
+            for genesis, entry in self.chains.items():
+                chain = len(records)
+                records.append(RECORD.pack(CHAIN, 0, genesis, 0, 0))
+                for number in entry.hops:
+                    _, vout, txid, _, _ = RECORD.unpack_from(self.map, number * RECORD.size)
+                    records.append(RECORD.pack(HOP, vout, txid, chain, 0))
+                if entry.complete:
+                    records.append(RECORD.pack(COMPLETE, entry.hop_count, genesis, chain, entry.length or 0))
+            removed = self.scanned - len(records)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(records))
+            self.reset()
+            os.replace(tmp_path, self.path)
+            self.refresh()
+        return removed
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_chain_index():
+    """ Return the process-wide ChainIndex for ./data/chain_index.bin """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ChainIndex()
+        return _index
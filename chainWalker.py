@@ -0,0 +1,362 @@
+import binascii
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from collections import deque
+from itertools import islice
+from bitcoinrpc.authproxy import JSONRPCException
+from chainIndex import get_chain_index
+from spendIndex import get_spend_index
+from txCache import get_transaction, get_block_header, prefetch_transactions, PREFETCH_BATCH
+from rpcClient import get_rpc_client
+
+COIN_TYPES = ('dogecoin', 'bellscoin')
+
+class InvalidGenesisError(Exception):
+    """ The genesis transaction does not start with the sink's marker """
+
+def hex_to_ascii(hex_string):
+    """ Convert hex string to ASCII """
+    print("hex_to_ascii called")
+    try:
+        ascii_string = binascii.unhexlify(hex_string).decode('ascii')
+        return ascii_string
+    except Exception as e:
+        print(f"Error converting hex to ASCII: {e}")
+        return None
+
+def get_extension(mime_type):
+    """ Map a mime type to the file extension content is saved under """
+    # Ignore anything after ';' in mime_type
+    if ';' in mime_type:
+        mime_type = mime_type.split(';')[0].strip()
+
+    extension = '.bin'  # default to binary if mime type is unknown
+
+    # Special case for image/webp
+    if mime_type == 'image/webp':
+        extension = '.webp'
+    else:
+        # Guess the file extension based on MIME type
+        guessed_extension = mimetypes.guess_extension(mime_type)
+        if guessed_extension:
+            extension = guessed_extension
+    return extension
+
+class ContentAssembler:
+    """ Decode hex chunks into a temp file as they arrive and move it into place when complete """
+
+    def __init__(self, genesis_txid, output_dir='./content/', store=None):
+        self.genesis_txid = genesis_txid
+        self.output_dir = output_dir
+        self.store = store
+        self.sha256 = hashlib.sha256()
+        self.file = None
+        self.temp_path = None
+        self.carry = ''  # Dangling hex digit from an odd-length chunk
+        self.size = 0
+
+    def _open(self):
+        if self.file is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            # Dot-prefixed so prefix lookups on the genesis txid never see a partial file
+            fd, self.temp_path = tempfile.mkstemp(dir=self.output_dir, prefix=f".{self.genesis_txid}.", suffix='.part')
+            self.file = os.fdopen(fd, 'wb')
+
+    def write(self, hex_chunk):
+        self._open()
+        hex_chunk = self.carry + hex_chunk
+        if len(hex_chunk) % 2 != 0:
+            hex_chunk, self.carry = hex_chunk[:-1], hex_chunk[-1]
+        else:
+            self.carry = ''
+        data = binascii.unhexlify(hex_chunk)
+        self.file.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+
+    def finish(self, mime_type):
+        """ Flush, close and atomically rename the assembled file; returns its path or None """
+        try:
+            self._open()
+            if self.carry:
+                print("Warning: Data string length is odd, adding five '0' characters...")
+                tail = binascii.unhexlify(self.carry + "00000")  # Add five '0' characters
+                self.file.write(tail)
+                self.sha256.update(tail)
+                self.size += len(tail)
+                self.carry = ''
+            self.file.close()
+            os.chmod(self.temp_path, 0o644)  # mkstemp creates owner-only files
+            extension = get_extension(mime_type)
+            if self.store is not None:
+                filename = self.store.add(self.genesis_txid, self.temp_path, mime_type, extension, self.sha256.hexdigest())
+            else:
+                filename = os.path.join(self.output_dir, f"{self.genesis_txid}{extension}")
+                os.replace(self.temp_path, filename)
+            self.temp_path = None
+            print(f"File saved as {filename}")
+            return filename
+        except Exception as e:
+            print(f"Error saving file: {e}")
+            self.abort()
+            return None
+
+    def abort(self):
+        """ Drop a partially assembled file """
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.temp_path = None
+
+class ChainSink:
+    """ Where one kind of inscription is indexed and saved.
+
+    genesis_marker is the first push of the genesis scriptSig ('ord' or 'sms' as a
+    number) and finished files land in output_dir, or in the store returned by
+    store() when given. Chunk chains go to the shared index returned by index().
+    """
+
+    def __init__(self, name, genesis_marker, output_dir, store=None, index=get_chain_index):
+        self.name = name
+        self.genesis_marker = genesis_marker
+        self.output_dir = output_dir
+        self.store = store
+        self.index = index
+
+    def new_assembler(self, genesis_txid):
+        return ContentAssembler(genesis_txid, self.output_dir, self.store() if self.store else None)
+
+    def read_chain(self, genesis_txid):
+        """ Return the (txid, vout) hops already recorded after the genesis transaction """
+        return self.index().hops(genesis_txid)
+
+    def chain_info(self, genesis_txid):
+        """ Return {'hops', 'complete', 'length'} for the genesis transaction's chain, or None """
+        return self.index().info(genesis_txid)
+
+    def is_complete(self, genesis_txid):
+        """ True once the chain was walked to its last chunk and saved whole """
+        info = self.chain_info(genesis_txid)
+        return bool(info and info['complete'])
+
+    def record_hop(self, genesis_txid, txid, vout):
+        self.index().add_hop(genesis_txid, txid, vout)
+
+    def mark_complete(self, genesis_txid, hop_count, length):
+        self.index().mark_complete(genesis_txid, hop_count, length)
+
+def parse_chunks(asm_data, index):
+    """ Read (remaining count, hex data) pushes from asm_data[index:].
+
+    Returns the joined hex data, the last remaining count seen (None if there was
+    none) and whether the count reached zero.
+    """
+    data_chunks = []
+    num_chunks = None
+    while index < len(asm_data):
+        if asm_data[index].lstrip('-').isdigit():
+            num_chunks = int(asm_data[index].lstrip('-'))
+            data_chunks.append(asm_data[index + 1])
+            index += 2
+
+            if num_chunks == 0:
+                return ''.join(data_chunks), num_chunks, True
+        else:
+            break
+
+    return ''.join(data_chunks), num_chunks, False
+
+class ChainWalk:
+    """ One reassembly of an inscription's chunk chain.
+
+    All progress (remaining chunk count, mime type, chain position) lives on the
+    walk, so any number of walks, for either sink, can run at once in one process.
+    """
+
+    def __init__(self, genesis_txid, sink, rpc_connection, coin_type, depth):
+        self.genesis_txid = genesis_txid
+        self.sink = sink
+        self.rpc_connection = rpc_connection
+        self.coin_type = coin_type
+        self.depth = depth
+        self.num_chunks = 0
+        self.mime_type = None
+        self.vout_index = 0
+        self.processed_txids = set()
+        self.known_txids = deque()
+        self.prefetched = 0  # Known hops ahead of the walk that are already fetched
+        self.chain_complete = False  # The index already holds every hop of this chain
+        self.assembler = sink.new_assembler(genesis_txid)
+
+    def find_next_tx(self, txid):
+        """ Follow the inscription's output to the transaction that spends it; records the hop in the index """
+        print(f"find_next_tx called with txid={txid}, vout_index={self.vout_index}, and depth={self.depth}")
+        try:
+            raw_tx = get_transaction(self.rpc_connection, txid, self.coin_type)
+            block_height = get_block_header(self.rpc_connection, raw_tx['blockhash'], self.coin_type)['height']
+
+            spend_index = get_spend_index(self.coin_type)
+            next_txid = spend_index.find_spend(self.rpc_connection, txid, self.vout_index, block_height, self.depth)
+            if next_txid:
+                print(f"Found next ordinal TX: {next_txid}")
+                self.sink.record_hop(self.genesis_txid, next_txid, self.vout_index)
+                return next_txid
+            return None
+        except JSONRPCException as e:
+            print(f"JSONRPCException while finding next ordinal tx: {e}")
+            return None
+
+    def read_tx(self, txid, is_genesis):
+        """ Feed one chain transaction's chunks to the assembler; returns True once the last chunk was read """
+        raw_tx = get_transaction(self.rpc_connection, txid, self.coin_type)
+        print(f"Transaction ID: {txid}")
+
+        end_of_data = False
+        for vin in raw_tx['vin']:
+            if 'scriptSig' not in vin:
+                continue
+            asm_data = vin['scriptSig'].get('asm', '').split()
+
+            if is_genesis:
+                if not asm_data or asm_data[0] != self.sink.genesis_marker:
+                    raise InvalidGenesisError(txid)
+                self.num_chunks = int(asm_data[1].lstrip('-'))
+                self.mime_type = hex_to_ascii(asm_data[2])
+                print(f"Genesis TX: num_chunks={self.num_chunks}, mime_type={self.mime_type}")
+                data_string, num_chunks, end_of_data = parse_chunks(asm_data, 3)
+                is_genesis = False
+            else:
+                data_string, num_chunks, end_of_data = parse_chunks(asm_data, 0)
+
+            if num_chunks is not None:
+                self.num_chunks = num_chunks
+            self.assembler.write(data_string)
+        return end_of_data
+
+    def prefetch_known(self):
+        """ Fetch the next window of known chunk transactions in one batch.
+
+        Windows keep a long chain from pushing its own early hops out of the
+        byte-bounded transaction LRU before the walk reaches them.
+        """
+        window = [txid for txid, _ in islice(self.known_txids, PREFETCH_BATCH)]
+        prefetch_transactions(self.rpc_connection, window, self.coin_type)
+        self.prefetched = len(window)
+
+    def next_txid(self, txid):
+        if self.known_txids:
+            if self.prefetched == 0:
+                self.prefetch_known()
+            self.prefetched -= 1
+            next_txid, self.vout_index = self.known_txids.popleft()
+            return next_txid
+        if self.chain_complete:
+            # Nothing follows the last recorded hop; no need to search for a spend
+            return None
+        return self.find_next_tx(txid)
+
+    def run(self):
+        """ Walk the chain from the genesis transaction and save the content; returns its path or None """
+        info = self.sink.chain_info(self.genesis_txid)
+        self.chain_complete = bool(info and info['complete'])
+        self.known_txids.extend(self.sink.read_chain(self.genesis_txid))
+        if self.known_txids:
+            # The chunk chain is already known, so chunk txs are fetched ahead of the walk in batches
+            print(f"Prefetching {len(self.known_txids)} chunk transactions for genesis_txid {self.genesis_txid}")
+            self.prefetch_known()
+        else:
+            print(f"No transaction IDs found in the chain index for genesis_txid {self.genesis_txid}, will use find_next_tx.")
+
+        completed = False
+        txid = self.genesis_txid
+        while True:
+            if txid in self.processed_txids:
+                print(f"Detected loop, skipping txid {txid}.")
+                txid = self.find_next_tx(txid)
+                if txid:
+                    continue
+                print(f"End of chain reached, no further ordinals found.")
+                break
+            self.processed_txids.add(txid)
+
+            if self.read_tx(txid, txid == self.genesis_txid):
+                completed = True
+                break
+
+            if self.num_chunks <= 0:
+                print(f"End of data, num_chunks = 0.")
+                completed = True
+                break
+            txid = self.next_txid(txid)
+            if not txid:
+                print(f"End of chain reached, no further ordinals found.")
+                break
+
+        if not self.mime_type:
+            self.assembler.abort()
+            print("Error: MIME type is None, cannot save file.")
+            return None
+        if not completed:
+            # The chain broke off before its last chunk; never store a truncated file
+            self.assembler.abort()
+            print(f"Chain for {self.genesis_txid} ended with {self.num_chunks} chunks missing, discarding partial content.")
+            return None
+
+        # Move the assembled data into place with the appropriate mime type extension
+        path = self.assembler.finish(self.mime_type)
+        if path:
+            # Every hop read is in the index now; record that nothing follows and the final size
+            self.sink.mark_complete(self.genesis_txid, len(self.processed_txids) - 1, self.assembler.size)
+        return path
+
+    def abort(self):
+        self.assembler.abort()
+
+def reassemble(genesis_txid, sink, depth=1000, max_retries=1, retry_delay=5):
+    """ Reassemble an inscription into sink, trying Dogecoin then Bellscoin; returns the saved path or None """
+    print(f"Reassembling {genesis_txid} into {sink.name} with depth={depth}")
+    for coin_type in COIN_TYPES:
+        for attempt in range(max_retries):
+            walk = None
+            try:
+                rpc_connection = get_rpc_client(coin_type)
+                print(f"Attempting to process with {coin_type.capitalize()} RPC (attempt {attempt + 1}/{max_retries})...")
+
+                # Test the connection
+                rpc_connection.getblockcount()
+
+                # Attempt to get the transaction
+                get_transaction(rpc_connection, genesis_txid, coin_type)
+                print(f"Transaction found in {coin_type.capitalize()} blockchain.")
+
+                walk = ChainWalk(genesis_txid, sink, rpc_connection, coin_type, depth)
+                return walk.run()
+
+            except InvalidGenesisError:
+                print("Invalid genesis transaction format.")
+                walk.abort()
+                return None
+            except JSONRPCException as e:
+                if "No such mempool or blockchain transaction" in str(e):
+                    print(f"Transaction not found in {coin_type.capitalize()} blockchain.")
+                    break  # Move to the next coin type
+                print(f"JSONRPCException with {coin_type.capitalize()} RPC: {e}")
+            except ConnectionError as e:
+                print(f"Connection error with {coin_type.capitalize()} RPC: {e}")
+            except Exception as e:
+                print(f"Unexpected error with {coin_type.capitalize()} RPC: {e}")
+            if walk is not None:
+                walk.abort()
+
+            if attempt < max_retries - 1:
+                print(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+            else:
+                print(f"Max retries reached for {coin_type.capitalize()} RPC.")
+
+    print("Transaction not found or unable to process with either Dogecoin or Bellscoin blockchain.")
+    return None
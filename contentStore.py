@@ -0,0 +1,177 @@
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from chainIndex import get_chain_index
+
+mimetypes.add_type('image/webp', '.webp')
+
+CONTENT_DIR = './content'
+CONTENT_INDEX = './data/content_index.db'
+INDEX_VERSION = 1  # 1: content indexed before chains recorded completion was marked complete
+TXID = re.compile(r'[0-9a-fA-F]{64}')
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+class ContentStore:
+    """ Inscription content sharded by txid prefix with a persistent id -> (path, mime, size, sha256) index.
+
+    Hits are served from memory; misses fall through to the SQLite index, which is
+    shared with other processes (wallet sync, collection imports) writing content.
+    """
+
+    def __init__(self, content_dir=CONTENT_DIR, index_path=CONTENT_INDEX, chain_index=get_chain_index):
+        self.content_dir = content_dir
+        self.chain_index = chain_index
+        self.entries = {}
+        self.lock = threading.Lock()
+        os.makedirs(content_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self.db = sqlite3.connect(index_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS content ("
+            "txid TEXT PRIMARY KEY, path TEXT NOT NULL, mime_type TEXT, "
+            "size INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+        )
+        self.db.commit()
+        if self.db.execute("SELECT COUNT(*) FROM content").fetchone()[0] == 0:
+            self.rebuild_index()
+        self.migrate_flat_files()
+        if self.db.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+            self.mark_complete([(txid, entry['size']) for txid, entry in self.iter_entries()])
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            self.db.commit()
+
+    def shard_dir(self, txid):
+        return os.path.join(self.content_dir, txid[:2].lower())
+
+    def rebuild_index(self):
+        """ Index shard files left on disk when the index database is new or was deleted """
+        rows = []
+        for shard in os.listdir(self.content_dir):
+            shard_path = os.path.join(self.content_dir, shard)
+            if shard.startswith('.') or not os.path.isdir(shard_path):
+                continue
+            for file_name in os.listdir(shard_path):
+                path = os.path.join(shard_path, file_name)
+                if file_name.startswith('.') or not os.path.isfile(path):
+                    continue
+                txid = os.path.splitext(file_name)[0]
+                rows.append((txid, path, mimetypes.guess_type(file_name)[0], os.path.getsize(path), file_sha256(path)))
+        if rows:
+            print(f"Rebuilt content index with {len(rows)} files")
+            with self.lock:
+                self.db.executemany("INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?, ?)", rows)
+                self.db.commit()
+            self.mark_complete([(row[0], row[3]) for row in rows])
+
+    def mark_complete(self, chains):
+        """ Record files found on disk, [(txid, size), ...], as complete in the chain index.
+
+        Content saved before the chain index tracked completion is only kept when
+        whole, and would otherwise never be served with the immutable Cache-Control.
+        """
+        chains = [(txid, size) for txid, size in chains if TXID.fullmatch(txid)]
+        if chains:
+            self.chain_index().mark_complete_many(chains)
+
+    def migrate_flat_files(self):
+        """ Move files still sitting directly in the content folder into their shard """
+        moved = []
+        for file_name in os.listdir(self.content_dir):
+            path = os.path.join(self.content_dir, file_name)
+            if file_name.startswith('.') or not os.path.isfile(path):
+                continue
+            txid, extension = os.path.splitext(file_name)
+            mime_type = mimetypes.guess_type(file_name)[0]
+            print(f"Moving {path} into the sharded content store")
+            moved.append((txid, os.path.getsize(path)))
+            self.add(txid, path, mime_type, extension)
+        self.mark_complete(moved)
+
+    def lookup(self, txid):
+        """ Return {'path', 'mime_type', 'size', 'sha256'} for a stored inscription, or None """
+        entry = self.entries.get(txid)
+        if entry is not None:
+            if os.path.isfile(entry['path']):
+                return entry
+            # Removed by another process (eraseContent.py) since it was cached
+            self.remove(txid)
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT path, mime_type, size, sha256 FROM content WHERE txid = ?", (txid,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = {'path': row[0], 'mime_type': row[1], 'size': row[2], 'sha256': row[3]}
+        if not os.path.isfile(entry['path']):
+            # Deleted behind the store's back
+            self.remove(txid)
+            return None
+        self.entries[txid] = entry
+        return entry
+
+    def exists(self, txid):
+        return self.lookup(txid) is not None
+
+    def add(self, txid, source_path, mime_type, extension, sha256=None):
+        """ Move a finished file into its shard and index it; returns the stored path """
+        shard = self.shard_dir(txid)
+        os.makedirs(shard, exist_ok=True)
+        path = os.path.join(shard, f"{txid}{extension}")
+        if sha256 is None:
+            sha256 = file_sha256(source_path)
+        size = os.path.getsize(source_path)
+        shutil.move(source_path, path)
+
+        entry = {'path': path, 'mime_type': mime_type, 'size': size, 'sha256': sha256}
+        with self.lock:
+            previous = self.db.execute("SELECT path FROM content WHERE txid = ?", (txid,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?, ?)",
+                (txid, path, mime_type, size, sha256)
+            )
+            self.db.commit()
+            self.entries[txid] = entry
+        if previous and previous[0] != path and os.path.exists(previous[0]):
+            # Same inscription saved earlier under another extension
+            os.remove(previous[0])
+        return path
+
+    def remove(self, txid):
+        """ Forget an inscription and delete its file """
+        with self.lock:
+            row = self.db.execute("SELECT path FROM content WHERE txid = ?", (txid,)).fetchone()
+            self.db.execute("DELETE FROM content WHERE txid = ?", (txid,))
+            self.db.commit()
+            self.entries.pop(txid, None)
+        if row and os.path.exists(row[0]):
+            os.remove(row[0])
+
+    def iter_entries(self):
+        """ Yield (txid, entry) for every indexed inscription """
+        with self.lock:
+            rows = self.db.execute("SELECT txid, path, mime_type, size, sha256 FROM content").fetchall()
+        for txid, path, mime_type, size, sha256 in rows:
+            yield txid, {'path': path, 'mime_type': mime_type, 'size': size, 'sha256': sha256}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_content_store():
+    """ Return the process-wide ContentStore for ./content """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ContentStore()
+        return _store
@@ -1,31 +1,29 @@
 import base58
-import base64
 import json
 import os
 import mimetypes
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import configparser
-from bitcoinrpc.authproxy import AuthServiceProxy
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from rpcClient import get_rpc_client
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
 import getPubKey  # Assuming getPubKey is available and works as described
 import getPrivKey  # Assuming getPrivKey is available and works as described
+from txCache import get_transaction, get_block_header, prefetch_transactions, prefetch_block_headers
+from walletStore import get_wallet_store
+from smsLog import get_sms_log
+from smsEnvelope import read_sms_json, decrypt_sms_file
 
-def find_wallet_for_txid(txid, wallets_dir="./wallets"):
-    """Find the wallet containing the UTXO with the given txid."""
-    for wallet_filename in os.listdir(wallets_dir):
-        if wallet_filename.endswith(".json"):
-            wallet_address = os.path.splitext(wallet_filename)[0]
-            wallet_file_path = os.path.join(wallets_dir, wallet_filename)
-            with open(wallet_file_path, "r") as wallet_file:
-                wallet_data = json.load(wallet_file)
-                for utxo in wallet_data:
-                    if utxo["sms_txid"] == txid:
-                        return wallet_address
-    return None
+SMS_CONTENT_DIR = "./smscontent"
+DECRYPT_WORKERS = os.cpu_count() or 1  # Processes doing the ECDH/HKDF/AES-GCM work
+PROCESS_POOL_MIN = 64  # Smaller backlogs are decrypted inline; starting the pool costs more than it saves
+
+_ec_privkeys = {}  # WIF -> derived EC private key, per process
+
+def find_wallet_for_txid(txid):
+    """Find the wallet that received the SMS with the given txid."""
+    return get_wallet_store().find_receiving_address(txid)
 
 def wif_to_hex(wif_key):
     decoded_wif = base58.b58decode_check(wif_key)
@@ -37,63 +35,9 @@ def privkey_to_ec_privkey(wif_key):
     privkey_bytes = bytes.fromhex(privkey_hex)
     return ec.derive_private_key(int.from_bytes(privkey_bytes, "big"), ec.SECP256K1(), default_backend())
 
-def decrypt_aes_key_with_privkey(privkey, encrypted_aes_key):
-    temp_pubkey_bytes = encrypted_aes_key[:33]
-    iv = encrypted_aes_key[33:45]
-    ciphertext = encrypted_aes_key[45:-16]
-    tag = encrypted_aes_key[-16:]
-
-    temp_pubkey = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), temp_pubkey_bytes)
-    shared_secret = privkey.exchange(ec.ECDH(), temp_pubkey)
-    derived_key = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=b"ecdh derived key",
-        backend=default_backend()
-    ).derive(shared_secret)
-
-    cipher = Cipher(algorithms.AES(derived_key), modes.GCM(iv, tag), backend=default_backend())
-    decryptor = cipher.decryptor()
-    aes_key = decryptor.update(ciphertext) + decryptor.finalize()
-
-    return aes_key
-
-def decrypt_data_with_aes(aes_key, encrypted_data):
-    iv = encrypted_data[:12]
-    tag = encrypted_data[-16:]
-    ciphertext = encrypted_data[12:-16]
-    
-    cipher = Cipher(algorithms.AES(aes_key), modes.GCM(iv, tag), backend=default_backend())
-    decryptor = cipher.decryptor()
-    return decryptor.update(ciphertext) + decryptor.finalize()
-
-def get_nickname_from_address_book(pubkey, address, address_book_path="./sms/addressBook.json"):
-    with open(address_book_path, "r") as address_book_file:
-        address_book = json.load(address_book_file)
-        for entry in address_book:
-            if entry['pubkey'] == pubkey and entry['address'] == address:
-                return entry['nickname']
-    return "Unknown"
-
-def append_to_json_file(file_path, new_data):
-    if os.path.exists(file_path):
-        with open(file_path, "r+") as file:
-            existing_data = json.load(file)
-            existing_data.append(new_data)  # Add the new data to the list
-
-            # Sort the list by the 'timestamp' field in descending order
-            existing_data.sort(key=lambda x: x['timestamp'], reverse=True)
-
-            file.seek(0)
-            json.dump(existing_data, file, indent=4)
-            file.truncate()  # Ensure any leftover data is removed
-    else:
-        with open(file_path, "w") as file:
-            json.dump([new_data], file, indent=4)
-
-def save_decrypted_file(txid, mimetype, decrypted_data):
-    output_dir = "./smscontent"
+def decrypted_file_path(txid, mimetype):
+    """ Return where the decrypted SMS is saved, or None if its MIME type has no known extension """
+    output_dir = SMS_CONTENT_DIR
     os.makedirs(output_dir, exist_ok=True)
 
     # Manually handle common MIME types
@@ -112,136 +56,195 @@ def save_decrypted_file(txid, mimetype, decrypted_data):
         print(f"Unhandled MIME type: {mimetype}, could not determine a valid extension.")
         return None
 
-    output_file_path = os.path.join(output_dir, f"{txid}{extension}")
-
-    # Handle different types of files appropriately
-    if "text" in mimetype:
-        with open(output_file_path, "w") as file:
-            file.write(decrypted_data.decode())
-    else:
-        with open(output_file_path, "wb") as file:
-            file.write(decrypted_data)
-
-    print(f"Decrypted file saved to {output_file_path}")
-    return output_file_path
+    return os.path.join(output_dir, f"{txid}{extension}")
 
-def decrypt_file(txid, sms_data, privkey, wallet_address, rpc_connection):
-    encrypted_data_base64 = sms_data['encrypted_data']
+def load_address_book(address_book_path="./sms/addressBook.json"):
+    """ Return {(pubkey, address): nickname} from the address book, or {} if there is none """
+    if not os.path.exists(address_book_path):
+        return {}
+    with open(address_book_path, "r") as address_book_file:
+        return {(entry['pubkey'], entry['address']): entry['nickname'] for entry in json.load(address_book_file)}
+
+def get_ec_privkey(wif_key):
+    """ Derive the EC private key for a WIF once per process """
+    privkey = _ec_privkeys.get(wif_key)
+    if privkey is None:
+        privkey = _ec_privkeys[wif_key] = privkey_to_ec_privkey(wif_key)
+    return privkey
+
+def decrypt_task(task):
+    """ Pool entry point: (txid, wif_key, json_path, output_path) -> (txid, error or None).
+
+    The envelope is streamed from the JSON into output_path, so attachments are
+    never held in memory whole.
+    """
+    txid, wif_key, json_path, output_path = task
+    try:
+        decrypt_sms_file(get_ec_privkey(wif_key), json_path, output_path)
+        return txid, None
+    except Exception as e:
+        return txid, str(e)
+
+def record_message(txid, sms_data, output_file_path, wallet_address, sender, timestamp, address_book):
+    """ Append a decrypted SMS to the sender's conversation log and delete its ./smscontent json """
     mimetype = sms_data['mimetype']
+    print(f"Decrypted file saved to {output_file_path}")
 
-    # Decode the encrypted data
-    encrypted_data = base64.b64decode(encrypted_data_base64)
-    encrypted_aes_key = encrypted_data[:33+12+32+16]
-    encrypted_message = encrypted_data[33+12+32+16:]
-
-    # Decrypt the AES key and the data
-    aes_key = decrypt_aes_key_with_privkey(privkey, encrypted_aes_key)
-    decrypted_data = decrypt_data_with_aes(aes_key, encrypted_message)
-
-    # Decode data if necessary
-    if mimetype != "text/plain":
-        decrypted_data = base64.b64decode(decrypted_data)
-
-    # Save the decrypted file
-    output_file_path = save_decrypted_file(txid, mimetype, decrypted_data)
-
-    # Only proceed if the file was saved successfully
-    if output_file_path is not None:
-        # Fetch public key and address associated with the transaction
-        pubkeys_with_addresses = getPubKey.get_public_keys_from_tx(txid)
-        pubkey, address = pubkeys_with_addresses[0]  # Assuming first entry is what we need
-
-        # Get nickname from address book
-        nickname = get_nickname_from_address_book(pubkey, address)
-
-        # Fetch the transaction details to get the blockhash
-        tx_details = rpc_connection.getrawtransaction(txid, 1)
-        blockhash = tx_details["blockhash"]
-
-        # Fetch the block details to get the block time
-        block_details = rpc_connection.getblock(blockhash)
-        timestamp = datetime.utcfromtimestamp(block_details["time"]).isoformat()
+    pubkey, address = sender
 
-        # Handle data field in sms_data JSON
-        if mimetype != "text/plain" and "data" in sms_data:
-            data_content = sms_data["data"]
-        else:
-            data_content = decrypted_data.decode() if mimetype == "text/plain" else ""
-
-        # Prepare the new JSON content
-        new_json_data = {
-            "nickname": nickname,
-            "pubkey": pubkey,
-            "address": address,
-            "mimetype": mimetype,
-            "data": data_content,
-            "sms_txid": txid,
-            "receiving_address": wallet_address,  # Add the receiving address used to get the privKey         
-            "timestamp": timestamp,  # Use blockchain timestamp
-            "tag": "received",
-            "read": "false"
-        }
-
-        # Determine the JSON file path and append the data using the address as the filename
-        output_json_dir = "./smslogs"
-        os.makedirs(output_json_dir, exist_ok=True)
-        output_json_file_path = os.path.join(output_json_dir, f"{address}.json")
-
-        append_to_json_file(output_json_file_path, new_json_data)
-
-        print(f"Decrypted data appended to {output_json_file_path}")
-
-        # Delete the original .json file after processing
-        json_file_path = os.path.join("./smscontent", f"{txid}.json")
-        if os.path.exists(json_file_path):
-            os.remove(json_file_path)
-            print(f"Deleted original file: {json_file_path}")
+    # Handle data field in sms_data JSON
+    if mimetype != "text/plain" and "data" in sms_data:
+        data_content = sms_data["data"]
+    elif mimetype == "text/plain":
+        with open(output_file_path, "r") as file:
+            data_content = file.read()
     else:
-        print(f"File for transaction {txid} was not saved. Original content not deleted.")
-
-def load_rpc_config(config_file='rpc.conf'):
-    config = configparser.ConfigParser()
-    config.read(config_file)
+        data_content = ""
+
+    # Prepare the new JSON content
+    new_json_data = {
+        "nickname": address_book.get((pubkey, address), "Unknown"),
+        "pubkey": pubkey,
+        "address": address,
+        "mimetype": mimetype,
+        "data": data_content,
+        "sms_txid": txid,
+        "receiving_address": wallet_address,  # Add the receiving address used to get the privKey         
+        "timestamp": timestamp,  # Use blockchain timestamp
+        "tag": "received",
+        "read": "false"
+    }
 
-    rpc_user = config.get('rpc', 'user')
-    rpc_password = config.get('rpc', 'password')
-    rpc_host = config.get('rpc', 'host')
-    rpc_port = config.get('rpc', 'port')
+    # Append to the conversation log for the sending address
+    output_json_file_path = get_sms_log().append(address, new_json_data)
 
-    return rpc_user, rpc_password, rpc_host, rpc_port
+    print(f"Decrypted data appended to {output_json_file_path}")
 
-def connect_to_rpc():
-    rpc_user, rpc_password, rpc_host, rpc_port = load_rpc_config()
-    rpc_url = f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}"
-    return AuthServiceProxy(rpc_url)
+    # Delete the original .json file after processing
+    json_file_path = os.path.join(SMS_CONTENT_DIR, f"{txid}.json")
+    if os.path.exists(json_file_path):
+        os.remove(json_file_path)
+        print(f"Deleted original file: {json_file_path}")
 
-def main():
-    # Connect to RPC
-    rpc_connection = connect_to_rpc()
+def load_pending_messages(smscontent_dir=SMS_CONTENT_DIR):
+    """ Return [(txid, sms_data), ...] for every .json waiting in the /smscontent directory.
 
-    # Iterate over each .json file in the /smscontent directory
-    smscontent_dir = "./smscontent"
-    for filename in os.listdir(smscontent_dir):
+    sms_data holds the message fields without encrypted_data, which is only read
+    when the message is decrypted.
+    """
+    messages = []
+    for filename in sorted(os.listdir(smscontent_dir)):
         if filename.endswith(".json"):
             txid = os.path.splitext(filename)[0]
-            input_file_path = os.path.join(smscontent_dir, filename)
-
-            # Load the JSON content
-            with open(input_file_path, "r") as json_file:
-                sms_data = json.load(json_file)
-
-            # Find the wallet containing the UTXO for this txid
-            wallet_address = find_wallet_for_txid(txid)
-            if wallet_address is None:
-                print(f"Wallet containing txid {txid} not found.")
+            try:
+                sms_data, _ = read_sms_json(os.path.join(smscontent_dir, filename))
+            except ValueError as e:
+                print(f"Skipping {filename}: {e}")
                 continue
-
-            # Retrieve the private key for the wallet address
-            privkey = getPrivKey.get_private_key(wallet_address)
-            ec_privkey = privkey_to_ec_privkey(privkey)
-
-            # Decrypt the file and save the output
-            decrypt_file(txid, sms_data, ec_privkey, wallet_address, rpc_connection)
+            messages.append((txid, sms_data))
+    return messages
+
+def prefetch_message_details(receivers):
+    """ Resolve sender (pubkey, address) and block time for {txid: receiving address}.
+
+    SMS transactions and their block headers are fetched in one batch per coin
+    instead of a getrawtransaction and getblockheader round trip per message.
+    """
+    by_coin = {}
+    for txid, wallet_address in receivers.items():
+        coin_type = 'bellscoin' if wallet_address.startswith('be') else 'dogecoin'
+        by_coin.setdefault(coin_type, []).append(txid)
+
+    senders, timestamps = {}, {}
+    for coin_type, txids in by_coin.items():
+        rpc_connection = get_rpc_client(coin_type)
+        prefetch_transactions(rpc_connection, txids, coin_type)
+
+        blockhashes = {}
+        for txid in txids:
+            try:
+                tx_details = get_transaction(rpc_connection, txid, coin_type)
+            except Exception as e:
+                print(f"Error fetching transaction {txid}: {e}")
+                continue
+            pubkeys_with_addresses = getPubKey.get_public_keys_from_raw_tx(tx_details, coin_type)
+            if not pubkeys_with_addresses:
+                print(f"No sender public key found for {txid}.")
+                continue
+            if not tx_details.get("blockhash"):
+                print(f"Transaction {txid} is not confirmed yet; leaving it for the next run.")
+                continue
+            senders[txid] = pubkeys_with_addresses[0]  # Assuming first entry is what we need
+            blockhashes[txid] = tx_details["blockhash"]
+
+        prefetch_block_headers(rpc_connection, blockhashes.values(), coin_type)
+        for txid, blockhash in blockhashes.items():
+            try:
+                block_details = get_block_header(rpc_connection, blockhash, coin_type)
+            except Exception as e:
+                print(f"Error fetching block {blockhash} for {txid}: {e}")
+                continue
+            timestamps[txid] = datetime.utcfromtimestamp(block_details["time"]).isoformat()
+    return senders, timestamps
+
+def main(max_workers=DECRYPT_WORKERS):
+    """ Decrypt every pending SMS in ./smscontent.
+
+    Private keys are dumped once per receiving address, sender details and block
+    times are prefetched in bulk, and the ECDH/HKDF/AES-GCM work runs on a
+    process pool when the backlog is large enough to pay for it.
+    """
+    messages = load_pending_messages()
+
+    # Find the wallet containing the UTXO for each txid
+    receivers = {}
+    for txid, _ in messages:
+        wallet_address = find_wallet_for_txid(txid)
+        if wallet_address is None:
+            print(f"Wallet containing txid {txid} not found.")
+        else:
+            receivers[txid] = wallet_address
+
+    privkeys = getPrivKey.get_private_keys(receivers.values())
+    senders, timestamps = prefetch_message_details(
+        {txid: address for txid, address in receivers.items() if address in privkeys}
+    )
+
+    sms_by_txid = dict(messages)
+    output_paths = {}
+    for txid in receivers:
+        if txid not in timestamps:
+            continue
+        output_paths[txid] = decrypted_file_path(txid, sms_by_txid[txid]['mimetype'])
+        if output_paths[txid] is None:
+            print(f"File for transaction {txid} was not saved. Original content not deleted.")
+            del output_paths[txid]
+    tasks = [
+        (txid, privkeys[receivers[txid]], os.path.join(SMS_CONTENT_DIR, f"{txid}.json"), output_path)
+        for txid, output_path in output_paths.items()
+    ]
+    if not tasks:
+        return
+    print(f"Decrypting {len(tasks)} messages")
+
+    address_book = load_address_book()
+
+    def record_results(results):
+        for txid, error in results:
+            if error is not None:
+                print(f"Error decrypting {txid}: {error}")
+                continue
+            record_message(
+                txid, sms_by_txid[txid], output_paths[txid], receivers[txid],
+                senders[txid], timestamps[txid], address_book
+            )
+
+    if max_workers > 1 and len(tasks) >= PROCESS_POOL_MIN:
+        # Spawned workers: forking a threaded server process can inherit held locks
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            record_results(pool.map(decrypt_task, tasks, chunksize=max(len(tasks) // (max_workers * 4), 1)))
+    else:
+        record_results(map(decrypt_task, tasks))
 
 if __name__ == "__main__":
     main()
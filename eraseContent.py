@@ -1,17 +1,16 @@
-import os
+from contentStore import get_content_store
 
-def delete_small_files(directory, size_limit_kb):
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            if os.path.getsize(file_path) < size_limit_kb * 1024:
-                try:
-                    os.remove(file_path)
-                    print(f"Deleted: {file_path}")
-                except Exception as e:
-                    print(f"Error deleting {file_path}: {e}")
+def delete_small_content(size_limit_kb):
+    """ Delete stored inscriptions below the size limit and drop them from the content index """
+    store = get_content_store()
+    for txid, entry in list(store.iter_entries()):
+        if entry['size'] < size_limit_kb * 1024:
+            try:
+                store.remove(txid)
+                print(f"Deleted: {entry['path']}")
+            except Exception as e:
+                print(f"Error deleting {entry['path']}: {e}")
 
 if __name__ == "__main__":
-    content_directory = "./content"
     size_limit_kb = 100  # size limit in KB
-    delete_small_files(content_directory, size_limit_kb)
+    delete_small_content(size_limit_kb)
@@ -1,17 +1,10 @@
-import os
+from chainIndex import get_chain_index
 
-def delete_small_files(directory, size_limit_bytes):
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            if os.path.getsize(file_path) < size_limit_bytes:
-                try:
-                    os.remove(file_path)
-                    print(f"Deleted: {file_path}")
-                except Exception as e:
-                    print(f"Error deleting {file_path}: {e}")
+def compact_chain_index():
+    """ Drop duplicate chain and hop records from the shared chain index """
+    removed = get_chain_index().compact()
+    print(f"Removed {removed} redundant records from the chain index")
 
 if __name__ == "__main__":
-    content_directory = "./indexes"
-    size_limit_bytes = 10  # size limit in bytes
-    delete_small_files(content_directory, size_limit_bytes)
+    # Chains without hops are no longer written, so there are no empty index files left to delete
+    compact_chain_index()
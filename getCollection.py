@@ -1,14 +1,19 @@
 import json
 import os
-from getOrdContent import process_tx
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contentStore import get_content_store
+from inscriptionJobs import get_fetch_jobs
+
+COLLECTION_WORKERS = 4  # Collection items assembled in parallel, on the import's own threads
+RECORD_BATCH = 100  # Stored items written to scanned_collections.json at a time
+SCANNED_COLLECTIONS_PATH = "./data/scanned_collections.json"
+scanned_collections_lock = threading.Lock()
 
 def file_exists_in_content_folder(file_base_name):
     """Check if a file with the given base name exists in the ./content folder, ignoring the extension."""
-    content_folder = "./content"
-    for file in os.listdir(content_folder):
-        if file.startswith(file_base_name):
-            return True
-    return False
+    return get_content_store().exists(file_base_name)
 
 def process_inscription_id(inscription_id):
     """Process an inscription ID if it doesn't already exist in the content folder."""
@@ -18,15 +23,37 @@ def process_inscription_id(inscription_id):
             print(f"File for inscriptionId {inscription_id} already exists in the content folder. Skipping.")
         else:
             print(f"Processing inscriptionId: {inscription_id}")
-            process_tx(inscription_id, depth=1000)
+            fetch_inscription(inscription_id)
             return 1  # Return 1 for a successfully processed UTXO
     else:
         print("Invalid or missing inscriptionId.")
     return 0  # Return 0 if nothing was processed
 
+def fetch_inscription(inscription_id):
+    """Assemble an inscription on the calling thread through the shared fetch registry; returns the finished job.
+
+    Going through the registry means an import and an on-demand request for the same
+    id share one assembly instead of writing the same store entry twice, while the
+    import's threads do the work instead of the workers serving requests.
+    """
+    # Collections list every item themselves, so referenced inscriptions are not prefetched
+    return get_fetch_jobs().fetch(inscription_id, 1000, prefetch_depth=0)
+
+def import_inscription_id(inscription_id):
+    """Assemble one collection item; returns 'stored' if it was assembled from its whole chain."""
+    try:
+        job = fetch_inscription(inscription_id)
+    except Exception as e:
+        print(f"Error processing inscriptionId {inscription_id}: {e}")
+        return 'failed'
+    if job.status != 'done':
+        print(f"Error processing inscriptionId {inscription_id}: {job.error}")
+        return 'failed'
+    return 'stored'
+
 def load_scanned_collections():
     """Load the scanned collections from the JSON file."""
-    scanned_collections_path = "./data/scanned_collections.json"
+    scanned_collections_path = SCANNED_COLLECTIONS_PATH
     if not os.path.exists(scanned_collections_path):
         return {}
     with open(scanned_collections_path, 'r') as file:
@@ -35,49 +62,166 @@ def load_scanned_collections():
 def save_scanned_collections(scanned_collections):
     """Save the scanned collections to the JSON file."""
     os.makedirs("./data", exist_ok=True)
-    scanned_collections_path = "./data/scanned_collections.json"
-    with open(scanned_collections_path, 'w') as file:
+    scanned_collections_path = SCANNED_COLLECTIONS_PATH
+    tmp_path = f"{scanned_collections_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as file:
         json.dump(scanned_collections, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    # Replaced in one step, so a crash never leaves a half-written file
+    os.replace(tmp_path, scanned_collections_path)
+
+def record_stored_items(collection_name, inscription_ids, total, complete=False):
+    """Add stored items to a collection's entry in scanned_collections.json."""
+    with scanned_collections_lock:
+        scanned_collections = load_scanned_collections()
+        record = scanned_collections.get(collection_name)
+        if not isinstance(record, dict):
+            # Older entries only held a count of processed items
+            record = {"stored": []}
+        record["stored"] = sorted(set(record.get("stored", [])) | set(inscription_ids))
+        record["total"] = total
+        record["complete"] = complete
+        scanned_collections[collection_name] = record
+        save_scanned_collections(scanned_collections)
+
+class CollectionImport:
+    """ Import of one collection file, assembling its items concurrently.
+
+    Stored items are recorded in scanned_collections.json every RECORD_BATCH items
+    and at the end, so an interrupted import resumes with the items that are still
+    missing (items stored since the last write are found in the content store).
+    """
+
+    def __init__(self, file_name, max_workers=COLLECTION_WORKERS):
+        self.file_name = file_name
+        self.max_workers = max_workers
+        self.collection_name = None
+        self.status = 'queued'
+        self.error = None
+        self.items = {}  # inscription id -> 'pending' | 'running' | 'stored' | 'failed'
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def progress(self):
+        with self.lock:
+            items = dict(self.items)
+        counts = {state: 0 for state in ('pending', 'running', 'stored', 'failed')}
+        for state in items.values():
+            counts[state] += 1
+        return {
+            'file_name': self.file_name,
+            'collection': self.collection_name,
+            'status': self.status,
+            'error': self.error,
+            'total': len(items),
+            **counts,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'items': items,
+        }
+
+    def set_item(self, inscription_id, state):
+        with self.lock:
+            self.items[inscription_id] = state
+
+    def load_items(self):
+        """ Read the collection file; returns the thumbnail and item ids without the 'i0' suffix """
+        file_path = os.path.join("./collections", self.file_name)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File {file_path} does not exist.")
+
+        with open(file_path, 'r') as file:
+            data = json.load(file)
+
+        collection = data.get("collection", {})
+        self.collection_name = collection.get("name", "Unnamed Collection")
+        inscription_ids = [collection.get("thumbnail")] + [item.get("inscriptionId") for item in data.get("items", [])]
+        valid_ids = []
+        for inscription_id in inscription_ids:
+            if inscription_id and inscription_id.endswith('i0'):
+                valid_ids.append(inscription_id[:-2])
+            elif inscription_id:
+                print(f"Invalid inscriptionId {inscription_id}. Skipping.")
+        return list(dict.fromkeys(valid_ids))
+
+    def run(self):
+        self.status = 'running'
+        self.started_at = time.time()
+        try:
+            inscription_ids = self.load_items()
+        except (OSError, ValueError) as e:
+            print(e)
+            self.status, self.error, self.finished_at = 'failed', str(e), time.time()
+            return self.progress()
+
+        record = load_scanned_collections().get(self.collection_name)
+        if isinstance(record, dict) and record.get("complete"):
+            print(f"Collection '{self.collection_name}' has already been scanned. Skipping.")
+            for inscription_id in inscription_ids:
+                self.set_item(inscription_id, 'stored')
+            self.status, self.finished_at = 'done', time.time()
+            return self.progress()
+
+        pending = []
+        for inscription_id in inscription_ids:
+            if file_exists_in_content_folder(inscription_id):
+                self.set_item(inscription_id, 'stored')
+            else:
+                self.set_item(inscription_id, 'pending')
+                pending.append(inscription_id)
+        already_stored = [i for i in inscription_ids if i not in pending]
+        record_stored_items(self.collection_name, already_stored, len(inscription_ids))
+
+        print(f"Processing collection: {self.collection_name} ({len(pending)} of {len(inscription_ids)} items to assemble)")
+
+        def import_item(inscription_id):
+            self.set_item(inscription_id, 'running')
+            return import_inscription_id(inscription_id)
+
+        stored = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(import_item, inscription_id): inscription_id for inscription_id in pending}
+            for future in as_completed(futures):
+                inscription_id = futures[future]
+                state = future.result()
+                self.set_item(inscription_id, state)
+                if state == 'stored':
+                    stored.append(inscription_id)
+                    if len(stored) >= RECORD_BATCH:
+                        record_stored_items(self.collection_name, stored, len(inscription_ids))
+                        stored = []
+
+        progress = self.progress()
+        complete = progress['failed'] == 0
+        record_stored_items(self.collection_name, stored, len(inscription_ids), complete=complete)
+        self.status = 'done' if complete else 'incomplete'
+        self.finished_at = time.time()
+        print(f"Stored {progress['stored']} of {progress['total']} items for collection '{self.collection_name}'.")
+        return self.progress()
+
+collection_imports = {}
+collection_imports_lock = threading.Lock()
+
+def start_collection_import(file_name, max_workers=COLLECTION_WORKERS):
+    """Start a background import of a collection file, or return the one already running."""
+    with collection_imports_lock:
+        collection_import = collection_imports.get(file_name)
+        if collection_import is None or collection_import.status not in ('queued', 'running'):
+            collection_import = CollectionImport(file_name, max_workers)
+            collection_imports[file_name] = collection_import
+            threading.Thread(target=collection_import.run, daemon=True).start()
+        return collection_import
+
+def get_collection_import(file_name):
+    """Return the latest import of a collection file in this process, or None."""
+    with collection_imports_lock:
+        return collection_imports.get(file_name)
 
-def get_collection(file_name):
-    folder_path = "./collections"
-    file_path = os.path.join(folder_path, file_name)
-    
-    if not os.path.exists(file_path):
-        print(f"File {file_path} does not exist.")
-        return
-    
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-    
-    collection = data.get("collection", {})
-    items = data.get("items", [])
-    collection_name = collection.get("name", "Unnamed Collection")
-    
-    scanned_collections = load_scanned_collections()
-
-    if collection_name in scanned_collections:
-        print(f"Collection '{collection_name}' has already been scanned. Skipping.")
-        return
-
-    print(f"Processing collection: {collection_name}")
-    
-    # Process the thumbnail txid
-    thumbnail_inscription_id = collection.get("thumbnail")
-    scanned_utxos = 0
-    
-    if thumbnail_inscription_id:
-        print("Processing thumbnail inscription ID.")
-        scanned_utxos += process_inscription_id(thumbnail_inscription_id)
-    
-    for item in items:
-        inscription_id = item.get("inscriptionId")
-        scanned_utxos += process_inscription_id(inscription_id)
-    
-    # Save the scanned collection
-    scanned_collections[collection_name] = scanned_utxos
-    save_scanned_collections(scanned_collections)
-    print(f"Scanned {scanned_utxos} UTXOs for collection '{collection_name}'.")
+def get_collection(file_name, max_workers=COLLECTION_WORKERS):
+    """Import a collection file and return its progress once every item has been tried."""
+    return CollectionImport(file_name, max_workers).run()
 
 if __name__ == "__main__":
     # Example usage
@@ -1,22 +1,7 @@
-import configparser
-from bitcoinrpc.authproxy import AuthServiceProxy
-
-def load_rpc_config(coin_type, config_file='rpc.conf'):
-    config = configparser.ConfigParser()
-    config.read(config_file)
-
-    section = f'{coin_type}_rpc'
-    rpc_user = config.get(section, 'user')
-    rpc_password = config.get(section, 'password')
-    rpc_host = config.get(section, 'host')
-    rpc_port = config.get(section, 'port')
-
-    return rpc_user, rpc_password, rpc_host, rpc_port
+from rpcClient import get_rpc_client
 
 def connect_to_rpc(coin_type):
-    rpc_user, rpc_password, rpc_host, rpc_port = load_rpc_config(coin_type)
-    rpc_url = f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}"
-    return AuthServiceProxy(rpc_url)
+    return get_rpc_client(coin_type)
 
 def get_private_key(wallet_address):
     if wallet_address.startswith('D'):
@@ -31,4 +16,27 @@ def get_private_key(wallet_address):
         privkey = rpc_connection.dumpprivkey(wallet_address)
         return privkey
     except Exception as e:
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+
+def get_private_keys(wallet_addresses):
+    """ Return {address: WIF} for many addresses, one dumpprivkey batch per coin; failed addresses are left out """
+    by_coin = {}
+    for address in dict.fromkeys(wallet_addresses):
+        if address.startswith('D'):
+            by_coin.setdefault('dogecoin', []).append(address)
+        elif address.startswith('be'):
+            by_coin.setdefault('bellscoin', []).append(address)
+        else:
+            print(f"Error: Unsupported address format {address}")
+
+    privkeys = {}
+    for coin_type, addresses in by_coin.items():
+        results = connect_to_rpc(coin_type).batch_call(
+            'dumpprivkey', [(address,) for address in addresses], raise_errors=False
+        )
+        for address, privkey in zip(addresses, results):
+            if isinstance(privkey, Exception):
+                print(f"Error: {str(privkey)} ({address})")
+            else:
+                privkeys[address] = privkey
+    return privkeys
\ No newline at end of file
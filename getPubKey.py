@@ -1,52 +1,22 @@
-import configparser
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
+from bitcoinrpc.authproxy import JSONRPCException
 import hashlib
 import base58
 import ecdsa
+from txCache import get_transaction
+from rpcClient import get_rpc_client
 
 DOGECOIN_PREFIX = b'\x1e'  # Dogecoin mainnet prefix for P2PKH addresses
 BELLSCOIN_PREFIX = b'\x19'  # Bellscoin mainnet prefix for P2PKH addresses (you may need to verify this)
 
-def load_rpc_config(coin_type, config_file='rpc.conf'):
-    config = configparser.ConfigParser()
-    config.read(config_file)
-
-    section = f'{coin_type}_rpc'
-    rpc_user = config.get(section, 'user')
-    rpc_password = config.get(section, 'password')
-    rpc_host = config.get(section, 'host')
-    rpc_port = config.get(section, 'port')
-
-    return rpc_user, rpc_password, rpc_host, rpc_port
-
 def connect_to_rpc(coin_type):
-    rpc_user, rpc_password, rpc_host, rpc_port = load_rpc_config(coin_type)
-    rpc_url = f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}"
-    return AuthServiceProxy(rpc_url)
+    return get_rpc_client(coin_type)
 
 def get_public_keys_from_tx(txid):
     for coin_type in ['dogecoin', 'bellscoin']:
         try:
             rpc_connection = connect_to_rpc(coin_type)
-            raw_tx = rpc_connection.getrawtransaction(txid, 1)
-            pubkeys_with_addresses = []
-
-            for vin in raw_tx['vin']:
-                if 'txinwitness' in vin:
-                    # SegWit transaction
-                    pubkey = vin['txinwitness'][1]
-                    if len(pubkey) in [66, 130]:  # Check for valid public key length
-                        address = derive_address_from_pubkey(pubkey, coin_type)
-                        pubkeys_with_addresses.append((pubkey, address))
-                elif 'scriptSig' in vin and 'asm' in vin['scriptSig']:
-                    # Legacy transaction
-                    parts = vin['scriptSig']['asm'].split()
-                    if len(parts) > 1 and len(parts[1]) in [66, 130]:  # Check for valid public key length
-                        pubkey = parts[1]
-                        address = derive_address_from_pubkey(pubkey, coin_type)
-                        pubkeys_with_addresses.append((pubkey, address))
-
-            return pubkeys_with_addresses, coin_type
+            raw_tx = get_transaction(rpc_connection, txid, coin_type)
+            return get_public_keys_from_raw_tx(raw_tx, coin_type), coin_type
 
         except JSONRPCException as e:
             if "No such mempool or blockchain transaction" in str(e):
@@ -58,6 +28,27 @@ def get_public_keys_from_tx(txid):
 
     return None, None  # If transaction is not found in either blockchain
 
+def get_public_keys_from_raw_tx(raw_tx, coin_type):
+    """ Return [(pubkey, address), ...] for the inputs of an already decoded transaction """
+    pubkeys_with_addresses = []
+
+    for vin in raw_tx['vin']:
+        if 'txinwitness' in vin:
+            # SegWit transaction
+            pubkey = vin['txinwitness'][1]
+            if len(pubkey) in [66, 130]:  # Check for valid public key length
+                address = derive_address_from_pubkey(pubkey, coin_type)
+                pubkeys_with_addresses.append((pubkey, address))
+        elif 'scriptSig' in vin and 'asm' in vin['scriptSig']:
+            # Legacy transaction
+            parts = vin['scriptSig']['asm'].split()
+            if len(parts) > 1 and len(parts[1]) in [66, 130]:  # Check for valid public key length
+                pubkey = parts[1]
+                address = derive_address_from_pubkey(pubkey, coin_type)
+                pubkeys_with_addresses.append((pubkey, address))
+
+    return pubkeys_with_addresses
+
 def derive_address_from_pubkey(pubkey, coin_type):
     try:
         pubkey_bytes = bytes.fromhex(pubkey)
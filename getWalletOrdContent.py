@@ -1,14 +1,10 @@
-import json
-import os
 from getOrdContent import process_tx
+from contentStore import get_content_store
+from walletStore import get_wallet_store
 
 def file_exists_in_content_folder(file_base_name):
     """Check if a file with the given base name exists in the ./content folder, ignoring the extension."""
-    content_folder = "./content"
-    for file in os.listdir(content_folder):
-        if file.startswith(file_base_name):
-            return True
-    return False
+    return get_content_store().exists(file_base_name)
 
 def process_inscription_id(inscription_id):
     """Process an inscription ID if it doesn't already exist in the content folder."""
@@ -21,26 +17,18 @@ def process_inscription_id(inscription_id):
     else:
         print("Invalid or missing inscriptionId.")
 
-def process_wallet_files():
-    folder_path = "./wallets"
-    
-    if not os.path.exists(folder_path):
-        print(f"Folder {folder_path} does not exist.")
-        return
-
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith(".json"):
-            file_path = os.path.join(folder_path, file_name)
-            print(f"Processing file: {file_path}")
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-            
-            for item in data:
-                genesis_txid = item.get("genesis_txid")
-                if genesis_txid and genesis_txid not in ["not an ord", "encrypted message"]:
-                    process_inscription_id(genesis_txid)
-                else:
-                    print(f"Skipping genesis_txid {genesis_txid} as it is not an ord or is an encrypted message.")
+def process_wallet_files(job=None):
+    """ Fetch the content of every ordinal held by a wallet; job (if given) gets progress and can cancel """
+    genesis_txids = get_wallet_store().genesis_txids()
+    print(f"Found {len(genesis_txids)} ordinals in the wallet store")
+    if job is not None:
+        job.add_total(len(genesis_txids))
+    for genesis_txid in genesis_txids:
+        if job is not None:
+            job.check_cancelled()
+        process_inscription_id(genesis_txid)
+        if job is not None:
+            job.advance(message=genesis_txid)
 
 if __name__ == "__main__":
     process_wallet_files()
@@ -1,6 +1,6 @@
-import json
 import os
 from getSmsContent import process_tx
+from walletStore import get_wallet_store
 
 def file_exists_in_content_folder(file_base_name):
     """Check if a file with the given base name exists in the ./smscontent folder, ignoring the extension."""
@@ -26,26 +26,18 @@ def process_inscription_id(inscription_id):
     else:
         print("Invalid or missing inscriptionId.")
 
-def process_wallet_files():
-    folder_path = "./wallets"
-    
-    if not os.path.exists(folder_path):
-        print(f"Folder {folder_path} does not exist.")
-        return
-
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith(".json"):
-            file_path = os.path.join(folder_path, file_name)
-            print(f"Processing file: {file_path}")
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-            
-            for item in data:
-                sms_txid = item.get("sms_txid")
-                if sms_txid and sms_txid != "not an sms":
-                    process_inscription_id(sms_txid)
-                else:
-                    print(f"Skipping sms_txid {sms_txid} as it is not an sms.")
+def process_wallet_files(job=None):
+    """ Fetch the content of every SMS received by a wallet; job (if given) gets progress and can cancel """
+    sms_txids = get_wallet_store().sms_txids()
+    print(f"Found {len(sms_txids)} SMS in the wallet store")
+    if job is not None:
+        job.add_total(len(sms_txids))
+    for sms_txid in sms_txids:
+        if job is not None:
+            job.check_cancelled()
+        process_inscription_id(sms_txid)
+        if job is not None:
+            job.advance(message=sms_txid)
 
 if __name__ == "__main__":
     process_wallet_files()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from bitcoinrpc.authproxy import JSONRPCException
+from getOrdContent import process_tx, is_complete
+from contentStore import get_content_store
+
+FETCH_WORKERS = 4  # Inscriptions assembled in parallel for requests
+PREFETCH_WORKERS = 2  # Referenced inscriptions assembled in the background, on their own pool
+FINISHED_JOBS_KEPT = 1024  # Finished jobs remembered for status polling
+MAX_SCAN_SIZE = 4 * 1024 * 1024  # Larger text inscriptions are not scanned for references
+PREFETCH_DEPTH = 2  # Reference levels prefetched below content a user requested
+MAX_PREFETCH_PER_JOB = 16  # References one inscription may queue
+
+CONTENT_REFERENCE = re.compile(rb'/content/([0-9a-fA-F]{64})i0')
+TEXT_MIME_TYPES = ('text/', 'image/svg+xml', 'application/javascript', 'application/json', 'application/xhtml+xml')
+
+def find_content_references(path, mime_type):
+    """ Return the genesis txids referenced as /content/<txid>i0 by a text-based inscription """
+    if not mime_type or not mime_type.startswith(TEXT_MIME_TYPES):
+        return []
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(MAX_SCAN_SIZE)
+    except OSError as e:
+        print(f"Error scanning {path} for references: {e}")
+        return []
+    return list(dict.fromkeys(match.decode().lower() for match in CONTENT_REFERENCE.findall(data)))
+
+class FetchJob:
+    """ One on-demand assembly of an inscription, shared by every request for the same genesis txid """
+
+    def __init__(self, genesis_txid, depth=1000, prefetch_depth=PREFETCH_DEPTH, prefetch=False):
+        self.genesis_txid = genesis_txid
+        self.depth = depth
+        self.prefetch_depth = prefetch_depth  # Levels of references still to prefetch below this job
+        self.prefetch = prefetch  # Queued by a reference rather than a request
+        self.status = 'queued'
+        self.error = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.dependencies = []
+        self.finished = threading.Event()
+
+    def wait(self, timeout=None):
+        """ Block until the job has finished; returns False on timeout """
+        return self.finished.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'genesis_txid': self.genesis_txid,
+            'status': self.status,
+            'error': self.error,
+            'queued_at': self.queued_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'dependencies': self.dependencies,
+        }
+
+class FetchJobRegistry:
+    """ In-flight inscription fetches keyed by genesis txid.
+
+    A request for an id that is already being assembled attaches to the running
+    job instead of being dropped; different ids run in parallel up to max_workers.
+    Prefetches run on a separate pool of prefetch_workers threads and are never
+    queued behind, or ahead of, the inscriptions users asked for.
+    """
+
+    def __init__(self, max_workers=FETCH_WORKERS, keep_finished=FINISHED_JOBS_KEPT, prefetch_workers=PREFETCH_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=prefetch_workers)
+        self.prefetch_workers = prefetch_workers
+        self.keep_finished = keep_finished
+        self.active = {}
+        self.finished = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, genesis_txid, depth=1000, prefetch_depth=PREFETCH_DEPTH, prefetch=False):
+        """ Return the job for genesis_txid, starting one unless it is running or already stored.
+
+        A prefetch submission returns None instead when every prefetch worker is
+        busy, so prefetches never pile up in a queue.
+        """
+        with self.lock:
+            job = self.active.get(genesis_txid)
+            if job is not None:
+                if not prefetch:
+                    # A user now wants this id; let its references be prefetched as for a request
+                    job.prefetch = False
+                    job.prefetch_depth = max(job.prefetch_depth, prefetch_depth)
+                return job
+            if prefetch and sum(1 for active in self.active.values() if active.prefetch) >= self.prefetch_workers:
+                return None
+            job = FetchJob(genesis_txid, depth, prefetch_depth, prefetch)
+            if get_content_store().exists(genesis_txid) and is_complete(genesis_txid):
+                # Finished between the caller's lookup and now
+                self._mark_finished(job, 'done')
+                return job
+            self.active[genesis_txid] = job
+        (self.prefetch_executor if prefetch else self.executor).submit(self._run, job)
+        return job
+
+    def fetch(self, genesis_txid, depth=1000, prefetch_depth=0):
+        """ Assemble genesis_txid on the calling thread and return the finished job.
+
+        Bulk callers such as collection imports run this on their own threads, so
+        they coalesce with requests for the same id without taking the request
+        workers. If the id is already being assembled, this waits for that job.
+        """
+        with self.lock:
+            job = self.active.get(genesis_txid)
+            if job is None:
+                job = FetchJob(genesis_txid, depth, prefetch_depth)
+                if get_content_store().exists(genesis_txid) and is_complete(genesis_txid):
+                    self._mark_finished(job, 'done')
+                    return job
+                self.active[genesis_txid] = job
+                owner = True
+            else:
+                owner = False
+        if owner:
+            self._run(job)
+        else:
+            job.wait()
+        return job
+
+    def prefetch_dependencies(self, job):
+        """ Queue the inscriptions the finished job's content references and are not stored yet.
+
+        Dependencies prefetch their own references for PREFETCH_DEPTH levels below
+        the requested inscription, so a tree of recursive inscriptions is assembled
+        before the browser asks for its leaves. At most MAX_PREFETCH_PER_JOB
+        references are considered per inscription, and only as many run at once
+        as there are prefetch workers.
+        """
+        if job.prefetch_depth <= 0:
+            return
+        entry = get_content_store().lookup(job.genesis_txid)
+        if entry is None:
+            return
+        references = [txid for txid in find_content_references(entry['path'], entry['mime_type']) if txid != job.genesis_txid]
+        job.dependencies = references[:MAX_PREFETCH_PER_JOB]
+        queued = 0
+        for genesis_txid in job.dependencies:
+            if get_content_store().exists(genesis_txid):
+                continue
+            if self.submit(genesis_txid, job.depth, job.prefetch_depth - 1, prefetch=True) is None:
+                print(f"Prefetch limit reached, not queueing further references of {job.genesis_txid}")
+                break
+            queued += 1
+        if references:
+            print(f"Found {len(references)} referenced inscriptions in {job.genesis_txid}, prefetching {queued}")
+
+    def get(self, genesis_txid):
+        """ Return the running or recently finished job for genesis_txid, or None """
+        with self.lock:
+            return self.active.get(genesis_txid) or self.finished.get(genesis_txid)
+
+    def _mark_finished(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self.active.pop(job.genesis_txid, None)
+        self.finished[job.genesis_txid] = job
+        self.finished.move_to_end(job.genesis_txid)
+        while len(self.finished) > self.keep_finished:
+            self.finished.popitem(last=False)
+        job.finished.set()
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        print(f"Starting processing for {job.genesis_txid}")
+        status, error = 'failed', None
+        try:
+            path = process_tx(job.genesis_txid, job.depth)
+            if path and is_complete(job.genesis_txid):
+                status = 'done'
+                self.prefetch_dependencies(job)
+            else:
+                error = "Inscription could not be assembled from its whole chunk chain"
+        except JSONRPCException as e:
+            print(f"JSONRPCException: {e}")
+            error = str(e)
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            error = str(e)
+        finally:
+            with self.lock:
+                self._mark_finished(job, status, error)
+            print(f"Finished processing for {job.genesis_txid} ({status})")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_fetch_jobs():
+    """ Return the process-wide FetchJobRegistry """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = FetchJobRegistry()
+        return _registry
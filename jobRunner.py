@@ -0,0 +1,142 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = 2  # Pipelines run at the same time
+FINISHED_JOBS_KEPT = 100  # Finished jobs remembered for status polling
+
+class JobCancelled(Exception):
+    """ Raised by Job.check_cancelled once cancellation was requested """
+
+class Job:
+    """ One run of a long pipeline (wallet sync, wallet content fetch) with progress and cancellation """
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = 'queued'
+        self.error = None
+        self.total = 0
+        self.completed = 0
+        self.message = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+        self.finished = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self.cancel_requested.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+    def add_total(self, count):
+        with self.lock:
+            self.total += count
+
+    def advance(self, count=1, message=None):
+        with self.lock:
+            self.completed += count
+            if message is not None:
+                self.message = message
+
+    def wait(self, timeout=None):
+        """ Block until the job has finished; returns False on timeout """
+        return self.finished.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'error': self.error,
+            'progress': {'completed': self.completed, 'total': self.total, 'message': self.message},
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+class JobRunner:
+    """ Runs pipelines in-process on a small pool instead of a new interpreter per request.
+
+    A pipeline is called with job=<Job> and reports progress and checks for
+    cancellation through it. Submitting a pipeline that is already queued or
+    running returns the existing job.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, keep_finished=FINISHED_JOBS_KEPT):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.keep_finished = keep_finished
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, name, target, *args, **kwargs):
+        with self.lock:
+            for job in self.jobs.values():
+                if job.name == name and job.status in ('queued', 'running'):
+                    return job
+            job = Job(name)
+            self.jobs[job.id] = job
+            self._forget_finished()
+        self.executor.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        """ Ask a job to stop; returns the job, or None if it is unknown """
+        job = self.get(job_id)
+        if job is not None and job.status in ('queued', 'running'):
+            job.cancel_requested.set()
+        return job
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished.is_set()]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self.jobs[job_id]
+
+    def _run(self, job, target, args, kwargs):
+        status, error = 'done', None
+        if job.cancelled:
+            status = 'cancelled'
+        else:
+            job.status = 'running'
+            job.started_at = time.time()
+            print(f"Starting job {job.name} ({job.id})")
+            try:
+                target(*args, job=job, **kwargs)
+                if job.cancelled:
+                    status = 'cancelled'
+            except JobCancelled:
+                status = 'cancelled'
+            except Exception as e:
+                print(f"Job {job.name} ({job.id}) failed: {e}")
+                status, error = 'failed', str(e)
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.finished.set()
+        print(f"Finished job {job.name} ({job.id}): {status}")
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_job_runner():
+    """ Return the process-wide JobRunner """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -0,0 +1,56 @@
+import json
+import os
+import sqlite3
+import threading
+
+PROVENANCE_DIR = './data'
+MISSING = object()
+
+class ProvenanceCache:
+    """ Persistent outpoint -> resolved ord/sms provenance from trace_ordinal_and_sms """
+
+    def __init__(self, coin_type='dogecoin', cache_dir=PROVENANCE_DIR):
+        self.coin_type = coin_type
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, f"provenance_{coin_type}.db")
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS provenance ("
+            "txid TEXT NOT NULL, vout INTEGER NOT NULL, result TEXT, "
+            "PRIMARY KEY (txid, vout))"
+        )
+        self.db.commit()
+
+    def get(self, txid, vout):
+        """ Return the cached trace result (a dict or None), or MISSING if the outpoint was never traced """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result FROM provenance WHERE txid = ? AND vout = ?", (txid, vout)
+            ).fetchone()
+        if row is None:
+            return MISSING
+        return json.loads(row[0]) if row[0] is not None else None
+
+    def put_many(self, outpoints, result):
+        """ Record the same resolved result for every outpoint visited on one trace """
+        encoded = json.dumps(result) if result is not None else None
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO provenance VALUES (?, ?, ?)",
+                [(txid, vout, encoded) for txid, vout in outpoints]
+            )
+            self.db.commit()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_provenance_cache(coin_type='dogecoin'):
+    """ Return the shared ProvenanceCache for a coin type """
+    if coin_type.endswith('_rpc'):
+        coin_type = coin_type[:-len('_rpc')]
+    with _caches_lock:
+        if coin_type not in _caches:
+            _caches[coin_type] = ProvenanceCache(coin_type)
+        return _caches[coin_type]
@@ -0,0 +1,169 @@
+import base64
+import configparser
+import http.client
+import itertools
+import json
+import queue
+import threading
+from decimal import Decimal
+from urllib.parse import quote
+from bitcoinrpc.authproxy import JSONRPCException
+
+RPC_TIMEOUT = 60  # seconds
+POOL_SIZE = 8  # Keep-alive connections kept open per client
+BATCH_SIZE = 500  # Calls sent per JSON-RPC batch request
+
+# Calls that may be sent twice; only these are retried after a dropped connection
+READ_ONLY_PREFIXES = ('get', 'list', 'estimate', 'decode', 'validate', 'dump')
+NOT_READ_ONLY = {'getnewaddress', 'getrawchangeaddress'}
+# How a pooled keep-alive connection the node closed while idle fails
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+def is_read_only(method):
+    return method.startswith(READ_ONLY_PREFIXES) and method not in NOT_READ_ONLY
+
+def _encode_decimal(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class RPCClient:
+    """ Thread-safe JSON-RPC client with keep-alive connection pooling and batch calls.
+
+    Calls look like AuthServiceProxy calls (client.getblockcount()) and raise the
+    same JSONRPCException, so it can replace AuthServiceProxy directly.
+    """
+
+    def __init__(self, user, password, host, port, wallet=None, timeout=RPC_TIMEOUT, pool_size=POOL_SIZE):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.path = f"/wallet/{quote(wallet)}" if wallet else "/"
+        credentials = base64.b64encode(f"{user}:{password}".encode()).decode()
+        self.headers = {
+            'Authorization': f"Basic {credentials}",
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive',
+        }
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.ids = itertools.count(1)
+        self.id_lock = threading.Lock()
+
+    def __getattr__(self, method):
+        if method.startswith('__'):
+            raise AttributeError(method)
+        return lambda *params: self.call(method, *params)
+
+    def _next_id(self):
+        with self.id_lock:
+            return next(self.ids)
+
+    def _connect(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _checkout(self):
+        """ Return (connection, reused) with a pooled connection if there is one """
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _checkin(self, connection):
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _post(self, payload):
+        body = json.dumps(payload, default=_encode_decimal)
+        calls = payload if isinstance(payload, list) else [payload]
+        # Anything that changes state (sendrawtransaction, ...) is sent exactly once, on a fresh
+        # connection, since the node may already have run it when a connection fails
+        retry_safe = all(is_read_only(call['method']) for call in calls)
+        for attempt in range(2):
+            connection, reused = self._checkout() if retry_safe else (self._connect(), False)
+            try:
+                connection.request('POST', self.path, body, self.headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError, OSError) as e:
+                connection.close()
+                # The node may have closed a pooled keep-alive connection while it was idle; retry once on a
+                # fresh one. Timeouts are not retried.
+                if attempt == 0 and reused and isinstance(e, STALE_CONNECTION_ERRORS):
+                    continue
+                raise
+            self._checkin(connection)
+
+            if response.status == 401:
+                raise JSONRPCException({'code': -342, 'message': 'RPC authorization failed'})
+            try:
+                return json.loads(data, parse_float=Decimal)
+            except ValueError:
+                raise JSONRPCException({
+                    'code': -342,
+                    'message': f"Non-JSON HTTP response with '{response.status} {response.reason}' from server"
+                })
+
+    def call(self, method, *params):
+        """ Send one JSON-RPC request and return its result """
+        response = self._post({'version': '1.1', 'method': method, 'params': list(params), 'id': self._next_id()})
+        if response.get('error') is not None:
+            raise JSONRPCException(response['error'])
+        if 'result' not in response:
+            raise JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'})
+        return response['result']
+
+    def batch(self, calls, raise_errors=True, batch_size=BATCH_SIZE):
+        """ Send [(method, *params), ...] as JSON-RPC batch arrays and return results in order.
+
+        With raise_errors=False, failed entries come back as JSONRPCException
+        instances instead of aborting the whole batch.
+        """
+        results = []
+        calls = list(calls)
+        for start in range(0, len(calls), batch_size):
+            chunk = calls[start:start + batch_size]
+            payload = [
+                {'version': '1.1', 'method': call[0], 'params': list(call[1:]), 'id': start + offset}
+                for offset, call in enumerate(chunk)
+            ]
+            response = self._post(payload)
+            if isinstance(response, dict):
+                # The node rejected the batch as a whole
+                raise JSONRPCException(response.get('error') or {'code': -343, 'message': 'invalid batch response'})
+            by_id = {entry.get('id'): entry for entry in response}
+            for offset in range(len(chunk)):
+                entry = by_id.get(start + offset, {'error': {'code': -343, 'message': 'missing batch entry'}})
+                if entry.get('error') is not None:
+                    error = JSONRPCException(entry['error'])
+                    if raise_errors:
+                        raise error
+                    results.append(error)
+                else:
+                    results.append(entry.get('result'))
+        return results
+
+    def batch_call(self, method, params_list, raise_errors=True, batch_size=BATCH_SIZE):
+        """ Call one method with many parameter tuples in a single batch """
+        return self.batch([(method, *params) for params in params_list], raise_errors, batch_size)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_rpc_client(coin_type='dogecoin', wallet=None, config_file='rpc.conf'):
+    """ Return the shared client for a coin ('dogecoin' or the section name 'dogecoin_rpc') """
+    section = coin_type if coin_type.endswith('_rpc') else f"{coin_type}_rpc"
+    key = (section, wallet, config_file)
+    with _clients_lock:
+        if key not in _clients:
+            config = configparser.ConfigParser()
+            config.read(config_file)
+            _clients[key] = RPCClient(
+                config.get(section, 'user'),
+                config.get(section, 'password'),
+                config.get(section, 'host'),
+                config.getint(section, 'port'),
+                wallet=wallet
+            )
+        return _clients[key]
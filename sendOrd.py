@@ -1,14 +1,9 @@
-import json
-import os
-import configparser
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
+from bitcoinrpc.authproxy import JSONRPCException
+from rpcClient import get_rpc_client
+from walletStore import get_wallet_store
 from decimal import Decimal, ROUND_DOWN
 
-def send_ord(utxo_txid, utxo_vout, recipient_address, wallets_dir="./wallets"):
-    # Load RPC credentials from rpc.conf
-    config = configparser.ConfigParser()
-    config.read('rpc.conf')
-
+def send_ord(utxo_txid, utxo_vout, recipient_address):
     def get_rpc_connection(address):
         if address.startswith('D'):
             rpc_section = 'dogecoin_rpc'
@@ -17,13 +12,7 @@ def send_ord(utxo_txid, utxo_vout, recipient_address, wallets_dir="./wallets"):
         else:
             raise ValueError("Unsupported address format")
 
-        rpc_user = config.get(rpc_section, 'user')
-        rpc_password = config.get(rpc_section, 'password')
-        rpc_host = config.get(rpc_section, 'host')
-        rpc_port = config.getint(rpc_section, 'port')
-
-        rpc_url = f"http://{rpc_user}:{rpc_password}@{rpc_host}:{rpc_port}"
-        return AuthServiceProxy(rpc_url)
+        return get_rpc_client(rpc_section)
 
     def estimate_fee(rpc_connection, num_blocks):
         fee_estimate = rpc_connection.estimatesmartfee(num_blocks)
@@ -32,10 +21,6 @@ def send_ord(utxo_txid, utxo_vout, recipient_address, wallets_dir="./wallets"):
         else:
             raise Exception("Fee estimation failed")
 
-    def get_utxos_from_wallet(file_path):
-        with open(file_path, 'r') as f:
-            return json.load(f)
-
     def select_utxos_for_fee(utxos, amount_needed):
         sorted_utxos = sorted(utxos, key=lambda x: x['amount'])
         selected_utxos = []
@@ -52,20 +37,9 @@ def send_ord(utxo_txid, utxo_vout, recipient_address, wallets_dir="./wallets"):
         # Determine which RPC to use based on the recipient address
         rpc_connection = get_rpc_connection(recipient_address)
 
-        # Step 1: Read UTXO data from all JSON files in the wallets directory
-        wallet_files = [os.path.join(wallets_dir, file) for file in os.listdir(wallets_dir) if file.endswith('.json')]
-        wallet_utxos = {}
-        utxo_to_send = None
-        sending_wallet_address = None
-
-        for wallet_file in wallet_files:
-            utxos = get_utxos_from_wallet(wallet_file)
-            wallet_utxos[wallet_file] = utxos
-            # Find the UTXO to send
-            utxo_to_send = next((utxo for utxo in utxos if utxo['txid'] == utxo_txid and utxo['vout'] == utxo_vout), None)
-            if utxo_to_send:
-                sending_wallet_address = os.path.splitext(os.path.basename(wallet_file))[0]
-                break
+        # Step 1: Look up the UTXO to send and the wallet holding it
+        wallet_store = get_wallet_store()
+        sending_wallet_address, utxo_to_send = wallet_store.find_utxo(utxo_txid, utxo_vout)
 
         if not utxo_to_send:
             raise Exception("UTXO to send not found in any wallet")
@@ -82,7 +56,7 @@ def send_ord(utxo_txid, utxo_vout, recipient_address, wallets_dir="./wallets"):
         print(f"Calculated transaction fee: {fee} COIN")
 
         # Step 3: Select UTXOs for the fee from the same wallet
-        remaining_utxos = [utxo for utxo in wallet_utxos[os.path.join(wallets_dir, f"{sending_wallet_address}.json")] if not (utxo['txid'] == utxo_txid and utxo['vout'] == utxo_vout)]
+        remaining_utxos = [utxo for utxo in wallet_store.get_utxos(sending_wallet_address) if not (utxo['txid'] == utxo_txid and utxo['vout'] == utxo_vout)]
         fee_utxos, total_fee_amount = select_utxos_for_fee(remaining_utxos, fee)
 
         if total_fee_amount < fee:
@@ -134,7 +108,5 @@ try:
 
 except ValueError as e:
     print(f"Error: {e}")
-except configparser.Error as e:
-    print(f"Configuration error: {e}")
 except Exception as e:
     print(f"An unexpected error occurred: {e}")
\ No newline at end of file
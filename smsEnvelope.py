@@ -0,0 +1,291 @@
+import base64
+import io
+import json
+import os
+import re
+import struct
+import uuid
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.backends import default_backend
+
+# Chunked envelope: header, wrapped AES key, then AES-GCM sealed chunks of CHUNK_SIZE plaintext bytes.
+# Each chunk's nonce is the header's nonce prefix + chunk counter + last-chunk flag, and the
+# header is authenticated with every chunk, so chunks cannot be reordered, dropped or truncated.
+ENVELOPE_MAGIC = b'DASE'
+ENVELOPE_VERSION = 1
+ENVELOPE_HEADER = struct.Struct('>4sBI7s')  # magic, version, chunk size, nonce prefix
+CHUNK_NONCE = struct.Struct('>IB')  # chunk counter, last-chunk flag
+CHUNK_SIZE = 64 * 1024
+BUFFER_SIZE = 48 * 1024  # Multiple of 3 and 4 so base64 blocks split cleanly
+WRAPPED_KEY_SIZE = 33 + 12 + 32 + 16  # Ephemeral pubkey, IV, encrypted AES key, tag
+IV_SIZE = 12
+TAG_SIZE = 16
+
+ENCRYPTED_DATA_KEY = b'"encrypted_data"'
+VALUE_START = re.compile(rb'\s*:\s*"')
+
+def pubkey_to_ec_point(pubkey_hex):
+    pubkey_bytes = bytes.fromhex(pubkey_hex)
+    return ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), pubkey_bytes)
+
+def derive_wrapping_key(shared_secret):
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"ecdh derived key",
+        backend=default_backend()
+    ).derive(shared_secret)
+
+def wrap_aes_key(pubkey, aes_key):
+    """ Encrypt the AES key to pubkey with an ephemeral ECDH key; returns WRAPPED_KEY_SIZE bytes """
+    temp_privkey = ec.generate_private_key(ec.SECP256K1(), default_backend())
+    derived_key = derive_wrapping_key(temp_privkey.exchange(ec.ECDH(), pubkey))
+
+    iv = os.urandom(IV_SIZE)
+    encryptor = Cipher(algorithms.AES(derived_key), modes.GCM(iv), backend=default_backend()).encryptor()
+    encrypted_aes_key = encryptor.update(aes_key) + encryptor.finalize()
+
+    temp_pubkey = temp_privkey.public_key().public_bytes(
+        encoding=serialization.Encoding.X962,
+        format=serialization.PublicFormat.CompressedPoint
+    )
+    return temp_pubkey + iv + encrypted_aes_key + encryptor.tag
+
+def unwrap_aes_key(privkey, wrapped_key):
+    temp_pubkey = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), wrapped_key[:33])
+    derived_key = derive_wrapping_key(privkey.exchange(ec.ECDH(), temp_pubkey))
+
+    iv = wrapped_key[33:33 + IV_SIZE]
+    decryptor = Cipher(
+        algorithms.AES(derived_key), modes.GCM(iv, wrapped_key[-TAG_SIZE:]), backend=default_backend()
+    ).decryptor()
+    return decryptor.update(wrapped_key[33 + IV_SIZE:-TAG_SIZE]) + decryptor.finalize()
+
+def read_exactly(source, size):
+    """ Read size bytes unless the stream ends first """
+    data = bytearray()
+    while len(data) < size:
+        block = source.read(size - len(data))
+        if not block:
+            break
+        data.extend(block)
+    return bytes(data)
+
+def chunk_cipher(aes_key, header, counter, last, tag=None):
+    nonce = header[-7:] + CHUNK_NONCE.pack(counter, 1 if last else 0)
+    return Cipher(algorithms.AES(aes_key), modes.GCM(nonce, tag), backend=default_backend())
+
+def encrypt_stream(pubkey, source, dest, chunk_size=CHUNK_SIZE):
+    """ Encrypt everything readable from source into dest as a chunked envelope """
+    aes_key = os.urandom(32)  # AES-256
+    header = ENVELOPE_HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, chunk_size, os.urandom(7))
+    dest.write(header)
+    dest.write(wrap_aes_key(pubkey, aes_key))
+
+    counter = 0
+    chunk = read_exactly(source, chunk_size)
+    while True:
+        next_chunk = read_exactly(source, chunk_size) if len(chunk) == chunk_size else b''
+        last = not next_chunk
+        encryptor = chunk_cipher(aes_key, header, counter, last).encryptor()
+        encryptor.authenticate_additional_data(header)
+        dest.write(encryptor.update(chunk) + encryptor.finalize() + encryptor.tag)
+        if last:
+            return
+        chunk = next_chunk
+        counter += 1
+
+def decrypt_stream(privkey, source, dest, mimetype):
+    """ Decrypt an envelope from source into dest.
+
+    Messages sent before the chunked envelope (wrapped key, IV, one GCM ciphertext
+    and tag, with non-text payloads base64-encoded before encryption) are decoded
+    the same way, through the same fixed-size buffers.
+    """
+    head = read_exactly(source, ENVELOPE_HEADER.size)
+    if head[:len(ENVELOPE_MAGIC)] != ENVELOPE_MAGIC:
+        decrypt_legacy_stream(privkey, head, source, dest, mimetype)
+        return
+
+    _, version, chunk_size, _ = ENVELOPE_HEADER.unpack(head)
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version {version}")
+    aes_key = unwrap_aes_key(privkey, read_exactly(source, WRAPPED_KEY_SIZE))
+
+    counter = 0
+    sealed = read_exactly(source, chunk_size + TAG_SIZE)
+    while True:
+        if len(sealed) < TAG_SIZE:
+            raise ValueError("Truncated envelope")
+        next_sealed = read_exactly(source, chunk_size + TAG_SIZE) if len(sealed) == chunk_size + TAG_SIZE else b''
+        last = not next_sealed
+        decryptor = chunk_cipher(aes_key, head, counter, last, sealed[-TAG_SIZE:]).decryptor()
+        decryptor.authenticate_additional_data(head)
+        dest.write(decryptor.update(sealed[:-TAG_SIZE]) + decryptor.finalize())
+        if last:
+            return
+        sealed = next_sealed
+        counter += 1
+
+def decrypt_legacy_stream(privkey, head, source, dest, mimetype):
+    aes_key = unwrap_aes_key(privkey, head + read_exactly(source, WRAPPED_KEY_SIZE - len(head)))
+    iv = read_exactly(source, IV_SIZE)
+    decryptor = Cipher(algorithms.AES(aes_key), modes.GCM(iv), backend=default_backend()).decryptor()
+    writer = Base64DecodingWriter(dest) if mimetype != "text/plain" else dest
+
+    # The tag is the last TAG_SIZE bytes, so always hold those back
+    held = b''
+    for block in iter(lambda: source.read(BUFFER_SIZE), b''):
+        held += block
+        if len(held) > TAG_SIZE:
+            writer.write(decryptor.update(held[:-TAG_SIZE]))
+            held = held[-TAG_SIZE:]
+    writer.write(decryptor.finalize_with_tag(held))
+    if writer is not dest:
+        writer.close()
+
+class Base64EncodingWriter:
+    """ Binary writer that base64-encodes into dest in whole 3-byte groups """
+
+    def __init__(self, dest):
+        self.dest = dest
+        self.pending = b''
+
+    def write(self, data):
+        data = self.pending + data
+        usable = len(data) - len(data) % 3
+        self.dest.write(base64.b64encode(data[:usable]))
+        self.pending = data[usable:]
+
+    def close(self):
+        self.dest.write(base64.b64encode(self.pending))
+        self.pending = b''
+
+class Base64DecodingWriter:
+    """ Binary writer that base64-decodes into dest in whole 4-character groups """
+
+    def __init__(self, dest):
+        self.dest = dest
+        self.pending = b''
+
+    def write(self, data):
+        data = self.pending + data
+        usable = len(data) - len(data) % 4
+        self.dest.write(base64.b64decode(data[:usable]))
+        self.pending = data[usable:]
+
+    def close(self):
+        if self.pending:
+            raise ValueError("Incomplete base64 payload")
+
+class Base64SpanReader:
+    """ Reader over the decoded bytes of the base64 text between start and end of a binary file """
+
+    def __init__(self, f, start, end):
+        self.f = f
+        self.position = start
+        self.end = end
+        self.decoded = b''
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = float('inf')
+        while len(self.decoded) < size and self.position < self.end:
+            self.f.seek(self.position)
+            text = self.f.read(min(BUFFER_SIZE, self.end - self.position))
+            self.position += len(text)
+            if len(text) % 4 and self.position < self.end:
+                # Keep the partial group for the next read
+                self.position -= len(text) % 4
+                text = text[:len(text) - len(text) % 4]
+            self.decoded += base64.b64decode(text)
+        if size == float('inf'):
+            data, self.decoded = self.decoded, b''
+        else:
+            data, self.decoded = self.decoded[:size], self.decoded[size:]
+        return data
+
+def find_in_file(f, needle, start=0):
+    """ Return the offset of the first needle at or after start, or -1 """
+    position = start
+    carry = b''
+    while True:
+        f.seek(position)
+        block = f.read(BUFFER_SIZE)
+        if not block:
+            return -1
+        found = (carry + block).find(needle)
+        if found >= 0:
+            return position - len(carry) + found
+        carry = (carry + block)[-(len(needle) - 1):] if len(needle) > 1 else b''
+        position += len(block)
+
+def locate_encrypted_data(f):
+    """ Return (start, end) of the encrypted_data string in an SMS JSON file without loading it """
+    key = find_in_file(f, ENCRYPTED_DATA_KEY)
+    if key < 0:
+        raise ValueError("SMS JSON has no encrypted_data")
+    f.seek(key + len(ENCRYPTED_DATA_KEY))
+    match = VALUE_START.match(f.read(64))
+    if match is None:
+        raise ValueError("encrypted_data is not a string")
+    start = key + len(ENCRYPTED_DATA_KEY) + match.end()
+    end = find_in_file(f, b'"', start)
+    if end < 0:
+        raise ValueError("Unterminated encrypted_data")
+    return start, end
+
+def read_sms_json(path):
+    """ Return (sms_data without encrypted_data, (start, end) of the encrypted_data string) """
+    with open(path, 'rb') as f:
+        start, end = locate_encrypted_data(f)
+        f.seek(0)
+        prefix = f.read(start)
+        f.seek(end)
+        suffix = f.read()
+    sms_data = json.loads(prefix + suffix)
+    sms_data.pop('encrypted_data', None)
+    return sms_data, (start, end)
+
+def write_sms_json(pubkey_hex, source, sms_data, output_path, chunk_size=CHUNK_SIZE):
+    """ Write sms_data as JSON with source encrypted to pubkey_hex and streamed into encrypted_data """
+    placeholder = uuid.uuid4().hex
+    prefix, suffix = json.dumps({**sms_data, "encrypted_data": placeholder}, indent=4).split(f'"{placeholder}"')
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(f'{prefix}"'.encode())
+        writer = Base64EncodingWriter(f)
+        encrypt_stream(pubkey_to_ec_point(pubkey_hex), source, writer, chunk_size)
+        writer.close()
+        f.write(f'"{suffix}'.encode())
+    os.replace(tmp_path, output_path)
+
+def decrypt_sms_file(privkey, json_path, output_path):
+    """ Decrypt the SMS in json_path into output_path through fixed-size buffers; returns its sms_data """
+    sms_data, (start, end) = read_sms_json(json_path)
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with open(json_path, 'rb') as f, open(tmp_path, 'wb') as out:
+            decrypt_stream(privkey, Base64SpanReader(f, start, end), out, sms_data['mimetype'])
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return sms_data
+
+def encrypt_bytes(pubkey_hex, data):
+    """ Return the base64 envelope for an in-memory payload """
+    out = io.BytesIO()
+    encrypt_stream(pubkey_to_ec_point(pubkey_hex), io.BytesIO(data), out)
+    return base64.b64encode(out.getvalue())
+
+def decrypt_bytes(privkey, encrypted_data_base64, mimetype):
+    """ Return the payload of an in-memory base64 envelope (chunked or legacy) """
+    out = io.BytesIO()
+    decrypt_stream(privkey, io.BytesIO(base64.b64decode(encrypted_data_base64)), out, mimetype)
+    return out.getvalue()
@@ -0,0 +1,193 @@
+import bisect
+import json
+import os
+import re
+import struct
+import threading
+from datetime import datetime, timezone
+
+SMS_LOG_DIR = './smslogs'
+
+# Sidecar record per message: timestamp key, offset and length of its line in the .jsonl file
+INDEX_RECORD = struct.Struct('<dQI')
+ADDRESS_PATTERN = re.compile(r'^[A-Za-z0-9]+$')
+
+def timestamp_key(timestamp):
+    """ Sort key for an ISO timestamp; naive values are read as UTC so keys order like the strings do """
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return 0.0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+class SmsLog:
+    """ Append-only message log per conversation in ./smslogs.
+
+    Messages are appended as one JSON line to <address>.jsonl in arrival order,
+    and a fixed-size (timestamp, offset, length) record is appended to the
+    <address>.idx sidecar. Readers sort the sidecar by timestamp and read only
+    the lines of the page they return, so neither side rewrites the history.
+    The .jsonl is the source of truth: on open, lines the sidecar is missing
+    (a crash between the two writes) are indexed again.
+    """
+
+    def __init__(self, log_dir=SMS_LOG_DIR):
+        self.log_dir = log_dir
+        self.indexes = {}  # address -> (sidecar bytes read, [(key, sequence, offset, length)] ascending, offsets seen)
+        self.lock = threading.Lock()
+        os.makedirs(log_dir, exist_ok=True)
+        self.repair_indexes()
+        self.migrate_json_logs()
+
+    def paths(self, address):
+        if not ADDRESS_PATTERN.match(address or ''):
+            raise ValueError(f"Invalid address: {address}")
+        base = os.path.join(self.log_dir, address)
+        return f"{base}.jsonl", f"{base}.idx"
+
+    def repair_indexes(self):
+        """ Index .jsonl lines written after the last sidecar record, e.g. by an append cut short by a crash """
+        for file_name in sorted(os.listdir(self.log_dir)):
+            address, extension = os.path.splitext(file_name)
+            if extension != '.jsonl' or not ADDRESS_PATTERN.match(address):
+                continue
+            log_path, index_path = self.paths(address)
+            covered = 0
+            if os.path.exists(index_path):
+                with open(index_path, 'rb') as f:
+                    data = f.read()
+                for position in range(0, len(data) - len(data) % INDEX_RECORD.size, INDEX_RECORD.size):
+                    _, offset, length = INDEX_RECORD.unpack_from(data, position)
+                    covered = max(covered, offset + length)
+            if os.path.getsize(log_path) <= covered:
+                continue
+            records = []
+            with open(log_path, 'rb') as f:
+                f.seek(covered)
+                offset = covered
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Torn final write; never indexed
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        entry = None
+                    if isinstance(entry, dict):
+                        records.append(INDEX_RECORD.pack(timestamp_key(entry.get('timestamp')), offset, len(line)))
+                    offset += len(line)
+            if records:
+                with open(index_path, 'ab', buffering=0) as f:
+                    f.write(b''.join(records))
+                print(f"Re-indexed {len(records)} messages in {log_path}")
+
+    def migrate_json_logs(self):
+        """ Convert ./smslogs/<address>.json arrays into the append-only log and rename them to .json.imported.
+
+        Messages already in the .jsonl are skipped, so an import cut short by a
+        crash resumes on the next start instead of duplicating messages.
+        """
+        for file_name in sorted(os.listdir(self.log_dir)):
+            address, extension = os.path.splitext(file_name)
+            if extension != '.json' or not ADDRESS_PATTERN.match(address):
+                continue
+            path = os.path.join(self.log_dir, file_name)
+            try:
+                with open(path, 'r') as f:
+                    entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error reading SMS log {path}: {e}")
+                continue
+            log_path = self.paths(address)[0]
+            existing = set()
+            if os.path.exists(log_path):
+                with open(log_path, 'rb') as f:
+                    existing = set(f)
+            imported = 0
+            # Legacy files are newest first; append oldest first so arrival order matches
+            for entry in sorted(entries, key=lambda e: timestamp_key(e.get('timestamp'))):
+                if self.encode(entry) not in existing:
+                    self.append(address, entry)
+                    imported += 1
+            os.replace(path, f"{path}.imported")
+            print(f"Imported {imported} of {len(entries)} messages from {path}")
+
+    @staticmethod
+    def encode(entry):
+        return (json.dumps(entry) + '\n').encode('utf-8')
+
+    def append(self, address, entry):
+        """ Append one message to the conversation with address; returns the .jsonl path """
+        log_path, index_path = self.paths(address)
+        line = self.encode(entry)
+        with self.lock:
+            with open(log_path, 'ab', buffering=0) as f:
+                f.write(line)
+                offset = f.tell() - len(line)
+            with open(index_path, 'ab', buffering=0) as f:
+                f.write(INDEX_RECORD.pack(timestamp_key(entry.get('timestamp')), offset, len(line)))
+        return log_path
+
+    def addresses(self):
+        """ Return the addresses that have a conversation log """
+        return sorted(
+            os.path.splitext(file_name)[0]
+            for file_name in os.listdir(self.log_dir) if file_name.endswith('.jsonl')
+        )
+
+    def has_log(self, address):
+        return os.path.exists(self.paths(address)[0])
+
+    def load_index(self, address):
+        """ Return the conversation's index sorted oldest first, reading only sidecar records added since the last call """
+        log_path, index_path = self.paths(address)
+        with self.lock:
+            read, records, offsets = self.indexes.get(address, (0, [], set()))
+            try:
+                size = os.path.getsize(index_path)
+            except OSError:
+                size = 0
+            if size < read:
+                # Sidecar was replaced or deleted; start over
+                read, records, offsets = 0, [], set()
+            if size > read:
+                with open(index_path, 'rb') as f:
+                    f.seek(read)
+                    data = f.read(size - read)
+                usable = len(data) - len(data) % INDEX_RECORD.size  # A record still being written is picked up next time
+                for position in range(0, usable, INDEX_RECORD.size):
+                    key, offset, length = INDEX_RECORD.unpack_from(data, position)
+                    if offset in offsets:
+                        continue  # Indexed twice, by a repair racing the writer's own sidecar append
+                    offsets.add(offset)
+                    bisect.insort(records, (key, len(records), offset, length))
+                read += usable
+            self.indexes[address] = (read, records, offsets)
+            return list(records)
+
+    def page(self, address, offset=0, limit=None):
+        """ Return (total, messages) for one newest-first page of the conversation """
+        records = self.load_index(address)
+        total = len(records)
+        end = total - offset
+        start = 0 if limit is None else max(end - limit, 0)
+        selected = records[start:max(end, 0)]
+        messages = []
+        if selected:
+            with open(self.paths(address)[0], 'rb') as f:
+                for _, _, line_offset, length in reversed(selected):
+                    f.seek(line_offset)
+                    messages.append(json.loads(f.read(length)))
+        return total, messages
+
+_log = None
+_log_lock = threading.Lock()
+
+def get_sms_log():
+    """ Return the process-wide SmsLog for ./smslogs """
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = SmsLog()
+        return _log
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+
+SPEND_INDEX_DIR = './data'
+REORG_DEPTH = 12  # Re-verify this many blocks below the tip on every sync
+BLOCK_BATCH = 25  # Verbose blocks requested per JSON-RPC batch
+
+class SpendIndex:
+    """ Persistent outpoint -> spending txid index built from verbose blocks """
+
+    def __init__(self, coin_type='dogecoin', index_dir=SPEND_INDEX_DIR):
+        self.coin_type = coin_type
+        os.makedirs(index_dir, exist_ok=True)
+        self.db_path = os.path.join(index_dir, f"spendindex_{coin_type}.db")
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS spends ("
+            "txid TEXT NOT NULL, vout INTEGER NOT NULL, "
+            "spending_txid TEXT NOT NULL, height INTEGER NOT NULL, "
+            "PRIMARY KEY (txid, vout))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS spends_height ON spends (height)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blocks (height INTEGER PRIMARY KEY, hash TEXT NOT NULL)"
+        )
+        self.db.commit()
+
+    def lookup(self, txid, vout):
+        """ Return (spending_txid, height) for an outpoint, or None if not indexed """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT spending_txid, height FROM spends WHERE txid = ? AND vout = ?",
+                (txid, vout)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def block_hash_at(self, height):
+        """ Return the indexed block hash at height, or None """
+        with self.lock:
+            row = self.db.execute("SELECT hash FROM blocks WHERE height = ?", (height,)).fetchone()
+        return row[0] if row else None
+
+    def tip_height(self):
+        """ Return the highest indexed block height, or None if the index is empty """
+        with self.lock:
+            row = self.db.execute("SELECT MAX(height) FROM blocks").fetchone()
+        return row[0] if row else None
+
+    def index_block(self, block):
+        """ Record every spent outpoint in a getblock(hash, 2) result """
+        height = block['height']
+        spends = []
+        for block_tx in block['tx']:
+            for vin in block_tx['vin']:
+                if 'txid' in vin:
+                    spends.append((vin['txid'], vin['vout'], block_tx['txid'], height))
+        with self.lock:
+            self.db.execute("DELETE FROM spends WHERE height = ?", (height,))
+            self.db.executemany("INSERT OR REPLACE INTO spends VALUES (?, ?, ?, ?)", spends)
+            self.db.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?)", (height, block['hash']))
+            self.db.commit()
+
+    def remove_block(self, height):
+        """ Drop a block that is no longer part of the active chain """
+        with self.lock:
+            self.db.execute("DELETE FROM spends WHERE height = ?", (height,))
+            self.db.execute("DELETE FROM blocks WHERE height = ?", (height,))
+            self.db.commit()
+
+    def sync(self, rpc_connection, start_height, stop_height=None):
+        """ Stream verbose blocks in [start_height, stop_height] into the index.
+
+        Heights that are already indexed are skipped, except near the chain tip
+        where the stored hash is re-checked so reorged blocks get replaced.
+        """
+        chain_height = rpc_connection.getblockcount()
+        if stop_height is None or stop_height > chain_height:
+            stop_height = chain_height
+
+        for window_start in range(start_height, stop_height + 1, BLOCK_BATCH):
+            window = range(window_start, min(window_start + BLOCK_BATCH, stop_height + 1))
+            indexed_hashes = {height: self.block_hash_at(height) for height in window}
+            heights = [
+                height for height in window
+                if not (indexed_hashes[height] and height <= chain_height - REORG_DEPTH)
+            ]
+            if not heights:
+                continue
+
+            block_hashes = rpc_connection.batch_call('getblockhash', [(height,) for height in heights])
+            stale = []
+            for height, block_hash in zip(heights, block_hashes):
+                if indexed_hashes[height] == block_hash:
+                    continue
+                if indexed_hashes[height]:
+                    print(f"Reorg detected at height {height}, reindexing block")
+                    self.remove_block(height)
+                stale.append(block_hash)
+
+            for block in rpc_connection.batch_call('getblock', [(block_hash, 2) for block_hash in stale]):
+                self.index_block(block)
+        return stop_height
+
+    def follow_tip(self, rpc_connection, start_height=None):
+        """ Extend the index from its current tip up to the node's chain tip """
+        tip = self.tip_height()
+        if tip is None:
+            if start_height is None:
+                start_height = rpc_connection.getblockcount()
+        else:
+            start_height = max(tip - REORG_DEPTH, 0)
+        return self.sync(rpc_connection, start_height)
+
+    def find_spend(self, rpc_connection, txid, vout, start_height, depth):
+        """ Return the txid spending txid:vout within depth blocks of start_height.
+
+        Any part of the range that has not been indexed yet is filled in with one
+        streaming pass, after which the answer is a local lookup.
+        """
+        hit = self.lookup(txid, vout)
+        if hit:
+            return hit[0]
+        self.sync(rpc_connection, start_height, start_height + depth - 1)
+        hit = self.lookup(txid, vout)
+        return hit[0] if hit else None
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_spend_index(coin_type='dogecoin'):
+    """ Return the shared SpendIndex for a coin type """
+    with _indexes_lock:
+        if coin_type not in _indexes:
+            _indexes[coin_type] = SpendIndex(coin_type)
+        return _indexes[coin_type]
+
+if __name__ == "__main__":
+    import sys
+    from getOrdContent import get_rpc_connection
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python spendIndex.py <coin_type> [start_height]")
+    else:
+        coin_type = sys.argv[1]
+        start_height = int(sys.argv[2]) if len(sys.argv) == 3 else None
+        index = get_spend_index(coin_type)
+        tip = index.follow_tip(get_rpc_connection(coin_type), start_height)
+        print(f"Spend index for {coin_type} synced to height {tip}")
@@ -0,0 +1,50 @@
+import importlib
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('bitcoinrpc')
+pytest.importorskip('cryptography')
+
+from contentStore import ContentStore
+
+COMPLETE = 'ab' * 32
+PARTIAL = 'cd' * 32
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('DogecoinArcadeAPI')
+    store = ContentStore(str(tmp_path / 'content'), str(tmp_path / 'content_index.db'), chain_index=None)
+    for txid in (COMPLETE, PARTIAL):
+        part = tmp_path / 'part'
+        part.write_bytes(b'hello world!')
+        store.add(txid, str(part), 'text/plain', '.txt')
+    monkeypatch.setattr(module, 'get_content_store', lambda: store)
+    monkeypatch.setattr(module, 'is_complete', lambda txid: txid == COMPLETE)
+    monkeypatch.setattr(module, 'get_fetch_jobs', lambda: pytest.fail('no fetch expected'))
+    return module.app.test_client(), store
+
+def test_complete_content_is_cached_forever(client):
+    client, store = client
+    response = client.get(f"/content/{COMPLETE}i0")
+
+    assert response.status_code == 200
+    assert response.data == b'hello world!'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['ETag'] == f'"{store.lookup(COMPLETE)["sha256"]}"'
+
+    assert client.get(f"/content/{COMPLETE}i0", headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    ranged = client.get(f"/content/{COMPLETE}i0", headers={'Range': 'bytes=6-10'})
+    assert (ranged.status_code, ranged.data) == (206, b'world')
+
+def test_content_not_known_complete_is_revalidated(client):
+    client, _ = client
+    response = client.get(f"/content/{PARTIAL}i0")
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+@pytest.mark.parametrize('file_id', ['not-hex', 'abc', 'zz' * 32])
+def test_invalid_ids_are_not_found(client, file_id):
+    client, _ = client
+    assert client.get(f"/content/{file_id}i0").status_code == 404
@@ -0,0 +1,67 @@
+import importlib
+import threading
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('bitcoinrpc')
+pytest.importorskip('cryptography')
+
+from jobRunner import JobRunner
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    # Imported from an empty directory so module-level setup finds no rpc.conf or data
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('DogecoinArcadeAPI')
+    runner = JobRunner()
+    monkeypatch.setattr(module, 'get_job_runner', lambda: runner)
+    return module, module.app.test_client(), runner
+
+def test_process_sms_returns_a_job_without_waiting(api, monkeypatch):
+    module, client, runner = api
+    release = threading.Event()
+    calls = []
+
+    def process_sms(genesis_txid, depth):
+        calls.append((genesis_txid, depth))
+        assert release.wait(5)
+        return f"./smscontent/{genesis_txid}.json"
+
+    monkeypatch.setattr(module, 'process_sms', process_sms)
+    response = client.post('/api/process_sms', json={'genesis_txid': 'ab' * 32, 'depth': 10})
+
+    assert response.status_code == 202
+    job = runner.get(response.get_json()['job']['id'])
+    assert response.get_json()['status_url'] == f"/api/jobs/{job.id}"
+    # A second call for the same inscription attaches to the running job
+    assert client.post('/api/process_sms', json={'genesis_txid': 'ab' * 32}).get_json()['job']['id'] == job.id
+
+    release.set()
+    assert job.wait(5) and job.status == 'done'
+    assert calls == [('ab' * 32, 10)]
+
+def test_process_sms_job_fails_when_chain_is_incomplete(api, monkeypatch):
+    module, client, runner = api
+    monkeypatch.setattr(module, 'process_sms', lambda genesis_txid, depth: None)
+
+    response = client.post('/api/process_sms', json={'genesis_txid': 'cd' * 32})
+    job = runner.get(response.get_json()['job']['id'])
+
+    assert job.wait(5) and job.status == 'failed'
+    assert client.get(f"/api/jobs/{job.id}").get_json()['status'] == 'failed'
+
+@pytest.mark.parametrize('route, pipeline', [
+    ('/api/decrypt_sms', 'decrypt_sms'),
+    ('/api/process_wallet', 'process_wallet_files'),
+    ('/api/getOrdContent', 'process_wallet_files'),
+])
+def test_long_routes_start_jobs(api, monkeypatch, route, pipeline):
+    module, client, runner = api
+    ran = threading.Event()
+    monkeypatch.setattr(module, pipeline, lambda *args, job=None: ran.set())
+
+    response = client.post(route)
+
+    assert response.status_code == 202
+    job = runner.get(response.get_json()['job']['id'])
+    assert job.wait(5) and job.status == 'done' and ran.is_set()
@@ -0,0 +1,53 @@
+import importlib
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('bitcoinrpc')
+pytest.importorskip('cryptography')
+
+from walletStore import WalletStore
+
+ADDRESS = 'DWallet1'
+
+def utxo(n, genesis='not an ord', mime=None, amount=1.0):
+    return {
+        'txid': f"{n:064x}", 'vout': 0, 'amount': amount, 'genesis_txid': genesis,
+        'sms_txid': 'not an sms', 'mime_type': mime, 'timestamp': f"2024-01-{n + 1:02d} 00:00:00",
+    }
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('DogecoinArcadeAPI')
+    store = WalletStore(str(tmp_path / 'wallets.db'), str(tmp_path / 'wallets'))
+    store.replace_wallet(ADDRESS, [
+        utxo(0, amount=2.5),
+        utxo(1, genesis='e1' * 32, mime='image/png'),
+        utxo(2, genesis='e2' * 32, mime='image/webp'),
+        utxo(3, genesis='e3' * 32, mime='text/html'),
+        utxo(4, genesis='e4' * 32, mime='imagexpng/x'),
+    ])
+    monkeypatch.setattr(module, 'get_wallet_store', lambda: store)
+    return module.app.test_client()
+
+def test_pages_filtered_utxos(client):
+    body = client.get(f"/api/wallet/{ADDRESS}?mime=image/*&sort=timestamp&order=desc&limit=1&offset=1").get_json()
+
+    assert (body['total'], body['offset'], body['limit']) == (2, 1, 1)
+    assert [u['mime_type'] for u in body['utxos']] == ['image/png']
+
+    body = client.get(f"/api/wallet/{ADDRESS}?exclude_mime=image/*,text/html").get_json()
+    assert [u['txid'] for u in body['utxos']] == [f"{0:064x}", f"{4:064x}"]
+    assert (body['ord_count'], body['non_ord_amount']) == (1, 2.5)
+
+def test_wildcard_characters_in_filters_match_literally(client):
+    # '_' and '%' are LIKE wildcards; they must not match other mime types
+    assert client.get(f"/api/wallet/{ADDRESS}?mime=image_/*").get_json()['total'] == 0
+    assert client.get(f"/api/wallet/{ADDRESS}?mime=%25/*").get_json()['total'] == 0
+    assert client.get(f"/api/wallet/{ADDRESS}?mime=imag_/*").get_json()['total'] == 0
+
+def test_rejects_bad_parameters(client):
+    assert client.get(f"/api/wallet/{ADDRESS}?order=sideways").status_code == 400
+    assert client.get(f"/api/wallet/{ADDRESS}?sort=data").status_code == 400
+    assert client.get(f"/api/wallet/{ADDRESS}?offset=-1").status_code == 400
+    assert client.get('/api/wallet/DUnknown').status_code == 404
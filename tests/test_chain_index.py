@@ -0,0 +1,86 @@
+import os
+from chainIndex import ChainIndex, RECORD
+
+GENESIS = 'aa' * 32
+OTHER = 'bb' * 32
+
+def txid(n):
+    return f"{n:064x}"
+
+def open_index(tmp_path, legacy_dirs=()):
+    return ChainIndex(str(tmp_path / 'data' / 'chain_index.bin'), legacy_dirs)
+
+def test_hops_round_trip_with_vout(tmp_path):
+    index = open_index(tmp_path)
+    index.add_hops(GENESIS, [(txid(1), 0), (txid(2), 3)])
+    index.add_hop(OTHER, txid(9), 1)
+    index.add_hop(GENESIS, txid(3), 0)
+
+    assert index.hops(GENESIS) == [(txid(1), 0), (txid(2), 3), (txid(3), 0)]
+    assert index.hops(OTHER) == [(txid(9), 1)]
+    assert index.hops('cc' * 32) == []
+    assert index.info('cc' * 32) is None
+
+def test_fixed_size_records(tmp_path):
+    index = open_index(tmp_path)
+    index.add_hops(GENESIS, [(txid(1), 0), (txid(2), 0)])
+    # One chain record plus one record per hop
+    assert os.path.getsize(index.path) == 3 * RECORD.size
+
+def test_duplicate_hops_are_skipped(tmp_path):
+    index = open_index(tmp_path)
+    index.add_hop(GENESIS, txid(1), 0)
+    index.add_hop(GENESIS, txid(1), 0)
+    assert index.hops(GENESIS) == [(txid(1), 0)]
+
+def test_completion_flag_and_length(tmp_path):
+    index = open_index(tmp_path)
+    index.add_hop(GENESIS, txid(1), 0)
+    assert index.info(GENESIS) == {'hops': 1, 'complete': False, 'length': None}
+
+    index.mark_complete(GENESIS, 1, 1234)
+    size = os.path.getsize(index.path)
+    index.mark_complete(GENESIS, 1, 1234)
+
+    assert index.info(GENESIS) == {'hops': 1, 'complete': True, 'length': 1234}
+    assert os.path.getsize(index.path) == size
+
+def test_reopen_and_appends_from_other_instances(tmp_path):
+    writer = open_index(tmp_path)
+    reader = open_index(tmp_path)
+    writer.add_hop(GENESIS, txid(1), 2)
+    writer.mark_complete(GENESIS, 1, 10)
+
+    assert reader.hops(GENESIS) == [(txid(1), 2)]
+    assert reader.info(GENESIS)['complete']
+    assert open_index(tmp_path).info(GENESIS) == {'hops': 1, 'complete': True, 'length': 10}
+
+def test_compact_drops_duplicates_and_keeps_chains(tmp_path):
+    index = open_index(tmp_path)
+    index.add_hops(GENESIS, [(txid(1), 0), (txid(2), 1)])
+    index.mark_complete(GENESIS, 2, 99)
+    index.add_hop(OTHER, txid(5), 0)
+    # A second CHAIN record and a repeated hop, as two racing writers would leave
+    chain = index.chains[bytes.fromhex(GENESIS)].record
+    index.append(RECORD.pack(1, 0, bytes.fromhex(GENESIS), 0, 0), RECORD.pack(2, 1, bytes.fromhex(txid(2)), chain, 0))
+    reader = open_index(tmp_path)
+
+    assert index.compact() == 2
+    assert os.path.getsize(index.path) == 6 * RECORD.size
+    for view in (index, reader, open_index(tmp_path)):
+        assert view.hops(GENESIS) == [(txid(1), 0), (txid(2), 1)]
+        assert view.info(GENESIS) == {'hops': 2, 'complete': True, 'length': 99}
+        assert view.hops(OTHER) == [(txid(5), 0)]
+
+def test_imports_legacy_text_indexes(tmp_path):
+    legacy = tmp_path / 'indexes'
+    legacy.mkdir()
+    (legacy / f"{GENESIS}.txt").write_text(f"{txid(1)}\n{txid(2)}\n")
+    (legacy / f"{OTHER}.txt").write_text('')
+
+    index = open_index(tmp_path, [str(legacy)])
+
+    assert index.hops(GENESIS) == [(txid(1), 0), (txid(2), 0)]
+    assert not index.info(GENESIS)['complete']
+    assert index.info(OTHER) is None
+    assert sorted(os.listdir(legacy)) == [f"{GENESIS}.txt.imported", f"{OTHER}.txt.imported"]
@@ -0,0 +1,94 @@
+import os
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+import chainWalker
+from chainIndex import ChainIndex
+from contentStore import ContentStore
+
+GENESIS = 'aa' * 32
+MARKER = '6582895'
+
+class FakeNode:
+    """ Chunk chain transactions and the spends linking them """
+
+    def __init__(self):
+        self.transactions = {}
+        self.spends = {}
+        self.spend_lookups = []
+
+    def add(self, txid, asm, spent_by=None):
+        self.transactions[txid] = {
+            'txid': txid,
+            'blockhash': 'block',
+            'vin': [{'scriptSig': {'asm': ' '.join(asm)}}],
+        }
+        if spent_by:
+            self.spends[txid] = spent_by
+
+    def find_spend(self, rpc_connection, txid, vout, start_height, depth):
+        self.spend_lookups.append(txid)
+        return self.spends.get(txid)
+
+@pytest.fixture
+def node(monkeypatch):
+    node = FakeNode()
+    monkeypatch.setattr(chainWalker, 'get_transaction', lambda rpc, txid, coin: node.transactions[txid])
+    monkeypatch.setattr(chainWalker, 'get_block_header', lambda rpc, block_hash, coin: {'height': 1})
+    monkeypatch.setattr(chainWalker, 'prefetch_transactions', lambda rpc, txids, coin: None)
+    monkeypatch.setattr(chainWalker, 'get_spend_index', lambda coin: node)
+    return node
+
+@pytest.fixture
+def sink(tmp_path):
+    index = ChainIndex(str(tmp_path / 'data' / 'chain_index.bin'), ())
+    store = ContentStore(str(tmp_path / 'content'), str(tmp_path / 'data' / 'content_index.db'), lambda: index)
+    return chainWalker.ChainSink('ord', MARKER, str(tmp_path / 'content'), store=lambda: store, index=lambda: index)
+
+def add_three_chunk_chain(node, spend_last=True):
+    """ 'hello world!' in three chunks: genesis, then two spends """
+    mime = b'text/plain'.hex()
+    node.add(GENESIS, [MARKER, '3', mime, '2', b'hell'.hex()], spent_by='bb' * 32)
+    node.add('bb' * 32, ['1', b'o wo'.hex()], spent_by='cc' * 32 if spend_last else None)
+    node.add('cc' * 32, ['0', b'rld!'.hex()])
+
+def walk(sink):
+    return chainWalker.ChainWalk(GENESIS, sink, None, 'dogecoin', 10).run()
+
+def test_complete_chain_is_stored_and_marked_complete(node, sink):
+    add_three_chunk_chain(node)
+
+    path = walk(sink)
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'hello world!'
+    assert sink.store().exists(GENESIS)
+    assert sink.chain_info(GENESIS) == {'hops': 2, 'complete': True, 'length': 12}
+    assert sink.read_chain(GENESIS) == [('bb' * 32, 0), ('cc' * 32, 0)]
+
+def test_partial_chain_is_discarded(node, sink, tmp_path):
+    add_three_chunk_chain(node, spend_last=False)
+
+    assert walk(sink) is None
+
+    assert not sink.store().exists(GENESIS)
+    assert not sink.is_complete(GENESIS)
+    # Neither the truncated file nor its temp file is left behind
+    assert [name for _, _, files in os.walk(tmp_path / 'content') for name in files] == []
+
+def test_complete_chain_is_replayed_without_spend_lookups(node, sink):
+    add_three_chunk_chain(node)
+    walk(sink)
+    node.spend_lookups.clear()
+
+    path = walk(sink)
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'hello world!'
+    assert node.spend_lookups == []
+
+def test_invalid_genesis_raises(node, sink):
+    node.add(GENESIS, ['7564659', '1', b'text/plain'.hex(), '0', '00'])
+    with pytest.raises(chainWalker.InvalidGenesisError):
+        walk(sink)
@@ -0,0 +1,84 @@
+import json
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+import getCollection
+import inscriptionJobs
+from inscriptionJobs import FetchJobRegistry
+
+def txid(n):
+    return f"{n:064x}"
+
+class FakeStore:
+    def __init__(self):
+        self.stored = set()
+
+    def exists(self, txid):
+        return txid in self.stored
+
+@pytest.fixture
+def collection(monkeypatch, tmp_path):
+    """ A 250-item collection in ./collections, assembled by a fake process_tx """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'collections').mkdir()
+    items = [txid(n) for n in range(250)]
+    (tmp_path / 'collections' / 'test.json').write_text(json.dumps({
+        'collection': {'name': 'Test', 'thumbnail': f"{items[0]}i0"},
+        'items': [{'inscriptionId': f"{item}i0"} for item in items],
+    }))
+
+    store = FakeStore()
+    failing = set()
+    calls = []
+
+    def process_tx(genesis_txid, depth):
+        calls.append(genesis_txid)
+        if genesis_txid in failing:
+            return None
+        store.stored.add(genesis_txid)
+        return genesis_txid
+
+    registry = FetchJobRegistry()
+    monkeypatch.setattr(inscriptionJobs, 'get_content_store', lambda: store)
+    monkeypatch.setattr(inscriptionJobs, 'process_tx', process_tx)
+    monkeypatch.setattr(inscriptionJobs, 'is_complete', store.exists)
+    monkeypatch.setattr(getCollection, 'get_content_store', lambda: store)
+    monkeypatch.setattr(getCollection, 'get_fetch_jobs', lambda: registry)
+
+    saves = []
+    save = getCollection.save_scanned_collections
+    monkeypatch.setattr(getCollection, 'save_scanned_collections', lambda data: (saves.append(1), save(data)))
+    return {'items': items, 'failing': failing, 'calls': calls, 'saves': saves, 'registry': registry}
+
+def scanned():
+    with open('./data/scanned_collections.json') as f:
+        return json.load(f)['Test']
+
+def test_imports_every_item_with_batched_progress(collection):
+    progress = getCollection.get_collection('test.json')
+
+    assert progress['status'] == 'done'
+    assert progress['stored'] == 250
+    assert sorted(collection['calls']) == collection['items']
+    assert scanned() == {'stored': collection['items'], 'total': 250, 'complete': True}
+    # Start, two full batches and the final write
+    assert len(collection['saves']) == 4
+    # Items were assembled on the import's threads; the request workers never started
+    assert collection['registry'].executor._threads == set()
+
+def test_failed_items_are_retried_on_resume(collection):
+    collection['failing'].update(collection['items'][10:12])
+
+    progress = getCollection.get_collection('test.json')
+    assert progress['status'] == 'incomplete'
+    assert progress['failed'] == 2
+    assert scanned()['complete'] is False
+    assert len(scanned()['stored']) == 248
+
+    collection['failing'].clear()
+    collection['calls'].clear()
+    progress = getCollection.get_collection('test.json')
+    assert progress['status'] == 'done'
+    assert sorted(collection['calls']) == collection['items'][10:12]
+    assert scanned()['complete'] is True
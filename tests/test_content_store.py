@@ -0,0 +1,73 @@
+import os
+from chainIndex import ChainIndex
+from contentStore import ContentStore
+
+TXID = 'ab' * 32
+
+def open_index(tmp_path):
+    return ChainIndex(str(tmp_path / 'data' / 'chain_index.bin'), ())
+
+def open_store(tmp_path):
+    return ContentStore(
+        str(tmp_path / 'content'), str(tmp_path / 'data' / 'content_index.db'), lambda: open_index(tmp_path)
+    )
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_add_shards_and_indexes(tmp_path):
+    store = open_store(tmp_path)
+    path = store.add(TXID, write(tmp_path, 'part', b'<svg/>'), 'image/svg+xml', '.svg')
+
+    assert path == os.path.join(str(tmp_path / 'content'), 'ab', f"{TXID}.svg")
+    entry = open_store(tmp_path).lookup(TXID)
+    assert entry['mime_type'] == 'image/svg+xml'
+    assert entry['size'] == 6
+
+def test_lookup_forgets_files_deleted_elsewhere(tmp_path):
+    store = open_store(tmp_path)
+    store.add(TXID, write(tmp_path, 'part', b'data'), 'text/plain', '.txt')
+    assert store.exists(TXID)
+
+    os.remove(store.lookup(TXID)['path'])
+
+    assert store.lookup(TXID) is None
+    assert not open_store(tmp_path).exists(TXID)
+
+def test_readding_under_new_extension_replaces_file(tmp_path):
+    store = open_store(tmp_path)
+    old_path = store.add(TXID, write(tmp_path, 'a', b'one'), None, '.bin')
+    new_path = store.add(TXID, write(tmp_path, 'b', b'two'), 'text/plain', '.txt')
+
+    assert not os.path.exists(old_path)
+    assert store.lookup(TXID)['path'] == new_path
+
+def test_rebuilds_index_and_migrates_flat_files(tmp_path):
+    store = open_store(tmp_path)
+    store.add(TXID, write(tmp_path, 'a', b'one'), 'text/plain', '.txt')
+    store.db.close()
+    for name in os.listdir(tmp_path / 'data'):
+        os.remove(tmp_path / 'data' / name)
+    flat = 'cd' * 32
+    (tmp_path / 'content' / f"{flat}.png").write_bytes(b'png')
+
+    store = open_store(tmp_path)
+
+    assert store.exists(TXID)
+    assert store.lookup(flat)['path'] == os.path.join(str(tmp_path / 'content'), 'cd', f"{flat}.png")
+
+def test_content_stored_before_completion_tracking_is_marked_complete(tmp_path):
+    # A content folder from before the store: flat files and no index
+    os.makedirs(tmp_path / 'content')
+    (tmp_path / 'content' / f"{TXID}.txt").write_bytes(b'legacy')
+    (tmp_path / 'content' / 'notes.txt').write_bytes(b'not an inscription')
+
+    store = open_store(tmp_path)
+
+    assert open_index(tmp_path).info(TXID) == {'hops': 0, 'complete': True, 'length': 6}
+    # Content added from now on is only marked complete by the chain walker
+    store.add('cd' * 32, write(tmp_path, 'part', b'new'), 'text/plain', '.txt')
+    open_store(tmp_path)
+    assert open_index(tmp_path).info('cd' * 32) is None
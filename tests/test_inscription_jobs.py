@@ -0,0 +1,114 @@
+import threading
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+import inscriptionJobs
+from inscriptionJobs import FetchJobRegistry
+
+class FakeStore:
+    def __init__(self):
+        self.stored = {}
+
+    def exists(self, txid):
+        return txid in self.stored
+
+    def lookup(self, txid):
+        return self.stored.get(txid)
+
+class FakeAssembler:
+    """ process_tx stand-in; ids listed in blocked wait until released """
+
+    def __init__(self, store, tmp_path):
+        self.store = store
+        self.tmp_path = tmp_path
+        self.blocked = {}
+        self.calls = []
+        self.contents = {}
+        self.lock = threading.Lock()
+
+    def block(self, txid):
+        self.blocked[txid] = threading.Event()
+
+    def process_tx(self, txid, depth):
+        with self.lock:
+            self.calls.append(txid)
+        if txid in self.blocked:
+            assert self.blocked[txid].wait(5)
+        path = self.tmp_path / txid
+        path.write_text(self.contents.get(txid, 'plain'))
+        self.store.stored[txid] = {'path': str(path), 'mime_type': 'text/html'}
+        return str(path)
+
+@pytest.fixture
+def assembler(monkeypatch, tmp_path):
+    store = FakeStore()
+    assembler = FakeAssembler(store, tmp_path)
+    monkeypatch.setattr(inscriptionJobs, 'get_content_store', lambda: store)
+    monkeypatch.setattr(inscriptionJobs, 'process_tx', assembler.process_tx)
+    monkeypatch.setattr(inscriptionJobs, 'is_complete', store.exists)
+    return assembler
+
+def txid(n):
+    return f"{n:064x}"
+
+def test_prefetches_do_not_delay_requests(assembler):
+    registry = FetchJobRegistry(max_workers=1, prefetch_workers=2)
+    references = [txid(n) for n in range(1, 6)]
+    assembler.contents[txid(0)] = ''.join(f'<img src="/content/{r}i0">' for r in references)
+    for reference in references:
+        assembler.block(reference)
+
+    assert registry.submit(txid(0)).wait(5)
+    page = registry.get(txid(0))
+    assert page.dependencies == references
+
+    # Only as many prefetches as there are prefetch workers were started
+    prefetching = [registry.get(r) for r in references if registry.get(r)]
+    assert len(prefetching) == 2 and all(job.prefetch for job in prefetching)
+
+    # A request while every prefetch is stuck still runs straight away
+    request = registry.submit(txid(9), prefetch_depth=0)
+    assert request.wait(5) and request.status == 'done'
+
+    for event in assembler.blocked.values():
+        event.set()
+    assert all(job.wait(5) for job in prefetching)
+
+def test_request_promotes_running_prefetch(assembler):
+    registry = FetchJobRegistry(max_workers=1, prefetch_workers=1)
+    assembler.block(txid(1))
+    prefetch = registry.submit(txid(1), prefetch_depth=0, prefetch=True)
+
+    assert registry.submit(txid(2), prefetch=True) is None
+    request = registry.submit(txid(1), prefetch_depth=2)
+    assert request is prefetch and not request.prefetch and request.prefetch_depth == 2
+
+    assembler.blocked[txid(1)].set()
+    assert request.wait(5) and request.status == 'done'
+    assert assembler.calls == [txid(1)]
+
+def test_requests_for_one_inscription_share_a_job(assembler):
+    registry = FetchJobRegistry(max_workers=4)
+    assembler.block(txid(1))
+
+    jobs = [registry.submit(txid(1), prefetch_depth=0) for _ in range(3)]
+    assert all(job is jobs[0] for job in jobs)
+    assert registry.get(txid(1)) is jobs[0]
+
+    assembler.blocked[txid(1)].set()
+    assert jobs[0].wait(5) and jobs[0].status == 'done'
+    assert assembler.calls == [txid(1)]
+    # Stored now, so a new request finishes without assembling again
+    assert registry.submit(txid(1)).status == 'done'
+    assert assembler.calls == [txid(1)]
+
+def test_incomplete_chain_fails_the_job(assembler, monkeypatch):
+    registry = FetchJobRegistry(max_workers=1)
+    monkeypatch.setattr(inscriptionJobs, 'process_tx', lambda genesis_txid, depth: None)
+
+    job = registry.submit(txid(1))
+
+    assert job.wait(5) and job.status == 'failed'
+    assert job.error == "Inscription could not be assembled from its whole chunk chain"
+    assert registry.get(txid(1)) is job
@@ -0,0 +1,74 @@
+import threading
+import pytest
+from jobRunner import JobRunner
+
+def test_submitting_a_running_pipeline_returns_its_job():
+    runner = JobRunner(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def pipeline(job):
+        calls.append(job.id)
+        release.wait(5)
+
+    first = runner.submit('sync', pipeline)
+    assert runner.submit('sync', pipeline) is first
+    release.set()
+
+    assert first.wait(5) and first.status == 'done'
+    assert calls == [first.id]
+    # Once finished, the same pipeline starts a new job
+    second = runner.submit('sync', pipeline)
+    assert second is not first and second.wait(5)
+
+def test_cancel_stops_a_job_at_its_next_check():
+    runner = JobRunner(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def pipeline(job):
+        started.set()
+        release.wait(5)
+        job.check_cancelled()
+        job.advance()
+
+    job = runner.submit('fetch', pipeline)
+    assert started.wait(5)
+    assert runner.cancel(job.id) is job
+    release.set()
+
+    assert job.wait(5) and job.status == 'cancelled'
+    assert job.completed == 0
+
+def test_failing_pipeline_records_its_error():
+    runner = JobRunner(max_workers=1)
+
+    def pipeline(job):
+        raise ValueError("node unreachable")
+
+    job = runner.submit('sync', pipeline)
+
+    assert job.wait(5) and job.status == 'failed'
+    assert job.to_dict()['error'] == "node unreachable"
+    assert runner.cancel('unknown') is None
+
+def test_wallet_sync_fails_the_job_when_a_coin_fails(monkeypatch):
+    pytest.importorskip('bitcoinrpc')
+    import walletSync
+
+    synced = []
+
+    def sync_coin(coin_type, address_pool, utxo_pool, job):
+        if coin_type == 'pepecoin':
+            raise ConnectionError("connection refused")
+        synced.append(coin_type)
+
+    monkeypatch.setattr(walletSync, 'get_configured_coins', lambda: ['dogecoin', 'pepecoin'])
+    monkeypatch.setattr(walletSync, 'sync_coin', sync_coin)
+
+    job = JobRunner(max_workers=1).submit('sync', walletSync.sync_all_coins, max_workers=1)
+
+    assert job.wait(5) and job.status == 'failed'
+    assert job.error == "Wallet sync failed for 1 of 2 coins: pepecoin: connection refused"
+    # The healthy coin was still synced
+    assert synced == ['dogecoin']
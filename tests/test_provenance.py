@@ -0,0 +1,82 @@
+import os
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+from bitcoinrpc.authproxy import JSONRPCException
+import walletSync
+from provenanceCache import ProvenanceCache, MISSING
+
+ORD_MARKER = '6582895'
+
+def transaction(txid, spends=None, asm='3045 02ab', value=1.0):
+    """ A transaction whose single output spends (txid, vout) of spends with the given scriptSig asm """
+    vin = [{'txid': spends[0], 'vout': spends[1], 'scriptSig': {'asm': asm}}]
+    return {'txid': txid, 'blockhash': 'block', 'vin': vin, 'vout': [{'value': value, 'scriptPubKey': {}}]}
+
+class FakeNode:
+    def __init__(self):
+        self.transactions = {}
+        self.fetched = []
+        self.failing = set()
+
+    def get_transaction(self, rpc, txid, coin_type):
+        self.fetched.append(txid)
+        if txid in self.failing:
+            raise JSONRPCException({'code': -5, 'message': 'No such mempool or blockchain transaction'})
+        return dict(self.transactions[txid])
+
+@pytest.fixture
+def traced(monkeypatch, tmp_path):
+    """ genesis -> hop1 -> hop2: the inscription sits in hop2's first output """
+    node = FakeNode()
+    node.transactions = {
+        # An empty output ends a walk: nothing flows from it into the next transaction
+        'root': transaction('root', ('coinbase', 0), value=0),
+        'funding': transaction('funding', ('root', 0)),
+        # The genesis scriptSig carries the ord marker, so whatever spends it starts the chain
+        'genesis': transaction('genesis', ('funding', 0), asm=f"{ORD_MARKER} 1 {b'text/plain'.hex()} 0 00"),
+        'hop1': transaction('hop1', ('genesis', 0)),
+        'hop2': transaction('hop2', ('hop1', 0)),
+    }
+    cache = ProvenanceCache('dogecoin', str(tmp_path))
+    monkeypatch.setattr(walletSync, 'get_transaction', node.get_transaction)
+    monkeypatch.setattr(walletSync, 'get_block_header', lambda rpc, block_hash, coin_type: {'time': 0})
+    monkeypatch.setattr(walletSync, 'prefetch_transactions', lambda rpc, txids, coin_type: None)
+    monkeypatch.setattr(walletSync, 'get_rpc_client', lambda coin_type, wallet=None: None)
+    monkeypatch.setattr(walletSync, 'get_provenance_cache', lambda coin_type: cache)
+    return node, walletSync.CoinRPC('dogecoin_rpc'), cache
+
+def test_trace_is_cached_for_every_hop(traced):
+    node, coin_rpc, cache = traced
+
+    result = coin_rpc.trace_ordinal_and_sms('hop2', 0)
+
+    assert result['genesis_txid'] == 'genesis'
+    assert cache.get('hop2', 0) == result
+    assert cache.get('hop1', 0) == result
+
+    # A later trace through an already traced hop stops there
+    node.transactions['hop3'] = transaction('hop3', ('hop2', 0))
+    node.fetched.clear()
+    assert coin_rpc.trace_ordinal_and_sms('hop3', 0) == result
+    assert 'genesis' not in node.fetched and 'hop1' not in node.fetched
+
+def test_trace_hitting_an_rpc_error_is_not_cached(traced):
+    node, coin_rpc, cache = traced
+    node.failing.add('genesis')
+
+    with pytest.raises(walletSync.ProvenanceLookupError):
+        coin_rpc.trace_ordinal_and_sms('hop2', 0)
+    assert cache.get('hop2', 0) is MISSING
+
+    node.failing.clear()
+    assert coin_rpc.trace_ordinal_and_sms('hop2', 0)['genesis_txid'] == 'genesis'
+
+def test_plain_coins_are_cached_as_none(traced):
+    node, coin_rpc, cache = traced
+    node.transactions['payment'] = transaction('payment', ('funding', 0))
+
+    assert coin_rpc.trace_ordinal_and_sms('payment', 0) is None
+    assert cache.get('payment', 0) is None
+    assert ProvenanceCache('dogecoin', os.path.dirname(cache.db_path)).get('payment', 0) is None
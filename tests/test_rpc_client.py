@@ -0,0 +1,83 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+from bitcoinrpc.authproxy import JSONRPCException
+from rpcClient import RPCClient
+
+class FakeNode(BaseHTTPRequestHandler):
+    """ JSON-RPC node that closes every connection after answering, like an idle keep-alive timeout """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        calls = payload if isinstance(payload, list) else [payload]
+        self.server.received.extend(call['method'] for call in calls)
+        if self.server.drop:
+            # Ran the call, then lost the connection before answering
+            self.close_connection = True
+            return
+        results = [self.result(call) for call in calls]
+        body = json.dumps(results if isinstance(payload, list) else results[0]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def result(self, call):
+        if call['method'] == 'getblockhash':
+            return {'id': call['id'], 'result': f"hash{call['params'][0]}", 'error': None}
+        if call['method'] == 'fail':
+            return {'id': call['id'], 'result': None, 'error': {'code': -5, 'message': 'No such transaction'}}
+        return {'id': call['id'], 'result': call['method'], 'error': None}
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def node():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeNode)
+    server.received = []
+    server.drop = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def client_for(node):
+    return RPCClient('user', 'password', '127.0.0.1', node.server_address[1], timeout=5)
+
+def test_batch_results_come_back_in_order(node):
+    client = client_for(node)
+    assert client.batch_call('getblockhash', [(height,) for height in range(5)], batch_size=2) == [
+        f"hash{height}" for height in range(5)
+    ]
+    results = client.batch([('getblockcount',), ('fail',)], raise_errors=False)
+    assert results[0] == 'getblockcount' and isinstance(results[1], JSONRPCException)
+    with pytest.raises(JSONRPCException):
+        client.call('fail')
+
+def test_read_only_call_retries_on_a_stale_pooled_connection(node):
+    client = client_for(node)
+    assert client.getblockcount() == 'getblockcount'
+    # The pooled connection was closed by the node; the call is retried on a fresh one
+    assert client.getbestblockhash() == 'getbestblockhash'
+    assert node.received == ['getblockcount', 'getbestblockhash']
+
+def test_state_changing_call_uses_a_fresh_connection(node):
+    client = client_for(node)
+    client.getblockcount()
+    assert client.sendrawtransaction('00') == 'sendrawtransaction'
+    assert node.received == ['getblockcount', 'sendrawtransaction']
+
+def test_state_changing_call_is_never_sent_twice(node):
+    client = client_for(node)
+    node.drop = True
+    with pytest.raises(ConnectionError):
+        client.sendrawtransaction('00')
+    assert node.received == ['sendrawtransaction']
@@ -0,0 +1,103 @@
+import base64
+import io
+import json
+import os
+import pytest
+
+pytest.importorskip('cryptography')
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+import smsEnvelope
+
+CHUNK = 64  # Small chunks so multi-chunk cases stay fast
+
+@pytest.fixture(scope='module')
+def keys():
+    privkey = ec.generate_private_key(ec.SECP256K1(), default_backend())
+    pubkey_hex = privkey.public_key().public_bytes(
+        encoding=serialization.Encoding.X962,
+        format=serialization.PublicFormat.CompressedPoint
+    ).hex()
+    return privkey, pubkey_hex
+
+def seal(pubkey_hex, data, chunk_size=CHUNK):
+    out = io.BytesIO()
+    smsEnvelope.encrypt_stream(smsEnvelope.pubkey_to_ec_point(pubkey_hex), io.BytesIO(data), out, chunk_size)
+    return out.getvalue()
+
+def unseal(privkey, envelope, mimetype='application/octet-stream'):
+    out = io.BytesIO()
+    smsEnvelope.decrypt_stream(privkey, io.BytesIO(envelope), out, mimetype)
+    return out.getvalue()
+
+def legacy_envelope(pubkey_hex, data, mimetype):
+    """ The single-shot format messages were sent in before the chunked envelope """
+    aes_key = os.urandom(32)
+    wrapped = smsEnvelope.wrap_aes_key(smsEnvelope.pubkey_to_ec_point(pubkey_hex), aes_key)
+    if mimetype != 'text/plain':
+        data = base64.b64encode(data)
+    iv = os.urandom(12)
+    encryptor = Cipher(algorithms.AES(aes_key), modes.GCM(iv), backend=default_backend()).encryptor()
+    ciphertext = encryptor.update(data) + encryptor.finalize()
+    return base64.b64encode(wrapped + iv + ciphertext + encryptor.tag)
+
+@pytest.mark.parametrize('size', [0, 1, CHUNK - 1, CHUNK, CHUNK + 1, 3 * CHUNK, 3 * CHUNK + 7])
+def test_round_trip(keys, size):
+    privkey, pubkey_hex = keys
+    data = os.urandom(size)
+    assert unseal(privkey, seal(pubkey_hex, data)) == data
+
+def test_bytes_helpers_round_trip(keys):
+    privkey, pubkey_hex = keys
+    encrypted = smsEnvelope.encrypt_bytes(pubkey_hex, b'hello')
+    assert smsEnvelope.decrypt_bytes(privkey, encrypted, 'text/plain') == b'hello'
+
+def test_tampered_chunk_is_rejected(keys):
+    privkey, pubkey_hex = keys
+    envelope = bytearray(seal(pubkey_hex, os.urandom(3 * CHUNK)))
+    envelope[-CHUNK] ^= 1
+    with pytest.raises(InvalidTag):
+        unseal(privkey, bytes(envelope))
+
+def test_dropped_last_chunk_is_rejected(keys):
+    privkey, pubkey_hex = keys
+    envelope = seal(pubkey_hex, os.urandom(3 * CHUNK))
+    sealed_chunk = CHUNK + smsEnvelope.TAG_SIZE
+    # The remaining last chunk was sealed as "not last", so it no longer authenticates
+    with pytest.raises(InvalidTag):
+        unseal(privkey, envelope[:-sealed_chunk])
+
+def test_header_is_authenticated(keys):
+    privkey, pubkey_hex = keys
+    envelope = bytearray(seal(pubkey_hex, b'payload'))
+    envelope[smsEnvelope.ENVELOPE_HEADER.size - 1] ^= 1  # Last byte of the nonce prefix
+    with pytest.raises(InvalidTag):
+        unseal(privkey, bytes(envelope))
+
+@pytest.mark.parametrize('mimetype', ['text/plain', 'image/png'])
+def test_decrypts_legacy_messages(keys, mimetype):
+    privkey, pubkey_hex = keys
+    data = os.urandom(3 * smsEnvelope.BUFFER_SIZE + 5) if mimetype != 'text/plain' else b'legacy text'
+    encrypted = legacy_envelope(pubkey_hex, data, mimetype)
+    assert smsEnvelope.decrypt_bytes(privkey, encrypted, mimetype) == data
+
+def test_sms_json_file_round_trip(keys, tmp_path):
+    privkey, pubkey_hex = keys
+    data = os.urandom(5 * smsEnvelope.CHUNK_SIZE // 2)
+    json_path = str(tmp_path / 'sms.json')
+    smsEnvelope.write_sms_json(pubkey_hex, io.BytesIO(data), {'mimetype': 'image/png', 'data': 'a.png'}, json_path)
+
+    with open(json_path) as f:
+        assert 'encrypted_data' in json.load(f)
+    sms_data, _ = smsEnvelope.read_sms_json(json_path)
+    assert sms_data == {'mimetype': 'image/png', 'data': 'a.png'}
+
+    output_path = str(tmp_path / 'out.png')
+    smsEnvelope.decrypt_sms_file(privkey, json_path, output_path)
+    with open(output_path, 'rb') as f:
+        assert f.read() == data
+    assert sorted(os.listdir(tmp_path)) == ['out.png', 'sms.json']
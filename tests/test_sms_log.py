@@ -0,0 +1,70 @@
+import json
+import os
+import pytest
+from smsLog import SmsLog
+
+ADDRESS = 'DAddress1'
+
+def message(n, day):
+    return {'sms_txid': f"tx{n}", 'timestamp': f"2024-01-{day:02d}T00:00:00", 'tag': 'received'}
+
+def txids(messages):
+    return [m['sms_txid'] for m in messages]
+
+def test_pages_newest_first(tmp_path):
+    log = SmsLog(str(tmp_path))
+    # Arrival order differs from timestamp order
+    for n, day in enumerate([3, 1, 5, 2, 4]):
+        log.append(ADDRESS, message(n, day))
+
+    total, page = log.page(ADDRESS)
+    assert total == 5
+    assert txids(page) == ['tx2', 'tx4', 'tx0', 'tx3', 'tx1']
+    assert txids(log.page(ADDRESS, offset=1, limit=2)[1]) == ['tx4', 'tx0']
+    assert txids(SmsLog(str(tmp_path)).page(ADDRESS, offset=4, limit=10)[1]) == ['tx1']
+
+def test_rejects_invalid_address(tmp_path):
+    with pytest.raises(ValueError):
+        SmsLog(str(tmp_path)).append('../etc', message(0, 1))
+
+def test_migrates_legacy_json(tmp_path):
+    legacy = [message(n, n + 1) for n in range(3)]
+    (tmp_path / f"{ADDRESS}.json").write_text(json.dumps(list(reversed(legacy))))
+
+    log = SmsLog(str(tmp_path))
+
+    assert log.addresses() == [ADDRESS]
+    assert txids(log.page(ADDRESS)[1]) == ['tx2', 'tx1', 'tx0']
+    assert os.path.exists(tmp_path / f"{ADDRESS}.json.imported")
+
+def test_interrupted_migration_resumes_without_duplicates(tmp_path, monkeypatch):
+    (tmp_path / f"{ADDRESS}.json").write_text(json.dumps([message(n, n + 1) for n in range(4)]))
+    append = SmsLog.append
+    appended = []
+
+    def crash_after_two(self, address, entry):
+        if len(appended) == 2:
+            raise KeyboardInterrupt
+        appended.append(entry)
+        return append(self, address, entry)
+
+    monkeypatch.setattr(SmsLog, 'append', crash_after_two)
+    with pytest.raises(KeyboardInterrupt):
+        SmsLog(str(tmp_path))
+    monkeypatch.setattr(SmsLog, 'append', append)
+
+    total, page = SmsLog(str(tmp_path)).page(ADDRESS)
+    assert total == 4
+    assert txids(page) == ['tx3', 'tx2', 'tx1', 'tx0']
+
+def test_reindexes_lines_missing_from_sidecar(tmp_path):
+    log = SmsLog(str(tmp_path))
+    log.append(ADDRESS, message(0, 1))
+    # A crash after the .jsonl write and before the sidecar write
+    with open(tmp_path / f"{ADDRESS}.jsonl", 'ab') as f:
+        f.write(SmsLog.encode(message(1, 2)))
+        f.write(b'{"torn": ')
+
+    total, page = SmsLog(str(tmp_path)).page(ADDRESS)
+    assert total == 2
+    assert txids(page) == ['tx1', 'tx0']
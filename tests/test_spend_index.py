@@ -0,0 +1,61 @@
+from spendIndex import SpendIndex, REORG_DEPTH
+
+def block(height, block_hash, spends):
+    """ Verbose block whose transactions spend the given (txid, vout, spending_txid) outpoints """
+    return {
+        'height': height,
+        'hash': block_hash,
+        'tx': [{'txid': spending, 'vin': [{'txid': txid, 'vout': vout}]} for txid, vout, spending in spends],
+    }
+
+class FakeChain:
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.fetched = []
+
+    def getblockcount(self):
+        return len(self.blocks) - 1
+
+    def batch_call(self, method, params_list):
+        if method == 'getblockhash':
+            return [self.blocks[height]['hash'] for (height,) in params_list]
+        by_hash = {b['hash']: b for b in self.blocks}
+        self.fetched.extend(block_hash for block_hash, _ in params_list)
+        return [by_hash[block_hash] for block_hash, _ in params_list]
+
+def make_chain(length, spends_at=None):
+    spends_at = spends_at or {}
+    return [block(h, f"hash{h}", spends_at.get(h, [])) for h in range(length)]
+
+def test_find_spend_indexes_range_once(tmp_path):
+    chain = FakeChain(make_chain(50, {30: [('aa', 0, 'bb')]}))
+    index = SpendIndex('dogecoin', str(tmp_path))
+
+    assert index.find_spend(chain, 'aa', 0, 10, 30) == 'bb'
+    assert index.lookup('aa', 0) == ('bb', 30)
+    fetched = len(chain.fetched)
+
+    # Indexed blocks below the reorg window are not fetched again
+    assert index.find_spend(chain, 'cc', 1, 10, 20) is None
+    assert len(chain.fetched) == fetched
+
+def test_index_survives_reopen(tmp_path):
+    chain = FakeChain(make_chain(5, {3: [('aa', 1, 'bb')]}))
+    SpendIndex('dogecoin', str(tmp_path)).sync(chain, 0)
+
+    reopened = SpendIndex('dogecoin', str(tmp_path))
+    assert reopened.lookup('aa', 1) == ('bb', 3)
+    assert reopened.tip_height() == 4
+
+def test_reorged_block_near_tip_is_replaced(tmp_path):
+    blocks = make_chain(REORG_DEPTH + 5, {REORG_DEPTH + 3: [('aa', 0, 'old')]})
+    chain = FakeChain(blocks)
+    index = SpendIndex('dogecoin', str(tmp_path))
+    index.sync(chain, 0)
+
+    height = REORG_DEPTH + 3
+    blocks[height] = block(height, 'replaced', [('aa', 0, 'new')])
+    index.follow_tip(chain)
+
+    assert index.lookup('aa', 0) == ('new', height)
+    assert index.block_hash_at(height) == 'replaced'
@@ -0,0 +1,76 @@
+import os
+from decimal import Decimal
+import txCache
+from txCache import TxCache, DISK_TX_LIMIT, TX_OVERHEAD
+
+def tx(txid, hex_size=10, confirmed=True):
+    return {
+        'txid': txid, 'hex': 'ab' * hex_size, 'confirmations': 5,
+        'blockhash': 'block' if confirmed else None,
+        'vout': [{'value': Decimal('1.23456789'), 'n': 0}],
+    }
+
+class FakeRPC:
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.calls = []
+
+    def getrawtransaction(self, txid, verbose):
+        self.calls.append(txid)
+        return dict(self.transactions[txid])
+
+    def batch_call(self, method, params_list, raise_errors=True, batch_size=100):
+        self.calls.append([txid for txid, _ in params_list])
+        return [dict(self.transactions[txid]) for txid, _ in params_list]
+
+def test_confirmed_transactions_persist_to_disk(tmp_path):
+    TxCache(str(tmp_path)).put('dogecoin', tx('aa'))
+
+    cached = TxCache(str(tmp_path)).get('dogecoin', 'aa')
+    assert cached['vout'][0]['value'] == Decimal('1.23456789')
+    assert 'confirmations' not in cached
+
+def test_unconfirmed_transactions_are_not_cached(tmp_path):
+    cache = TxCache(str(tmp_path))
+    cache.put('dogecoin', tx('aa', confirmed=False))
+    assert cache.get('dogecoin', 'aa') is None
+
+def test_large_transactions_stay_off_disk(tmp_path):
+    cache = TxCache(str(tmp_path))
+    cache.put('dogecoin', tx('aa', hex_size=DISK_TX_LIMIT + 1))
+
+    assert cache.get('dogecoin', 'aa') is not None
+    assert not os.path.exists(cache._path('dogecoin', 'aa'))
+    assert TxCache(str(tmp_path)).get('dogecoin', 'aa') is None
+
+def test_memory_is_bounded_by_bytes(tmp_path):
+    weight = TX_OVERHEAD + 2000
+    cache = TxCache(str(tmp_path / 'none'), lru_bytes=3 * weight)
+    for n in range(5):
+        cache._remember_tx(('dogecoin', f"t{n}"), tx(f"t{n}", hex_size=1000))
+    cache._recall_tx(('dogecoin', 't2'))  # Recently used, so kept
+    cache._remember_tx(('dogecoin', 't5'), tx('t5', hex_size=1000))
+
+    assert cache.lru_used <= 3 * weight
+    assert list(key[1] for key in cache.lru) == ['t4', 't2', 't5']
+
+def test_get_transaction_fetches_once_and_returns_copies(tmp_path, monkeypatch):
+    monkeypatch.setattr(txCache, 'tx_cache', TxCache(str(tmp_path)))
+    rpc = FakeRPC({'aa': tx('aa')})
+
+    first = txCache.get_transaction(rpc, 'aa', 'dogecoin_rpc')
+    first['vout'].clear()
+    second = txCache.get_transaction(rpc, 'aa')
+
+    assert rpc.calls == ['aa']
+    assert len(second['vout']) == 1
+
+def test_prefetch_batches_only_missing_transactions(tmp_path, monkeypatch):
+    monkeypatch.setattr(txCache, 'tx_cache', TxCache(str(tmp_path)))
+    rpc = FakeRPC({txid: tx(txid) for txid in ('aa', 'bb', 'cc')})
+    txCache.get_transaction(rpc, 'aa')
+
+    txCache.prefetch_transactions(rpc, ['aa', 'bb', 'cc', 'bb'])
+    txCache.get_transaction(rpc, 'cc')
+
+    assert rpc.calls == ['aa', ['bb', 'cc']]
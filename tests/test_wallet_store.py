@@ -0,0 +1,93 @@
+import json
+import os
+from walletStore import WalletStore
+
+ADDRESS = 'DWallet1'
+
+def utxo(n, genesis='not an ord', mime=None, amount=1.0, sms='not an sms'):
+    return {
+        'txid': f"{n:064x}", 'vout': 0, 'amount': amount, 'genesis_txid': genesis,
+        'sms_txid': sms, 'mime_type': mime, 'timestamp': f"2024-01-{n + 1:02d} 00:00:00",
+    }
+
+def open_store(tmp_path):
+    return WalletStore(str(tmp_path / 'data' / 'wallets.db'), str(tmp_path / 'wallets'))
+
+def test_replace_wallet_round_trip(tmp_path):
+    store = open_store(tmp_path)
+    utxos = [utxo(0), utxo(1, genesis='ee' * 32, mime='image/png'), utxo(2, sms='ff' * 32)]
+    store.replace_wallet(ADDRESS, utxos, 'tip')
+
+    reopened = open_store(tmp_path)
+    assert reopened.get_utxos(ADDRESS) == utxos
+    assert reopened.find_utxo(utxos[1]['txid'], 0) == (ADDRESS, utxos[1])
+    assert reopened.find_inscription_holder('ee' * 32) == ADDRESS
+    assert reopened.find_receiving_address('ff' * 32) == ADDRESS
+    summary = reopened.wallets()[0]
+    assert (summary['utxo_count'], summary['ord_count'], summary['last_block']) == (3, 1, 'tip')
+
+def test_replace_wallet_drops_spent_outpoints_but_keeps_reverse_indexes(tmp_path):
+    store = open_store(tmp_path)
+    store.replace_wallet(ADDRESS, [utxo(0), utxo(1, genesis='ee' * 32, mime='image/png')])
+    store.replace_wallet(ADDRESS, [utxo(0), utxo(2)])
+
+    assert [u['txid'] for u in store.get_utxos(ADDRESS)] == [f"{0:064x}", f"{2:064x}"]
+    assert store.find_utxo(f"{1:064x}", 0) == (None, None)
+    assert store.find_inscription_holder('ee' * 32) == ADDRESS
+
+def test_utxo_page_filters_and_totals(tmp_path):
+    store = open_store(tmp_path)
+    store.replace_wallet(ADDRESS, [
+        utxo(0, amount=2.5),
+        utxo(1, genesis='e1' * 32, mime='image/png'),
+        utxo(2, genesis='e2' * 32, mime='image/webp'),
+        utxo(3, genesis='e3' * 32, mime='text/html'),
+    ])
+
+    page = store.utxo_page(ADDRESS, limit=1, include_mime=['image/*'], sort='timestamp', descending=True)
+    assert page['total'] == 2
+    assert [u['mime_type'] for u in page['utxos']] == ['image/webp']
+
+    page = store.utxo_page(ADDRESS, exclude_mime=['image/*'])
+    assert [u['txid'] for u in page['utxos']] == [f"{0:064x}", f"{3:064x}"]
+    assert page['non_ord_amount'] == 2.5
+
+def test_imports_wallet_files(tmp_path):
+    os.makedirs(tmp_path / 'wallets')
+    (tmp_path / 'wallets' / f"{ADDRESS}.json").write_text(json.dumps([utxo(0)]))
+
+    store = open_store(tmp_path)
+
+    assert store.get_utxos(ADDRESS) == [utxo(0)]
+    # Left in place for the simple scripts that still read them
+    assert os.listdir(tmp_path / 'wallets') == [f"{ADDRESS}.json"]
+
+def test_reimports_wallet_file_only_after_it_changes(tmp_path):
+    os.makedirs(tmp_path / 'wallets')
+    wallet_path = tmp_path / 'wallets' / f"{ADDRESS}.json"
+    wallet_path.write_text(json.dumps([utxo(0)]))
+    store = open_store(tmp_path)
+    store.replace_wallet(ADDRESS, [utxo(0), utxo(1)])
+
+    # An unchanged file does not overwrite what walletSync stored since
+    assert len(open_store(tmp_path).get_utxos(ADDRESS)) == 2
+
+    wallet_path.write_text(json.dumps([utxo(2)]))
+    os.utime(wallet_path, ns=(1, 1))
+    assert open_store(tmp_path).get_utxos(ADDRESS) == [utxo(2)]
+
+def test_imports_files_written_by_list_wallets(tmp_path):
+    # simple_scripts/list_wallets.py only writes txid, vout and amount
+    os.makedirs(tmp_path / 'wallets')
+    (tmp_path / 'wallets' / 'DPlain.json').write_text(json.dumps([{'txid': 'aa', 'vout': 0, 'amount': 1.5}]))
+    (tmp_path / 'wallets' / 'DBroken.json').write_text(json.dumps([{'txid': 'bb', 'vout': 0}, 'junk']))
+
+    store = open_store(tmp_path)
+
+    assert store.get_utxos('DPlain') == [{'txid': 'aa', 'vout': 0, 'amount': 1.5}]
+    summary = {wallet['address']: wallet for wallet in store.wallets()}
+    assert list(summary) == ['DPlain']
+    assert (summary['DPlain']['ord_count'], summary['DPlain']['non_ord_balance']) == (0, 1.5)
+    assert store.utxo_page('DPlain')['non_ord_amount'] == 1.5
+    # The broken file was rolled back as a whole
+    assert store.get_utxos('DBroken') == []
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+import walletSync
+from provenanceCache import ProvenanceCache
+from walletStore import WalletStore
+
+class FakeWallet:
+    """ One coin's node and wallet: UTXOs by address, listsinceblock entries and the tip """
+
+    def __init__(self):
+        self.tip = 'b1'
+        self.main_chain = {'b1'}
+        self.utxos = {}
+        self.since = {}  # block hash -> wallet transactions listed since it
+        self.transactions = {}
+        self.traced = []
+
+    def getbestblockhash(self):
+        return self.tip
+
+    def receive(self, address, txid, amount=1.0):
+        self.utxos.setdefault(address, []).append({'address': address, 'txid': txid, 'vout': 0, 'amount': amount})
+
+    def attach(self, coin_rpc):
+        coin_rpc.snapshot_unspent = lambda: {address: list(utxos) for address, utxos in self.utxos.items() if utxos}
+        coin_rpc.list_addresses = lambda: list(self.utxos)
+        coin_rpc.list_since_block = lambda block_hash: (self.since.get(block_hash, []), self.tip)
+        coin_rpc.is_block_in_main_chain = lambda block_hash: block_hash in self.main_chain
+        coin_rpc.get_transaction = lambda txid: self.transactions.get(txid)
+        coin_rpc.trace_ordinal_and_sms = lambda txid, vout: self.traced.append(txid)
+
+@pytest.fixture
+def wallet(monkeypatch, tmp_path):
+    node = FakeWallet()
+    store = WalletStore(str(tmp_path / 'wallets.db'), str(tmp_path / 'wallets'))
+    monkeypatch.setattr(walletSync, 'SYNC_STATE_FILE', str(tmp_path / 'data' / 'wallet_sync_state.json'))
+    monkeypatch.setattr(walletSync, 'get_wallet_store', lambda: store)
+    monkeypatch.setattr(walletSync, 'get_rpc_client', lambda coin_type, wallet=None: node)
+    monkeypatch.setattr(walletSync, 'get_provenance_cache', lambda coin_type: ProvenanceCache('dogecoin', str(tmp_path)))
+    monkeypatch.setattr(walletSync, 'prefetch_transactions', lambda rpc, txids, coin_type: None)
+    coin_rpc = walletSync.CoinRPC('dogecoin_rpc')
+    node.attach(coin_rpc)
+    return node, coin_rpc, store
+
+def sync(coin_rpc, owners, handled):
+    walletSync.sync_coin_incremental(coin_rpc, owners, handled)
+    return walletSync.load_sync_state()['dogecoin_rpc']['last_block']
+
+def txids(store, address):
+    return [utxo['txid'] for utxo in store.get_utxos(address)]
+
+def test_follows_the_tip_with_only_changed_addresses(wallet):
+    node, coin_rpc, store = wallet
+    owners, handled = {}, set()
+    node.receive('D1', 'u1')
+    node.receive('D2', 'u2')
+
+    # No recorded block yet: full sync
+    assert sync(coin_rpc, owners, handled) == 'b1'
+    assert (txids(store, 'D1'), txids(store, 'D2')) == (['u1'], ['u2'])
+    assert owners == {('u1', 0): 'D1', ('u2', 0): 'D2'}
+
+    # A payment to D2 in the next block: only the new output is traced
+    node.tip, node.main_chain = 'b2', {'b1', 'b2'}
+    node.receive('D2', 'u3')
+    node.since['b1'] = [{'txid': 'u3', 'category': 'receive', 'address': 'D2', 'vout': 0, 'blockhash': 'b2'}]
+    node.traced.clear()
+    assert sync(coin_rpc, owners, handled) == 'b2'
+    assert txids(store, 'D2') == ['u2', 'u3']
+    assert node.traced == ['u3']
+
+    # D1 spends its only UTXO: found through the spent outpoint and removed
+    node.tip, node.main_chain = 'b3', {'b1', 'b2', 'b3'}
+    node.utxos['D1'] = []
+    node.transactions['s1'] = {'txid': 's1', 'vin': [{'txid': 'u1', 'vout': 0}], 'vout': []}
+    node.since['b2'] = [{'txid': 's1', 'category': 'send', 'vout': 0, 'blockhash': 'b3'}]
+    assert sync(coin_rpc, owners, handled) == 'b3'
+    assert not store.has_wallet('D1')
+    assert txids(store, 'D2') == ['u2', 'u3']
+
+def test_reorg_falls_back_to_a_full_sync(wallet):
+    node, coin_rpc, store = wallet
+    owners, handled = {}, set()
+    node.receive('D1', 'u1')
+    sync(coin_rpc, owners, handled)
+
+    # b1 was reorged away and u1 with it; a different block holds u2
+    node.tip, node.main_chain = 'b1x', {'b1x'}
+    node.utxos = {'D1': [], 'D2': []}
+    node.receive('D2', 'u2')
+    node.since['b1'] = []
+
+    assert sync(coin_rpc, owners, handled) == 'b1x'
+    assert not store.has_wallet('D1')
+    assert txids(store, 'D2') == ['u2']
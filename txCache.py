@@ -0,0 +1,192 @@
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+TX_CACHE_DIR = './data/txcache'
+LRU_BYTES = 256 * 1024 * 1024  # Decoded transactions kept in memory, by estimated size
+HEADER_LRU_SIZE = 4096  # Block headers kept in memory; each is a few hundred bytes
+DISK_TX_LIMIT = 16 * 1024  # Larger (inscription chunk) transactions are not written to disk
+TX_OVERHEAD = 1024  # Estimated bytes of dict and field overhead per decoded transaction
+PREFETCH_BATCH = 100  # Transactions per batch request; inscription chunk txs can be ~100KB each
+
+def _encode_decimal(value):
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _decode_decimal(obj):
+    if len(obj) == 1 and "$decimal" in obj:
+        return Decimal(obj["$decimal"])
+    return obj
+
+def tx_weight(tx):
+    """ Estimated in-memory size of a decoded transaction; script hex and asm dominate chunk transactions """
+    weight = TX_OVERHEAD + len(tx.get('hex', ''))
+    for vin in tx.get('vin', []):
+        script = vin.get('scriptSig', {})
+        weight += len(script.get('hex', '')) + len(script.get('asm', ''))
+    for vout in tx.get('vout', []):
+        script = vout.get('scriptPubKey', {})
+        weight += len(script.get('hex', '')) + len(script.get('asm', ''))
+    return weight
+
+def normalize_coin_type(coin_type):
+    """ Accept both 'dogecoin' and the rpc.conf section name 'dogecoin_rpc' """
+    if coin_type.endswith('_rpc'):
+        coin_type = coin_type[:-len('_rpc')]
+    return coin_type
+
+class TxCache:
+    """ Content-addressed store of decoded confirmed transactions with an LRU in front.
+
+    The transaction LRU is bounded by estimated bytes rather than entries, since a
+    chunk transaction can be a thousand times the size of a payment. Chunk
+    transactions over DISK_TX_LIMIT stay out of the disk cache; once assembled
+    their data lives in the content store.
+    """
+
+    def __init__(self, cache_dir=TX_CACHE_DIR, lru_bytes=LRU_BYTES, header_lru_size=HEADER_LRU_SIZE):
+        self.cache_dir = cache_dir
+        self.lru_bytes = lru_bytes
+        self.lru_used = 0
+        self.lru = OrderedDict()  # key -> (tx, weight)
+        self.header_lru_size = header_lru_size
+        self.block_headers = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _path(self, coin_type, txid):
+        return os.path.join(self.cache_dir, coin_type, txid[:2], f"{txid}.json")
+
+    def _remember_tx(self, key, tx):
+        weight = tx_weight(tx)
+        if weight > self.lru_bytes:
+            return
+        with self.lock:
+            previous = self.lru.pop(key, None)
+            if previous is not None:
+                self.lru_used -= previous[1]
+            self.lru[key] = (tx, weight)
+            self.lru_used += weight
+            while self.lru_used > self.lru_bytes:
+                _, (_, evicted) = self.lru.popitem(last=False)
+                self.lru_used -= evicted
+
+    def _recall_tx(self, key):
+        with self.lock:
+            cached = self.lru.get(key)
+            if cached is None:
+                return None
+            self.lru.move_to_end(key)
+            return cached[0]
+
+    def _remember_header(self, key, header):
+        with self.lock:
+            self.block_headers[key] = header
+            self.block_headers.move_to_end(key)
+            while len(self.block_headers) > self.header_lru_size:
+                self.block_headers.popitem(last=False)
+
+    def _recall_header(self, key):
+        with self.lock:
+            header = self.block_headers.get(key)
+            if header is not None:
+                self.block_headers.move_to_end(key)
+            return header
+
+    def get(self, coin_type, txid):
+        """ Return a cached decoded transaction, or None """
+        key = (coin_type, txid)
+        tx = self._recall_tx(key)
+        if tx is not None:
+            return tx
+
+        path = self._path(coin_type, txid)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                tx = json.load(f, object_hook=_decode_decimal)
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            return None
+        self._remember_tx(key, tx)
+        return tx
+
+    def put(self, coin_type, tx):
+        """ Store a decoded transaction if it is confirmed """
+        if not tx.get('blockhash'):
+            return
+        tx = {k: v for k, v in tx.items() if k != 'confirmations'}
+        self._remember_tx((coin_type, tx['txid']), tx)
+
+        if tx.get('size', len(tx.get('hex', '')) // 2) > DISK_TX_LIMIT:
+            return
+        path = self._path(coin_type, tx['txid'])
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(tx, f, default=_encode_decimal)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry {path}: {e}")
+
+    def get_block_header(self, coin_type, rpc_connection, block_hash):
+        """ Return the (immutable) header of a block, fetching it once """
+        key = (coin_type, block_hash)
+        header = self._recall_header(key)
+        if header is None:
+            header = self.put_block_header(coin_type, rpc_connection.getblockheader(block_hash))
+        return header
+
+    def has_block_header(self, coin_type, block_hash):
+        return self._recall_header((coin_type, block_hash)) is not None
+
+    def put_block_header(self, coin_type, header):
+        header = {k: v for k, v in header.items() if k not in ('confirmations', 'nextblockhash')}
+        self._remember_header((coin_type, header['hash']), header)
+        return header
+
+tx_cache = TxCache()
+
+def get_transaction(rpc_connection, txid, coin_type='dogecoin'):
+    """ Drop-in for getrawtransaction(txid, True) that serves confirmed txs from the cache """
+    coin_type = normalize_coin_type(coin_type)
+    tx = tx_cache.get(coin_type, txid)
+    if tx is None:
+        tx = rpc_connection.getrawtransaction(txid, True)
+        tx_cache.put(coin_type, tx)
+    return copy.deepcopy(tx)
+
+def prefetch_transactions(rpc_connection, txids, coin_type='dogecoin', batch_size=PREFETCH_BATCH):
+    """ Fetch every uncached txid in one batch so later get_transaction calls hit the cache """
+    coin_type = normalize_coin_type(coin_type)
+    missing = [txid for txid in dict.fromkeys(txids) if tx_cache.get(coin_type, txid) is None]
+    if not missing:
+        return
+    results = rpc_connection.batch_call(
+        'getrawtransaction', [(txid, True) for txid in missing], raise_errors=False, batch_size=batch_size
+    )
+    for tx in results:
+        if isinstance(tx, dict):
+            tx_cache.put(coin_type, tx)
+
+def prefetch_block_headers(rpc_connection, block_hashes, coin_type='dogecoin'):
+    """ Fetch every uncached block header in one batch so later get_block_header calls hit the cache """
+    coin_type = normalize_coin_type(coin_type)
+    missing = [h for h in dict.fromkeys(block_hashes) if not tx_cache.has_block_header(coin_type, h)]
+    if not missing:
+        return
+    results = rpc_connection.batch_call('getblockheader', [(h,) for h in missing], raise_errors=False)
+    for header in results:
+        if isinstance(header, dict):
+            tx_cache.put_block_header(coin_type, header)
+
+def get_block_header(rpc_connection, block_hash, coin_type='dogecoin'):
+    """ Return height/time and the other header fields of a block """
+    return tx_cache.get_block_header(normalize_coin_type(coin_type), rpc_connection, block_hash)
@@ -0,0 +1,340 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+WALLETS_DIR = "./wallets"
+WALLET_DB = "./data/wallets.db"
+
+# Sort keys accepted by WalletStore.utxo_page; 'position' is the order UTXOs were first seen in
+UTXO_SORT_COLUMNS = {
+    'position': 'position',
+    'timestamp': 'timestamp',
+    'amount': 'amount',
+    'mime_type': 'mime_type',
+    'genesis_txid': 'genesis_txid',
+}
+
+def wallet_coin_type(address):
+    """ 'Bell' or 'Doge' from the address prefix """
+    return "Bell" if address.startswith('B') else "Doge" if address.startswith('D') else "Unknown"
+
+def is_inscription(utxo):
+    return utxo.get('genesis_txid') not in (None, "not an ord", "encrypted message")
+
+def is_sms(utxo):
+    return utxo.get('sms_txid') not in (None, "not an sms")
+
+def summarize_utxos(address, utxos, last_block=None):
+    """ Per-address counts and balance, as listed by /api/wallets """
+    return {
+        "address": address,
+        "ord_count": sum(1 for utxo in utxos if utxo.get('genesis_txid', "not an ord") not in ["not an ord", "encrypted message"]),
+        "non_ord_balance": sum(float(utxo['amount']) for utxo in utxos if utxo.get('genesis_txid', "not an ord") == "not an ord"),
+        "utxo_count": len(utxos),
+        "coin_type": wallet_coin_type(address),
+        "last_block": last_block,
+        "updated": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+def escape_like(text):
+    """ Escape LIKE wildcards so text matches literally with ESCAPE '\\' """
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def mime_type_condition(mime_types, negate=False):
+    """ SQL condition matching any of mime_types; 'image/*' matches a whole family """
+    clauses, params = [], []
+    for mime_type in mime_types:
+        if mime_type.endswith('/*'):
+            clauses.append("mime_type LIKE ? ESCAPE '\\'")
+            params.append(f"{escape_like(mime_type[:-1])}%")
+        else:
+            clauses.append("mime_type = ?")
+            params.append(mime_type)
+    condition = f"({' OR '.join(clauses)})"
+    if negate:
+        # UTXOs without a mime type are never excluded
+        condition = f"(mime_type IS NULL OR NOT {condition})"
+    return condition, params
+
+class WalletStore:
+    """ Wallet state in one SQLite database: wallets, utxos, inscriptions and sms.
+
+    walletSync applies each sync as row inserts and deletes for the outpoints that
+    changed. Readers look UTXOs up by address, outpoint, genesis_txid or sms_txid
+    instead of parsing every wallet file. The wallet summaries are also kept in
+    memory and reloaded only when another process (walletSync running next to the
+    API) has committed changes.
+    """
+
+    SUMMARY_COLUMNS = ("address", "ord_count", "non_ord_balance", "utxo_count", "coin_type", "last_block", "updated")
+
+    def __init__(self, db_path=WALLET_DB, wallets_dir=WALLETS_DIR):
+        self.wallets_dir = wallets_dir
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.data_version = None
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS wallets ("
+            "address TEXT PRIMARY KEY, ord_count INTEGER NOT NULL, non_ord_balance REAL NOT NULL, "
+            "utxo_count INTEGER NOT NULL, coin_type TEXT, last_block TEXT, updated TEXT);"
+            "CREATE TABLE IF NOT EXISTS utxos ("
+            "txid TEXT NOT NULL, vout INTEGER NOT NULL, address TEXT NOT NULL, position INTEGER NOT NULL, "
+            "genesis_txid TEXT, sms_txid TEXT, mime_type TEXT, amount REAL, timestamp TEXT, data TEXT NOT NULL, "
+            "PRIMARY KEY (txid, vout));"
+            "CREATE INDEX IF NOT EXISTS utxos_address ON utxos (address, position);"
+            "CREATE TABLE IF NOT EXISTS inscriptions ("
+            "txid TEXT NOT NULL, vout INTEGER NOT NULL, genesis_txid TEXT NOT NULL, address TEXT NOT NULL, "
+            "mime_type TEXT, PRIMARY KEY (txid, vout));"
+            "CREATE INDEX IF NOT EXISTS inscriptions_genesis ON inscriptions (genesis_txid);"
+            "CREATE INDEX IF NOT EXISTS inscriptions_address ON inscriptions (address);"
+            "CREATE TABLE IF NOT EXISTS sms ("
+            "txid TEXT NOT NULL, vout INTEGER NOT NULL, sms_txid TEXT NOT NULL, address TEXT NOT NULL, "
+            "sender_address TEXT, timestamp TEXT, PRIMARY KEY (txid, vout));"
+            "CREATE INDEX IF NOT EXISTS sms_sms_txid ON sms (sms_txid);"
+            "CREATE INDEX IF NOT EXISTS sms_address ON sms (address);"
+            # Reverse indexes that outlive the UTXOs: who received an SMS, who last held an inscription
+            "CREATE TABLE IF NOT EXISTS sms_receivers (sms_txid TEXT PRIMARY KEY, address TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS inscription_holders (genesis_txid TEXT PRIMARY KEY, address TEXT NOT NULL);"
+            "INSERT OR IGNORE INTO sms_receivers SELECT sms_txid, address FROM sms;"
+            "INSERT OR IGNORE INTO inscription_holders SELECT genesis_txid, address FROM inscriptions;"
+            # Wallet files already imported, so a file is only read again after it changes
+            "CREATE TABLE IF NOT EXISTS wallet_files (file_name TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);"
+        )
+        self.db.commit()
+        self.import_wallet_files()
+
+    def import_wallet_files(self):
+        """ Load ./wallets/*.json files (from before the store, or written by the simple scripts).
+
+        The files stay in place for the simple scripts that read them; each one is
+        imported again only after its size or modification time changes.
+        """
+        if not os.path.exists(self.wallets_dir):
+            return
+        with self.lock:
+            imported = {
+                file_name: (mtime_ns, size)
+                for file_name, mtime_ns, size in self.db.execute("SELECT file_name, mtime_ns, size FROM wallet_files")
+            }
+        for file_name in os.listdir(self.wallets_dir):
+            if not file_name.endswith('.json'):
+                continue
+            wallet_path = os.path.join(self.wallets_dir, file_name)
+            try:
+                stat = os.stat(wallet_path)
+                if imported.get(file_name) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                with open(wallet_path, 'r') as f:
+                    utxos = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable wallet file {file_name}: {e}")
+                continue
+            with self.lock:
+                try:
+                    self._replace_wallet(os.path.splitext(file_name)[0], utxos, None)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO wallet_files VALUES (?, ?, ?)",
+                        (file_name, stat.st_mtime_ns, stat.st_size)
+                    )
+                    self.db.commit()
+                except (KeyError, TypeError, ValueError, AttributeError, sqlite3.Error) as e:
+                    self.db.rollback()
+                    self.data_version = None  # Reload the summaries the failed import may have touched
+                    print(f"Skipping wallet file {file_name} with invalid UTXO data: {e!r}")
+                    continue
+            print(f"Imported wallet file {wallet_path} into the wallet store")
+
+    def replace_wallet(self, address, utxos, last_block=None):
+        """ Make an address hold exactly these UTXOs, touching only the rows that changed """
+        with self.lock:
+            self._replace_wallet(address, utxos, last_block)
+            self.db.commit()
+
+    def _replace_wallet(self, address, utxos, last_block):
+        """ replace_wallet without the commit; caller holds the lock """
+        existing = {
+            (txid, vout): (position, data)
+            for txid, vout, position, data in self.db.execute(
+                "SELECT txid, vout, position, data FROM utxos WHERE address = ?", (address,)
+            )
+        }
+        next_position = max((position for position, _ in existing.values()), default=-1) + 1
+        current = set()
+        for utxo in utxos:
+            key = (utxo['txid'], utxo['vout'])
+            current.add(key)
+            data = json.dumps(utxo)
+            if key in existing:
+                position = existing[key][0]
+                if existing[key][1] == data:
+                    continue
+            else:
+                position = next_position
+                next_position += 1
+            self._write_utxo(address, position, utxo, data)
+        for txid, vout in existing.keys() - current:
+            self._delete_utxo(txid, vout)
+
+        entry = summarize_utxos(address, utxos, last_block)
+        if utxos:
+            self.db.execute(
+                "INSERT OR REPLACE INTO wallets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                tuple(entry[column] for column in self.SUMMARY_COLUMNS)
+            )
+            self.entries[address] = entry
+        else:
+            self.db.execute("DELETE FROM wallets WHERE address = ?", (address,))
+            self.entries.pop(address, None)
+
+    def remove_wallet(self, address):
+        """ Forget an address that no longer holds UTXOs """
+        self.replace_wallet(address, [])
+
+    def _write_utxo(self, address, position, utxo, data):
+        txid, vout = utxo['txid'], utxo['vout']
+        self.db.execute(
+            "INSERT OR REPLACE INTO utxos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (txid, vout, address, position, utxo.get('genesis_txid', 'not an ord'), utxo.get('sms_txid', 'not an sms'),
+             utxo.get('mime_type'), float(utxo['amount']), utxo.get('timestamp'), data)
+        )
+        self.db.execute("DELETE FROM inscriptions WHERE txid = ? AND vout = ?", (txid, vout))
+        self.db.execute("DELETE FROM sms WHERE txid = ? AND vout = ?", (txid, vout))
+        if is_inscription(utxo):
+            self.db.execute(
+                "INSERT INTO inscriptions VALUES (?, ?, ?, ?, ?)",
+                (txid, vout, utxo['genesis_txid'], address, utxo.get('mime_type'))
+            )
+            self.db.execute("INSERT OR REPLACE INTO inscription_holders VALUES (?, ?)", (utxo['genesis_txid'], address))
+        if is_sms(utxo):
+            self.db.execute(
+                "INSERT INTO sms VALUES (?, ?, ?, ?, ?, ?)",
+                (txid, vout, utxo['sms_txid'], address, utxo.get('sender_address'), utxo.get('timestamp'))
+            )
+            # The first wallet an SMS landed in is the one holding the key to decrypt it
+            self.db.execute("INSERT OR IGNORE INTO sms_receivers VALUES (?, ?)", (utxo['sms_txid'], address))
+
+    def _delete_utxo(self, txid, vout):
+        for table in ('utxos', 'inscriptions', 'sms'):
+            self.db.execute(f"DELETE FROM {table} WHERE txid = ? AND vout = ?", (txid, vout))
+
+    def get_utxos(self, address):
+        """ Return an address's UTXOs in the order they were first seen """
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT data FROM utxos WHERE address = ? ORDER BY position", (address,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def find_utxo(self, txid, vout):
+        """ Return (address, utxo) for a stored outpoint, or (None, None) """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT address, data FROM utxos WHERE txid = ? AND vout = ?", (txid, vout)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def find_receiving_address(self, sms_txid):
+        """ Return the address an SMS was sent to, even after its UTXO was spent, or None """
+        with self.lock:
+            row = self.db.execute("SELECT address FROM sms_receivers WHERE sms_txid = ?", (sms_txid,)).fetchone()
+        return row[0] if row else None
+
+    def find_inscription_holder(self, genesis_txid):
+        """ Return the last wallet address seen holding an inscription, or None """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT address FROM inscription_holders WHERE genesis_txid = ?", (genesis_txid,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def outpoint_owners(self):
+        """ Map every stored UTXO outpoint to the address holding it """
+        with self.lock:
+            rows = self.db.execute("SELECT txid, vout, address FROM utxos").fetchall()
+        return {(txid, vout): address for txid, vout, address in rows}
+
+    def genesis_txids(self):
+        """ Every inscription held by any wallet """
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT DISTINCT genesis_txid FROM inscriptions")]
+
+    def sms_txids(self):
+        """ Every SMS received by any wallet """
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT DISTINCT sms_txid FROM sms")]
+
+    def has_wallet(self, address):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM wallets WHERE address = ?", (address,)).fetchone() is not None
+
+    def refresh(self):
+        """ Reload the in-memory summaries if another connection changed the store """
+        with self.lock:
+            data_version = self.db.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self.data_version:
+                return
+            rows = self.db.execute(f"SELECT {', '.join(self.SUMMARY_COLUMNS)} FROM wallets").fetchall()
+            self.entries = {row[0]: dict(zip(self.SUMMARY_COLUMNS, row)) for row in rows}
+            self.data_version = data_version
+
+    def wallets(self):
+        """ Return the summary of every wallet """
+        self.refresh()
+        with self.lock:
+            return list(self.entries.values())
+
+    def utxo_page(self, address, offset=0, limit=None, include_mime=None, exclude_mime=None,
+                  sort='position', descending=False):
+        """ Return one page of a wallet's UTXOs with totals over every UTXO matching the filters.
+
+        The result has 'utxos', 'total', 'ord_count' and 'non_ord_amount'. Only the rows
+        on the page are decoded.
+        """
+        if sort not in UTXO_SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key {sort}")
+        where, params = ["address = ?"], [address]
+        if include_mime:
+            condition, condition_params = mime_type_condition(include_mime)
+            where.append(condition)
+            params.extend(condition_params)
+        if exclude_mime:
+            condition, condition_params = mime_type_condition(exclude_mime, negate=True)
+            where.append(condition)
+            params.extend(condition_params)
+        where = " AND ".join(where)
+        direction = "DESC" if descending else "ASC"
+        page_sql = (
+            f"SELECT data FROM utxos WHERE {where} "
+            f"ORDER BY {UTXO_SORT_COLUMNS[sort]} {direction}, position {direction} LIMIT ? OFFSET ?"
+        )
+
+        with self.lock:
+            total, ord_count, non_ord_amount = self.db.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(genesis_txid != 'not an ord'), 0), "
+                "COALESCE(SUM(CASE WHEN genesis_txid = 'not an ord' THEN amount ELSE 0 END), 0) "
+                f"FROM utxos WHERE {where}", params
+            ).fetchone()
+            rows = self.db.execute(page_sql, params + [-1 if limit is None else limit, offset]).fetchall()
+        return {
+            'utxos': [json.loads(row[0]) for row in rows],
+            'total': total,
+            'ord_count': ord_count,
+            'non_ord_amount': non_ord_amount,
+        }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_wallet_store():
+    """ Return the process-wide WalletStore """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WalletStore()
+        return _store
@@ -2,36 +2,48 @@ import configparser
 import json
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
 from datetime import datetime
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
-from urllib.parse import quote
+from bitcoinrpc.authproxy import JSONRPCException
+from txCache import get_transaction, get_block_header, prefetch_transactions
+from rpcClient import get_rpc_client
+from provenanceCache import get_provenance_cache, MISSING
+from walletStore import get_wallet_store
 
 # Load RPC credentials from rpc.conf
 config = configparser.ConfigParser()
 config.read('rpc.conf')
 
-WALLETS_DIR = "./wallets"
 BLOCK_HEIGHT_LIMIT = 4609723  # Define the block height limit for tracing ordinals
+SYNC_WORKERS = 8  # Size of the address and UTXO worker pools
+DEFAULT_COIN_CONCURRENCY = 4  # RPC calls in flight per coin unless rpc.conf sets max_workers
+SYNC_STATE_FILE = "./data/wallet_sync_state.json"
+FOLLOW_INTERVAL = 30  # Seconds between chain tip polls in --follow mode
+
+sync_state_lock = threading.Lock()
+
+class ProvenanceLookupError(Exception):
+    """ A transaction on a provenance walk could not be fetched, so the walk's answer is unknown """
 
 class CoinRPC:
     def __init__(self, coin_type):
         self.coin_type = coin_type
-        self.rpc_user = config.get(coin_type, 'user')
-        self.rpc_password = config.get(coin_type, 'password')
-        self.rpc_host = config.get(coin_type, 'host')
-        self.rpc_port = config.getint(coin_type, 'port')
+        self.max_workers = config.getint(coin_type, 'max_workers', fallback=DEFAULT_COIN_CONCURRENCY)
+        self.semaphore = threading.BoundedSemaphore(self.max_workers)
+        self.provenance_cache = get_provenance_cache(coin_type)
+        self.lookups = threading.local()  # Per-thread flag set when a transaction lookup fails
+        self.sync_tip = None  # Block the running sync is bringing the wallet store up to
         self.rpc_connection = None
         self.connect()
 
     def connect(self):
-        rpc_url = f"http://{self.rpc_user}:{self.rpc_password}@{self.rpc_host}:{self.rpc_port}"
-        self.rpc_connection = AuthServiceProxy(rpc_url)
+        # The shared client is thread safe and hands each worker its own pooled keep-alive connection
+        self.rpc_connection = get_rpc_client(self.coin_type)
 
     def get_wallet_rpc(self, wallet_name):
-        encoded_wallet = quote(wallet_name)
-        wallet_url = f"http://{self.rpc_user}:{self.rpc_password}@{self.rpc_host}:{self.rpc_port}/wallet/{encoded_wallet}"
-        return AuthServiceProxy(wallet_url)
+        return get_rpc_client(self.coin_type, wallet=wallet_name)
 
     def list_wallets(self):
         try:
@@ -90,17 +102,48 @@ class CoinRPC:
                 print(f"Error listing unspent for wallet {wallet}: {e}")
         return all_unspent
 
+    def snapshot_unspent(self):
+        """ List every wallet UTXO once and bucket it by address """
+        snapshot = {}
+        for utxo in self.list_unspent():
+            if 'address' in utxo:
+                snapshot.setdefault(utxo['address'], []).append(utxo)
+        return snapshot
+
+    def list_since_block(self, block_hash):
+        """ Return (wallet transactions since block_hash, current tip hash) """
+        if self.coin_type == 'bellscoin_rpc':
+            wallet_rpcs = [self.get_wallet_rpc(wallet) for wallet in self.list_wallets()]
+        else:
+            wallet_rpcs = [self.rpc_connection]
+
+        transactions = []
+        last_block = None
+        for wallet_rpc in wallet_rpcs:
+            result = wallet_rpc.listsinceblock(block_hash)
+            transactions.extend(result.get('transactions', []))
+            transactions.extend(result.get('removed', []))
+            last_block = result.get('lastblock', last_block)
+        return transactions, last_block or self.rpc_connection.getbestblockhash()
+
+    def is_block_in_main_chain(self, block_hash):
+        try:
+            return self.rpc_connection.getblockheader(block_hash)['confirmations'] >= 0
+        except JSONRPCException:
+            return False
+
     def get_transaction(self, txid):
         try:
-            tx = self.rpc_connection.getrawtransaction(txid, True)
+            tx = get_transaction(self.rpc_connection, txid, self.coin_type)
             if 'blockhash' in tx:
-                block = self.rpc_connection.getblock(tx['blockhash'])
+                block = get_block_header(self.rpc_connection, tx['blockhash'], self.coin_type)
                 tx['blocktime'] = block['time']
             else:
                 tx['blocktime'] = None
             return tx
         except JSONRPCException as e:
             print(f"Error retrieving transaction {txid}: {e}")
+            self.lookups.failed = True
             return None
 
     def get_previous_tx_output(self, txid, vout):
@@ -142,6 +185,21 @@ class CoinRPC:
         return flipped_pairs_string
 
     def trace_ordinal_and_sms(self, txid, output_index=0):
+        """ Trace an outpoint back to its ord/sms origin, reusing results cached for any ancestor hop """
+        cached = self.provenance_cache.get(txid, output_index)
+        if cached is not MISSING:
+            return cached
+        visited = [(txid, output_index)]
+        self.lookups.failed = False
+        result = self.walk_provenance(txid, output_index, visited)
+        if self.lookups.failed:
+            # A None from a walk that hit an RPC error is not "plain coin"; leave it uncached so it is retried
+            raise ProvenanceLookupError(f"Transaction lookup failed while tracing {txid}:{output_index}")
+        # Every hop on the walk resolves to the same origin, so later traces can stop at any of them
+        self.provenance_cache.put_many(visited, result)
+        return result
+
+    def walk_provenance(self, txid, output_index, visited):
         def process_transaction(txid, output_index):
             transaction = self.get_transaction(txid)
             if not transaction:
@@ -149,6 +207,7 @@ class CoinRPC:
 
             vins = transaction['vin']
             vouts = transaction['vout']
+            prefetch_transactions(self.rpc_connection, [vin['txid'] for vin in vins if 'txid' in vin], self.coin_type)
 
             vin_values = []
             vin_details = []
@@ -255,13 +314,19 @@ class CoinRPC:
             if isinstance(result, dict):  # If result is a dict containing genesis_txid or sms_txid
                 return result
             current_txid, current_output_index = result
+            if current_txid is not None:
+                cached = self.provenance_cache.get(current_txid, current_output_index)
+                if cached is not MISSING:
+                    print(f"Provenance of {current_txid}:{current_output_index} already known")
+                    return cached
+                visited.append((current_txid, current_output_index))
 
         return None
 
     def get_mime_type(self, genesis_txid):
         try:
             print(f"Attempting to get MIME type for genesis txid: {genesis_txid}")
-            tx = self.rpc_connection.getrawtransaction(genesis_txid, True)
+            tx = get_transaction(self.rpc_connection, genesis_txid, self.coin_type)
             if tx and 'vin' in tx and len(tx['vin']) > 0:
                 script_sig = tx['vin'][0].get('scriptSig', {})
                 if 'asm' in script_sig:
@@ -285,20 +350,31 @@ class CoinRPC:
             print(f"Error getting MIME type for genesis txid {genesis_txid}: {e}")
         return None
 
-def read_existing_utxos(filename):
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            return json.load(f)
-    return []
+def trace_new_utxos(coin_rpc, new_utxos, utxo_pool=None):
+    """ Trace new UTXOs, fanning out over utxo_pool when one is given """
+    if utxo_pool is None:
+        return {(utxo['txid'], utxo['vout']): process_new_utxo(coin_rpc, utxo) for utxo in new_utxos}
+
+    futures = {
+        utxo_pool.submit(process_new_utxo_limited, coin_rpc, utxo): (utxo['txid'], utxo['vout'])
+        for utxo in new_utxos
+    }
+    return {futures[future]: future.result() for future in as_completed(futures)}
 
-def process_wallet_utxos(coin_rpc, address):
-    filename = os.path.join(WALLETS_DIR, f"{address}.json")
-    existing_utxos = read_existing_utxos(filename)
+def process_wallet_utxos(coin_rpc, address, utxo_pool=None, current_utxos=None):
+    existing_utxos = get_wallet_store().get_utxos(address)
     existing_utxos_dict = {(utxo['txid'], utxo['vout']): utxo for utxo in existing_utxos}
 
-    current_utxos = coin_rpc.list_unspent(address)
+    if current_utxos is None:
+        current_utxos = coin_rpc.list_unspent(address)
     current_utxos_set = {(utxo['txid'], utxo['vout']) for utxo in current_utxos}
 
+    new_utxos = [
+        utxo for utxo in current_utxos
+        if utxo['address'] == address and (utxo['txid'], utxo['vout']) not in existing_utxos_dict
+    ]
+    traced_utxos = trace_new_utxos(coin_rpc, new_utxos, utxo_pool)
+
     updated_utxos = []
     for utxo in current_utxos:
         if utxo['address'] == address:
@@ -307,22 +383,21 @@ def process_wallet_utxos(coin_rpc, address):
                 # Use existing data if available
                 updated_utxo = existing_utxos_dict[utxo_key]
             else:
-                # Process new UTXO
-                updated_utxo = process_new_utxo(coin_rpc, utxo)
+                updated_utxo = traced_utxos[utxo_key]
             updated_utxos.append(updated_utxo)
 
     # Remove UTXOs that are no longer in the wallet
     updated_utxos = [utxo for utxo in updated_utxos if (utxo['txid'], utxo['vout']) in current_utxos_set]
 
     if not updated_utxos:
-        if os.path.exists(filename):
-            os.remove(filename)
-            print(f"Removed file {filename} as the wallet has no UTXOs")
+        if existing_utxos:
+            get_wallet_store().remove_wallet(address)
+            print(f"Removed wallet {address} as it has no UTXOs")
     else:
-        # Write updated UTXOs back to file
-        with open(filename, 'w') as f:
-            json.dump(updated_utxos, f, indent=4)
-        print(f"Updated file {filename} with {len(updated_utxos)} UTXOs")
+        # Only the outpoints that appeared, disappeared or changed are written
+        get_wallet_store().replace_wallet(address, updated_utxos, coin_rpc.sync_tip)
+        print(f"Updated wallet {address} with {len(updated_utxos)} UTXOs")
+    return updated_utxos
 
 def process_new_utxo(coin_rpc, utxo):
     amount = Decimal(utxo['amount'])
@@ -366,26 +441,201 @@ def process_new_utxo(coin_rpc, utxo):
         'mime_type': mime_type
     }
 
-def process_all_addresses(coin_rpc):
-    addresses = coin_rpc.list_addresses()
-    for address in addresses:
-        print(f"Processing address: {address}")
-        try:
-            process_wallet_utxos(coin_rpc, address)
-        except Exception as e:
-            print(f"An error occurred while processing address {address}: {e}")
+def process_new_utxo_limited(coin_rpc, utxo):
+    """ Run process_new_utxo while holding one of the coin's concurrency slots """
+    with coin_rpc.semaphore:
+        return process_new_utxo(coin_rpc, utxo)
 
-if __name__ == "__main__":
+def process_address(coin_rpc, address, utxo_pool=None, current_utxos=None, job=None):
+    if job is not None and job.cancelled:
+        return None
+    print(f"Processing address: {address}")
+    try:
+        return process_wallet_utxos(coin_rpc, address, utxo_pool, current_utxos)
+    except Exception as e:
+        print(f"An error occurred while processing address {address}: {e}")
+        return None
+    finally:
+        if job is not None:
+            job.advance()
+
+def process_addresses(coin_rpc, addresses, address_pool=None, utxo_pool=None, snapshot=None, job=None):
+    """ Process addresses and return {address: updated utxos} for the ones that succeeded.
+
+    All addresses are served from one grouped listunspent snapshot instead of
+    each address re-listing the whole wallet.
+    """
+    if snapshot is None:
+        snapshot = coin_rpc.snapshot_unspent()
+    if job is not None:
+        job.add_total(len(addresses))
+    if address_pool is None:
+        results = {address: process_address(coin_rpc, address, utxo_pool, snapshot.get(address, []), job) for address in addresses}
+    else:
+        futures = {
+            address_pool.submit(process_address, coin_rpc, address, utxo_pool, snapshot.get(address, []), job): address
+            for address in addresses
+        }
+        results = {futures[future]: future.result() for future in as_completed(futures)}
+    return {address: utxos for address, utxos in results.items() if utxos is not None}
+
+def process_all_addresses(coin_rpc, address_pool=None, utxo_pool=None, job=None):
+    snapshot = coin_rpc.snapshot_unspent()
+    if coin_rpc.coin_type == 'bellscoin_rpc':
+        # Bellscoin addresses are derived from listunspent anyway, so reuse the snapshot
+        addresses = list(snapshot)
+    else:
+        addresses = coin_rpc.list_addresses()
+    results = process_addresses(coin_rpc, addresses, address_pool, utxo_pool, snapshot, job)
+    if len(results) < len(addresses) and not (job is not None and job.cancelled):
+        # The tip must not be recorded, or incremental syncs would never revisit the failed addresses
+        raise RuntimeError(f"{len(addresses) - len(results)} of {len(addresses)} {coin_rpc.coin_type} addresses failed to sync")
+    return results
+
+def load_sync_state():
+    if os.path.exists(SYNC_STATE_FILE):
+        with open(SYNC_STATE_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+def record_synced_block(coin_type, block_hash):
+    """ Remember the chain tip a coin's wallets are known to be current with """
+    with sync_state_lock:
+        state = load_sync_state()
+        state[coin_type] = {
+            'last_block': block_hash,
+            'updated': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        os.makedirs(os.path.dirname(SYNC_STATE_FILE), exist_ok=True)
+        tmp_filename = f"{SYNC_STATE_FILE}.tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_filename, SYNC_STATE_FILE)
+
+def load_outpoint_owners():
+    """ Map every stored UTXO outpoint to the address holding it """
+    return get_wallet_store().outpoint_owners()
+
+def find_affected_addresses(coin_rpc, transactions, outpoint_owners):
+    """ Addresses that received an output or had a stored UTXO spent by the given wallet transactions """
+    addresses = set()
+    txids = list(dict.fromkeys(entry['txid'] for entry in transactions if 'txid' in entry))
+    prefetch_transactions(coin_rpc.rpc_connection, txids, coin_rpc.coin_type)
+    for entry in transactions:
+        if entry.get('category') in ('receive', 'generate', 'immature') and entry.get('address'):
+            addresses.add(entry['address'])
+    for txid in txids:
+        tx = coin_rpc.get_transaction(txid)
+        if not tx:
+            continue
+        for vin in tx['vin']:
+            owner = outpoint_owners.get((vin.get('txid'), vin.get('vout')))
+            if owner:
+                addresses.add(owner)
+    return addresses
+
+def sync_coin_incremental(coin_rpc, outpoint_owners, handled_entries, address_pool=None, utxo_pool=None):
+    """ Apply only the wallet changes since the last recorded block; fall back to a full sync on reorg """
+    coin_state = load_sync_state().get(coin_rpc.coin_type)
+    last_block = coin_state['last_block'] if coin_state else None
+
+    if not last_block or not coin_rpc.is_block_in_main_chain(last_block):
+        if last_block:
+            print(f"Block {last_block} left the {coin_rpc.coin_type} main chain, running a full resync")
+        tip = coin_rpc.sync_tip = coin_rpc.rpc_connection.getbestblockhash()
+        process_all_addresses(coin_rpc, address_pool, utxo_pool)
+        outpoint_owners.clear()
+        outpoint_owners.update(load_outpoint_owners())
+        handled_entries.clear()
+        record_synced_block(coin_rpc.coin_type, tip)
+        return
+
+    transactions, tip = coin_rpc.list_since_block(last_block)
+    coin_rpc.sync_tip = tip
+    # Mempool entries keep showing up until they confirm, so only react to ones not seen yet
+    entry_keys = {(entry.get('txid'), entry.get('vout'), entry.get('blockhash')) for entry in transactions}
+    fresh = [
+        entry for entry in transactions
+        if (entry.get('txid'), entry.get('vout'), entry.get('blockhash')) not in handled_entries
+    ]
+    addresses = find_affected_addresses(coin_rpc, fresh, outpoint_owners) if fresh else set()
+    if addresses:
+        print(f"{len(addresses)} {coin_rpc.coin_type} addresses changed since block {last_block}")
+        results = process_addresses(coin_rpc, addresses, address_pool, utxo_pool)
+        for address, utxos in results.items():
+            # Spent outpoints are left in the map; an outpoint can only be spent once
+            for utxo in utxos:
+                outpoint_owners[(utxo['txid'], utxo['vout'])] = address
+        if len(results) < len(addresses):
+            print(f"Some {coin_rpc.coin_type} addresses failed to sync, retrying on the next poll")
+            return
+    handled_entries.clear()
+    handled_entries.update(entry_keys)
+
+    if tip != last_block:
+        record_synced_block(coin_rpc.coin_type, tip)
+
+def get_configured_coins():
     default_section = config['default']
-    for coin in ['primary', 'fallback', 'secondary', 'tertiary']:
-        if coin in default_section:
-            coin_type = default_section[coin]
-            print(f"\nProcessing {coin_type.capitalize()} addresses:")
+    return [default_section[coin] for coin in ['primary', 'fallback', 'secondary', 'tertiary'] if coin in default_section]
+
+def sync_coin(coin_type, address_pool=None, utxo_pool=None, job=None):
+    print(f"\nProcessing {coin_type.capitalize()} addresses:")
+    try:
+        coin_rpc = CoinRPC(coin_type)
+        if not coin_rpc.rpc_connection:
+            raise ConnectionError(f"No RPC connection for {coin_type}")
+        tip = coin_rpc.sync_tip = coin_rpc.rpc_connection.getbestblockhash()
+        process_all_addresses(coin_rpc, address_pool, utxo_pool, job)
+        if job is not None and job.cancelled:
+            print(f"Sync of {coin_type} cancelled")
+            return
+        record_synced_block(coin_type, tip)
+    except Exception as e:
+        print(f"An error occurred while processing {coin_type} addresses: {e}")
+        raise
+
+def sync_all_coins(max_workers=SYNC_WORKERS, job=None):
+    """ Sync every configured coin, spreading addresses and UTXO traces over worker pools.
+
+    When run as a job, progress counts addresses and cancellation stops before the next address.
+    Every coin is attempted; if any failed, one error naming each of them is raised afterwards.
+    """
+    coins = get_configured_coins()
+    errors = []
+    # Addresses wait on UTXO traces, so the two stages get separate pools to avoid starving each other
+    with ThreadPoolExecutor(max_workers=max_workers) as address_pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as utxo_pool, \
+            ThreadPoolExecutor(max_workers=max(len(coins), 1)) as coin_pool:
+        futures = {coin_pool.submit(sync_coin, coin_type, address_pool, utxo_pool, job): coin_type for coin_type in coins}
+        for future in as_completed(futures):
             try:
-                coin_rpc = CoinRPC(coin_type)
-                if coin_rpc.rpc_connection:
-                    process_all_addresses(coin_rpc)
-                else:
-                    print(f"Skipping {coin_type} due to connection failure")
+                future.result()
             except Exception as e:
-                print(f"An error occurred while processing {coin_type} addresses: {e}")
\ No newline at end of file
+                errors.append(f"{futures[future]}: {e}")
+    if errors:
+        raise RuntimeError(f"Wallet sync failed for {len(errors)} of {len(coins)} coins: {'; '.join(errors)}")
+
+def follow_chain_tip(interval=FOLLOW_INTERVAL, max_workers=SYNC_WORKERS):
+    """ Keep the wallet store current by applying each new block's changes as the tip moves """
+    coin_rpcs = [CoinRPC(coin_type) for coin_type in get_configured_coins()]
+    outpoint_owners = load_outpoint_owners()
+    handled_entries = {coin_rpc.coin_type: set() for coin_rpc in coin_rpcs}
+    print(f"Following the chain tip for {', '.join(c.coin_type for c in coin_rpcs)} every {interval} seconds")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as address_pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as utxo_pool:
+        while True:
+            for coin_rpc in coin_rpcs:
+                try:
+                    sync_coin_incremental(coin_rpc, outpoint_owners, handled_entries[coin_rpc.coin_type], address_pool, utxo_pool)
+                except Exception as e:
+                    print(f"An error occurred while following {coin_rpc.coin_type}: {e}")
+            time.sleep(interval)
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == '--follow':
+        follow_chain_tip(int(sys.argv[2]) if len(sys.argv) > 2 else FOLLOW_INTERVAL)
+    else:
+        sync_all_coins()
\ No newline at end of file